@@ -3,13 +3,22 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import re
 import time
-import random
 import json
 import os
+import hashlib
+import xml.etree.ElementTree as ET
 from datetime import datetime
 from tqdm import tqdm
 import logging
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from sitemap import discover_urls
+from article_fields import structured_fields
+from rate_controller import AdaptiveRateController, parse_retry_after
+from http_client import HttpClient, DEFAULT_TIMEOUT
+from crawl_metrics import CrawlRecorder, format_report
+from dataset import write_parquet
+from records import ArticleRecord, JsonlWriter, iter_latest, read_urls, write_csv, write_excel, write_json
 
 # Set up logging
 logging.basicConfig(
@@ -21,9 +30,16 @@ logging.basicConfig(
     ]
 )
 
+DEFAULT_BASE_URL = "https://www.muftiwp.gov.my/ms/artikel/irsyad-hukum/umum"
+
 class MuftiWPAdvancedScraper:
-    def __init__(self, max_retries=3, delay_between_requests=(1, 3)):
-        self.base_url = "https://www.muftiwp.gov.my/ms/artikel/irsyad-hukum/umum"
+    def __init__(self, max_retries=3, delay_between_requests=(1, 3), discovery_workers=4, max_delay=60,
+                 http2=False, timeout=DEFAULT_TIMEOUT, recorder=None, base_url=DEFAULT_BASE_URL,
+                 stream_path=None, pool_size=None, cache_dir='cache'):
+        self.base_url = base_url
+        self.page_size = 25  # Articles per listing page (Joomla ?start= offset step)
+        self.discovery_workers = discovery_workers
+        self.article_path = '/irsyad-hukum/'  # Only sitemap/feed URLs under this path are articles
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -33,63 +49,125 @@ class MuftiWPAdvancedScraper:
             'Cache-Control': 'max-age=0',
         }
         self.data = []
+        # With a stream path, articles are appended to a JSONL file instead of kept in self.data
+        self.stream_path = stream_path
+        self.writer = None
+        self.streamed = 0
         self.max_retries = max_retries
         self.delay_range = delay_between_requests
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Requests are paced adaptively: start at the slow end of the range and
+        # speed up towards delay-min while the server stays healthy
+        self.rate_controller = AdaptiveRateController(
+            min_delay=delay_between_requests[0],
+            initial_delay=delay_between_requests[1],
+            max_delay=max(max_delay, delay_between_requests[1])
+        )
+        # Pooled keep-alive connections, sized so concurrent discovery never waits for a connection
+        self.http = HttpClient(
+            headers=self.headers,
+            pool_size=pool_size or max(10, discovery_workers),
+            timeout=timeout,
+            http2=http2
+        )
+        # Per-URL fetch/parse/save timings; without a metrics file only the run summary is kept
+        self.recorder = recorder or CrawlRecorder(path=None)
         
         # Create a directory for caching
-        self.cache_dir = 'cache'
+        self.cache_dir = cache_dir
         os.makedirs(self.cache_dir, exist_ok=True)
         
         # For resuming scraping
         self.checkpoint_file = 'checkpoint.json'
         
-    def random_delay(self):
-        """Add a random delay between requests to be respectful to the server."""
-        delay = random.uniform(self.delay_range[0], self.delay_range[1])
-        time.sleep(delay)
+    @property
+    def article_count(self):
+        """Number of articles scraped so far, in memory or in the stream file."""
+        return self.streamed if self.stream_path else len(self.data)
+    
+    def store_article(self, article_data):
+        """Keep an extracted article: append it to the stream file, or to self.data."""
+        if self.stream_path:
+            self.writer.write(ArticleRecord.from_dict(article_data))
+            self.streamed += 1
+        else:
+            self.data.append(article_data)
+    
+    def save_progress(self, page_num, processed_urls):
+        """Save intermediate results and a checkpoint."""
+        if self.stream_path:
+            # Every article is already on disk, and the stream file doubles as the list of processed URLs
+            self.save_checkpoint(page_num, None)
+        else:
+            self.save_to_json('mufti_wp_articles.json')
+            self.save_checkpoint(page_num, list(processed_urls))
+    
+    def cache_path(self, url):
+        """Return the cache file for a URL (stable across runs, unlike hash())."""
+        return os.path.join(self.cache_dir, f"{hashlib.md5(url.encode('utf-8')).hexdigest()}.html")
+    
+    def get_page_content(self, url, use_cache=True, refresh=False):
+        """Get the HTML content of a page with retries and caching.
         
-    def get_page_content(self, url, use_cache=True):
-        """Get the HTML content of a page with retries and caching."""
-        cache_file = os.path.join(self.cache_dir, f"{hash(url)}.html")
+        With refresh=True the cached copy is ignored but replaced by the fresh one.
+        """
+        cache_file = self.cache_path(url)
         
         # Try to load from cache if enabled
-        if use_cache and os.path.exists(cache_file):
+        if use_cache and not refresh and os.path.exists(cache_file):
             try:
+                read_start = time.perf_counter()
                 with open(cache_file, 'r', encoding='utf-8') as f:
                     logging.info(f"Loading from cache: {url}")
-                    return f.read()
+                    html_content = f.read()
+                self.recorder.record('fetch', url, cache='hit', bytes=len(html_content),
+                                     read_time=time.perf_counter() - read_start)
+                return html_content
             except Exception as e:
                 logging.warning(f"Error reading cache for {url}: {e}")
         
-        # Fetch from web with retries
+        # Fetch from web with retries, paced by the adaptive rate controller
         for attempt in range(self.max_retries):
+            self.rate_controller.wait()
+            request_start = time.perf_counter()
             try:
                 logging.info(f"Fetching: {url} (Attempt {attempt + 1}/{self.max_retries})")
-                response = self.session.get(url)
+                response, timings = self.http.get_timed(url)
+                self.rate_controller.record(
+                    latency=timings['total'],
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+                fetch_event = dict(timings, cache='miss', attempt=attempt + 1, status=response.status_code)
+                if response.status_code >= 400:
+                    self.recorder.record('fetch', url, error=f"HTTP {response.status_code}", **fetch_event)
                 response.raise_for_status()
                 
                 # Save to cache
                 if use_cache:
+                    write_start = time.perf_counter()
                     try:
                         with open(cache_file, 'w', encoding='utf-8') as f:
                             f.write(response.text)
                     except Exception as e:
                         logging.warning(f"Error writing cache for {url}: {e}")
+                    fetch_event['cache_write'] = time.perf_counter() - write_start
                 
+                self.recorder.record('fetch', url, **fetch_event)
                 return response.text
             except requests.RequestException as e:
                 logging.error(f"Error fetching {url}: {e}")
+                if not isinstance(e, requests.HTTPError):
+                    # Connection errors and timeouts never reached record() above
+                    self.rate_controller.record(error=True)
+                    self.recorder.record('fetch', url, cache='miss', attempt=attempt + 1,
+                                         error=type(e).__name__, total=time.perf_counter() - request_start)
                 if attempt < self.max_retries - 1:
-                    wait_time = (attempt + 1) * 2  # Exponential backoff
-                    logging.info(f"Retrying in {wait_time} seconds...")
+                    wait_time = self.rate_controller.retry_delay(attempt)  # Exponential backoff with jitter
+                    logging.info(f"Retrying in {wait_time:.1f} seconds...")
                     time.sleep(wait_time)
                 else:
                     logging.error(f"Failed to fetch {url} after {self.max_retries} attempts")
                     return None
-            
-            self.random_delay()
         
         return None
     
@@ -111,6 +189,168 @@ class MuftiWPAdvancedScraper:
         
         return article_links
     
+    def get_listing_url(self, page_num):
+        """Return the URL of a listing page (0-based)."""
+        if page_num == 0:
+            return self.base_url
+        return f"{self.base_url}?start={page_num * self.page_size}"
+    
+    def extract_total_pages(self, html_content):
+        """Read the total number of listing pages from the pagination block, if present."""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        pagination = soup.select_one('.pagination') or soup.select_one('.pagination-list')
+        if not pagination:
+            return None
+        
+        # 1. Joomla's counter, e.g. "Page 1 of 36" / "Halaman 1 dari 36"
+        counter = pagination.select_one('.counter') or soup.select_one('.pagination-counter')
+        if counter:
+            counter_match = re.search(r'(\d+)\s*(?:of|dari|/)\s*(\d+)', counter.text, re.IGNORECASE)
+            if counter_match:
+                return int(counter_match.group(2))
+        
+        # 2. Otherwise the largest ?start= offset linked from the pagination (usually "End")
+        offsets = []
+        for link in pagination.select('a[href]'):
+            start = parse_qs(urlparse(link['href']).query).get('start')
+            if start and start[0].isdigit():
+                offsets.append(int(start[0]))
+        if offsets:
+            return max(offsets) // self.page_size + 1
+        
+        return None
+    
+    def listing_page_has_articles(self, page_num):
+        """Check whether a listing page exists and lists at least one article."""
+        page_url = self.get_listing_url(page_num)
+        html_content = self.get_page_content(page_url)
+        return bool(html_content and self.extract_article_links(html_content, page_url))
+    
+    def probe_total_pages(self):
+        """Find the number of listing pages by exponential then binary search."""
+        if not self.listing_page_has_articles(0):
+            return 0
+        
+        # Grow the upper bound until we hit an empty page
+        low, high = 0, 1
+        while self.listing_page_has_articles(high):
+            low, high = high, high * 2
+        
+        # The last non-empty page lies in [low, high)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.listing_page_has_articles(middle):
+                low = middle
+            else:
+                high = middle
+        
+        return low + 1
+    
+    def fetch_listing_page(self, page_num):
+        """Fetch one listing page and return its article links, or None on failure."""
+        page_url = self.get_listing_url(page_num)
+        html_content = self.get_page_content(page_url)
+        if not html_content:
+            return None
+        return self.extract_article_links(html_content, page_url)
+    
+    def discover_frontier(self, start_page=0, max_pages=None):
+        """Build the full list of (page_num, article_links) before any article is fetched.
+        
+        The page count comes from the first listing page's pagination block, or is probed
+        with a binary search, and all listing pages are then fetched concurrently.
+        Returns the frontier and whether it reaches the end of the listing.
+        """
+        first_page = self.get_page_content(self.base_url)
+        if not first_page:
+            logging.error(f"Failed to get content for page {self.base_url}")
+            return [], False
+        
+        total_pages = self.extract_total_pages(first_page)
+        if total_pages is None:
+            logging.info("No pagination block found, probing for the number of listing pages")
+            total_pages = self.probe_total_pages()
+        logging.info(f"Listing has {total_pages} pages")
+        
+        end_page = total_pages if max_pages is None else min(total_pages, max_pages)
+        page_nums = list(range(start_page, end_page))
+        
+        # The first page is already in hand; fetch the rest concurrently
+        first_links = self.extract_article_links(first_page, self.base_url)
+        remaining = [n for n in page_nums if n != 0]
+        with ThreadPoolExecutor(max_workers=self.discovery_workers) as executor:
+            fetched = dict(zip(remaining, executor.map(self.fetch_listing_page, remaining)))
+        listings = [first_links if n == 0 else fetched[n] for n in page_nums]
+        
+        frontier = []
+        for page_num, article_links in zip(page_nums, listings):
+            if article_links is None:
+                # Stop at the first failed page so the checkpoint stays consistent
+                logging.error(f"Failed to get content for page {self.get_listing_url(page_num)}")
+                return frontier, False
+            if article_links:
+                frontier.append((page_num, article_links))
+        
+        total_links = sum(len(links) for _, links in frontier)
+        logging.info(f"Discovered {total_links} articles on {len(frontier)} listing pages")
+        return frontier, end_page == total_pages
+    
+    def open_remote_feed(self, url):
+        """Open a remote sitemap or feed as a stream for incremental parsing."""
+        return self.http.open_stream(url)
+    
+    def discover_from_sitemap(self, location):
+        """Return [(url, lastmod)] for the articles listed in a sitemap, sitemap index or RSS/Atom feed.
+        
+        location may be a URL, a local path or a file:// URL.
+        """
+        entries = {}
+        try:
+            for url, lastmod in discover_urls(location, self.open_remote_feed, self.article_path):
+                # Keep the newest lastmod when a URL is listed more than once
+                if url not in entries or (lastmod and (entries[url] is None or lastmod > entries[url])):
+                    entries[url] = lastmod
+        except (requests.RequestException, ET.ParseError, OSError) as e:
+            logging.error(f"Error reading sitemap {location}: {e}")
+            return []
+        
+        logging.info(f"Found {len(entries)} articles in {location}")
+        return list(entries.items())
+    
+    def is_cache_stale(self, url, lastmod):
+        """Whether the cached copy of a URL is older than its sitemap lastmod."""
+        cache_file = self.cache_path(url)
+        if lastmod is None or not os.path.exists(cache_file):
+            return False
+        return os.path.getmtime(cache_file) < lastmod.timestamp()
+    
+    def scrape_sitemap_entries(self, entries, processed_urls):
+        """Scrape new articles and refetch the ones whose lastmod is newer than our copy."""
+        # Refetched articles replace their old record in memory; in stream mode they are appended
+        # and the exports keep the latest version
+        positions = {record['url']: i for i, record in enumerate(self.data)}
+        
+        to_fetch = []
+        for url, lastmod in entries:
+            stale = self.is_cache_stale(url, lastmod)
+            if url not in processed_urls or stale:
+                to_fetch.append((url, stale))
+        logging.info(f"{len(to_fetch)} articles to fetch ({sum(stale for _, stale in to_fetch)} updated since last fetch)")
+        
+        for url, stale in tqdm(to_fetch, desc="Processing sitemap"):
+            article_data = self.extract_article_data(url, refresh=stale)
+            if article_data:
+                if url in positions:
+                    self.data[positions[url]] = article_data
+                else:
+                    positions[url] = len(self.data)
+                    self.store_article(article_data)
+                processed_urls.add(url)
+                
+                # Save intermediate results periodically
+                if len(processed_urls) % 10 == 0:
+                    self.save_progress(0, processed_urls)
+    
     def clean_text(self, text):
         """Clean text to ensure it's properly formatted for JSON."""
         if not text:
@@ -124,12 +364,13 @@ class MuftiWPAdvancedScraper:
         
         return text
     
-    def extract_article_data(self, article_url):
+    def extract_article_data(self, article_url, refresh=False):
         """Extract title, question, and answer from an article."""
-        html_content = self.get_page_content(article_url)
+        html_content = self.get_page_content(article_url, refresh=refresh)
         if not html_content:
             return None
         
+        parse_start = time.perf_counter()
         soup = BeautifulSoup(html_content, 'html.parser')
         
         # Extract title
@@ -140,12 +381,15 @@ class MuftiWPAdvancedScraper:
         article_body = soup.select_one('div[itemprop="articleBody"]')
         if not article_body:
             logging.warning(f"No article body found for {article_url}")
+            self.recorder.record('parse', article_url, parse_time=time.perf_counter() - parse_start,
+                                 question_source='none', answer_source='none')
             return {
                 'title': self.clean_text(title),
                 'question': "No question found",
                 'answer': "No answer found",
                 'url': article_url,
-                'scraped_at': datetime.now().isoformat()
+                'scraped_at': datetime.now().isoformat(),
+                **structured_fields(title, article_url, soup)
             }
         
         # Extract content
@@ -157,12 +401,16 @@ class MuftiWPAdvancedScraper:
         ringkasan_jawapan = ""
         huraian_jawapan = ""
         mukadimah = ""
+        # Which extraction fallback produced the question and answer, for the crawl report
+        question_source = 'none'
+        answer_source = 'none'
         
         # Try to extract different sections with more flexible patterns
         # 1. Extract Soalan (Question) - with or without colon
         soalan_match = re.search(r'Soalan\s*:?\s*(.*?)(?=Ringkasan\s+Jawapan\s*:?|Huraian\s+Jawapan\s*:?|Jawapan\s*:?|$)', content, re.DOTALL | re.IGNORECASE)
         if soalan_match:
             question = soalan_match.group(1).strip()
+            question_source = 'soalan'
         
         # 2. Extract Ringkasan Jawapan (Summary Answer) - with or without colon
         ringkasan_match = re.search(r'Ringkasan\s+Jawapan\s*:?\s*(.*?)(?=Huraian\s+Jawapan\s*:?|$)', content, re.DOTALL | re.IGNORECASE)
@@ -178,6 +426,7 @@ class MuftiWPAdvancedScraper:
         jawapan_match = re.search(r'Jawapan\s*:?\s*(.*?)(?=$)', content, re.DOTALL | re.IGNORECASE)
         if jawapan_match and not ringkasan_jawapan and not huraian_jawapan:
             answer = jawapan_match.group(1).strip()
+            answer_source = 'jawapan'
         
         # 5. Extract Mukadimah (Introduction) if no Soalan - with or without colon
         if question == "No question found":
@@ -193,10 +442,12 @@ class MuftiWPAdvancedScraper:
             if huraian_jawapan:
                 answer_parts.append(f"Huraian Jawapan: {huraian_jawapan}")
             answer = "\n\n".join(answer_parts)
+            answer_source = 'sections'
         
         # If no question but has mukadimah, use mukadimah as question
         if question == "No question found" and mukadimah:
             question = f"Mukadimah: {mukadimah}"
+            question_source = 'mukadimah'
         
         # If still no structured content found, try to extract based on paragraphs
         if question == "No question found" and answer == "No answer found":
@@ -205,6 +456,7 @@ class MuftiWPAdvancedScraper:
                 # Assume first paragraph might be the question and the rest is the answer
                 question = paragraphs[0].text.strip()
                 answer = "\n\n".join([p.text.strip() for p in paragraphs[1:]])
+                question_source = answer_source = 'paragraphs'
         
         # If still no question found, use the title as the question
         if question == "No question found":
@@ -214,36 +466,42 @@ class MuftiWPAdvancedScraper:
                 question = f"Apa hukum {title_parts[1].strip().lower()}?"
             else:
                 question = f"Apa hukum {title.strip().lower()}?"
+            question_source = 'title'
         
         # If still no answer found but we have content, use all content as answer
         if answer == "No answer found" and content:
             answer = content
+            answer_source = 'content'
         
         # Clean text to ensure it's properly formatted for JSON
         title = self.clean_text(title)
         question = self.clean_text(question)
         answer = self.clean_text(answer)
         
+        self.recorder.record('parse', article_url, parse_time=time.perf_counter() - parse_start,
+                             question_source=question_source, answer_source=answer_source)
         return {
             'title': title,
             'question': question,
             'answer': answer,
             'url': article_url,
-            'scraped_at': datetime.now().isoformat()
+            'scraped_at': datetime.now().isoformat(),
+            # Series number, publication date and topic, stored as filterable metadata downstream
+            **structured_fields(title, article_url, soup)
         }
     
     def save_checkpoint(self, page_num, processed_urls):
         """Save a checkpoint to resume scraping later."""
         checkpoint_data = {
             'page_num': page_num,
-            'processed_urls': processed_urls,
+            'processed_urls': processed_urls or [],
             'timestamp': datetime.now().isoformat()
         }
         
         with open(self.checkpoint_file, 'w') as f:
             json.dump(checkpoint_data, f)
         
-        logging.info(f"Checkpoint saved: Page {page_num}, {len(processed_urls)} articles processed")
+        logging.info(f"Checkpoint saved: Page {page_num}, {len(processed_urls) if processed_urls is not None else self.article_count} articles processed")
     
     def load_checkpoint(self):
         """Load the checkpoint if it exists."""
@@ -258,15 +516,25 @@ class MuftiWPAdvancedScraper:
         
         return 0, set()
     
-    def scrape_all_pages(self, start_page=None, max_pages=None, resume=True):
-        """Scrape all pages and extract article data with resuming capability."""
+    def scrape_all_pages(self, start_page=None, max_pages=None, resume=True, sitemap=None):
+        """Scrape all pages and extract article data with resuming capability.
+        
+        If a sitemap or feed is given, articles are discovered from it and the
+        listing pages are only crawled when it yields nothing.
+        """
         processed_urls = set()
         
         # Try to load checkpoint if resume is enabled
         if resume:
             page_num, processed_urls = self.load_checkpoint()
+            if self.stream_path:
+                # Only the URLs are read back, never the articles themselves
+                stored_urls = read_urls(self.stream_path)
+                processed_urls |= stored_urls
+                self.streamed = len(stored_urls)
+                logging.info(f"Found {self.streamed} articles in {self.stream_path} from previous run")
             # Load existing data if available
-            if os.path.exists('mufti_wp_articles.json'):
+            elif os.path.exists('mufti_wp_articles.json'):
                 try:
                     with open('mufti_wp_articles.json', 'r', encoding='utf-8') as f:
                         self.data = json.load(f)
@@ -275,6 +543,8 @@ class MuftiWPAdvancedScraper:
                     logging.error(f"Error loading previous data: {e}")
         else:
             page_num = 0
+            if self.stream_path and os.path.exists(self.stream_path):
+                os.remove(self.stream_path)
             
         # Override start page if specified
         if start_page is not None:
@@ -283,32 +553,22 @@ class MuftiWPAdvancedScraper:
         more_pages = True
         
         logging.info("Starting to scrape articles...")
+        if self.stream_path:
+            self.writer = JsonlWriter(self.stream_path)
         
         try:
-            while more_pages:
-                if max_pages is not None and page_num >= max_pages:
-                    logging.info(f"Reached maximum number of pages ({max_pages})")
-                    break
-                    
-                if page_num == 0:
-                    page_url = self.base_url
-                else:
-                    page_url = f"{self.base_url}?start={page_num * 25}"
-                
-                logging.info(f"Scraping page: {page_url}")
-                html_content = self.get_page_content(page_url)
-                
-                if not html_content:
-                    logging.error(f"Failed to get content for page {page_url}")
-                    break
-                    
-                article_links = self.extract_article_links(html_content, page_url)
-                
-                if not article_links:
-                    logging.info("No more articles found. Ending scraping.")
-                    more_pages = False
-                    continue
-                
+            entries = self.discover_from_sitemap(sitemap) if sitemap else []
+            if entries:
+                self.scrape_sitemap_entries(entries, processed_urls)
+                frontier, reached_end = [], True
+            else:
+                if sitemap:
+                    logging.warning(f"No articles found in {sitemap}, falling back to listing pages")
+                frontier, reached_end = self.discover_frontier(page_num, max_pages)
+            if max_pages is not None and not reached_end:
+                logging.info(f"Reached maximum number of pages ({max_pages})")
+            
+            for page_num, article_links in frontier:
                 logging.info(f"Found {len(article_links)} articles on page {page_num + 1}")
                 
                 # Filter out already processed URLs
@@ -318,29 +578,30 @@ class MuftiWPAdvancedScraper:
                 for link in tqdm(new_links, desc=f"Processing page {page_num + 1}"):
                     article_data = self.extract_article_data(link)
                     if article_data:
-                        self.data.append(article_data)
+                        self.store_article(article_data)
                         processed_urls.add(link)
                         
                         # Save intermediate results periodically
-                        if len(self.data) % 10 == 0:
-                            self.save_to_json('mufti_wp_articles.json')
-                            self.save_checkpoint(page_num, list(processed_urls))
-                    
-                    self.random_delay()
+                        if self.article_count % 10 == 0:
+                            self.save_progress(page_num, processed_urls)
                 
-                page_num += 1
-                self.save_checkpoint(page_num, list(processed_urls))
-                self.random_delay()
+                self.save_checkpoint(page_num + 1, None if self.stream_path else list(processed_urls))
+            
+            if reached_end:
+                logging.info("No more articles found. Ending scraping.")
+                more_pages = False
                 
         except KeyboardInterrupt:
             logging.info("Scraping interrupted by user. Saving progress...")
-            self.save_to_json('mufti_wp_articles.json')
-            self.save_checkpoint(page_num, list(processed_urls))
+            self.save_progress(page_num, processed_urls)
         except Exception as e:
             logging.error(f"Error during scraping: {e}")
-            self.save_to_json('mufti_wp_articles.json')
-            self.save_checkpoint(page_num, list(processed_urls))
+            self.save_progress(page_num, processed_urls)
             raise
+        finally:
+            if self.writer:
+                self.writer.close()
+                self.writer = None
             
         # Final save
         self.save_to_json('mufti_wp_articles.json')
@@ -352,58 +613,156 @@ class MuftiWPAdvancedScraper:
     
     def save_to_json(self, filename="mufti_wp_articles.json"):
         """Save the scraped data to a JSON file."""
-        if not self.data:
+        if not self.article_count:
             logging.warning("No data to save.")
             return
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        save_start = time.perf_counter()
+        if self.stream_path:
+            records = write_json(iter_latest(self.stream_path), filename)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            records = len(self.data)
+        self.record_save('json', filename, save_start, records)
         
         logging.info(f"Data saved to {filename}")
     
-    def save_to_csv(self, filename="mufti_wp_articles.csv"):
+    def iter_records(self):
+        """All scraped articles as ArticleRecords, read from the stream file in stream mode."""
+        if self.stream_path:
+            return iter_latest(self.stream_path)
+        return (ArticleRecord.from_dict(article) for article in self.data)
+    
+    def save_to_parquet(self, filename="mufti_wp_articles.parquet"):
+        """Save the scraped data to a Parquet file, written in row groups."""
+        if not self.article_count:
+            logging.warning("No data to save.")
+            return
+        
+        save_start = time.perf_counter()
+        records = write_parquet(self.iter_records(), filename)
+        self.record_save('parquet', filename, save_start, records)
+        logging.info(f"Data saved to {filename}")
+    
+    def save_to_csv(self, filename="mufti_wp_articles.csv", excel=True):
         """Save the scraped data to a CSV file."""
-        if not self.data:
+        if not self.article_count:
             logging.warning("No data to save.")
             return
         
+        if self.stream_path:
+            self.export_stream(filename, excel)
+            return
+        
+        save_start = time.perf_counter()
         df = pd.DataFrame(self.data)
+        # Keep series numbers and dates as integers even when some articles lack them
+        for column in ('series_number', 'published'):
+            if column in df.columns:
+                df[column] = df[column].astype('Int64')
         df.to_csv(filename, index=False, encoding='utf-8')
+        self.record_save('csv', filename, save_start, len(df))
         logging.info(f"Data saved to {filename}")
         
+        if not excel:
+            return
+        
         # Also save as Excel if pandas has openpyxl
         try:
             excel_filename = filename.replace('.csv', '.xlsx')
+            save_start = time.perf_counter()
             df.to_excel(excel_filename, index=False)
+            self.record_save('xlsx', excel_filename, save_start, len(df))
+            logging.info(f"Data also saved to {excel_filename}")
+        except Exception as e:
+            logging.warning(f"Could not save as Excel: {e}")
+    
+    def export_stream(self, filename="mufti_wp_articles.csv", excel=True):
+        """Convert the stream file to CSV and Excel one record at a time (scrape_all_pages writes the JSON)."""
+        save_start = time.perf_counter()
+        records = write_csv(iter_latest(self.stream_path), filename)
+        self.record_save('csv', filename, save_start, records)
+        logging.info(f"Data saved to {filename}")
+        
+        if not excel:
+            return
+        
+        try:
+            excel_filename = filename.replace('.csv', '.xlsx')
+            save_start = time.perf_counter()
+            records = write_excel(iter_latest(self.stream_path), excel_filename)
+            self.record_save('xlsx', excel_filename, save_start, records)
             logging.info(f"Data also saved to {excel_filename}")
         except Exception as e:
             logging.warning(f"Could not save as Excel: {e}")
+    
+    def record_save(self, file_format, filename, save_start, records):
+        """Record how long writing an output file took and how big it is."""
+        self.recorder.record('save', format=file_format, path=filename, records=records,
+                             bytes=os.path.getsize(filename), seconds=time.perf_counter() - save_start)
 
-def main():
+def main(argv=None):
     import argparse
     
     parser = argparse.ArgumentParser(description='Scrape articles from Mufti WP website')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='Listing page to scrape (e.g. a local mock_site.py)')
     parser.add_argument('--start-page', type=int, help='Page number to start scraping from')
     parser.add_argument('--max-pages', type=int, help='Maximum number of pages to scrape')
     parser.add_argument('--no-resume', action='store_true', help='Do not resume from checkpoint')
-    parser.add_argument('--delay-min', type=float, default=1, help='Minimum delay between requests in seconds')
-    parser.add_argument('--delay-max', type=float, default=3, help='Maximum delay between requests in seconds')
+    parser.add_argument('--delay-min', type=float, default=1, help='Fastest pacing: minimum delay between requests in seconds')
+    parser.add_argument('--delay-max', type=float, default=3, help='Initial delay between requests in seconds')
+    parser.add_argument('--max-delay', type=float, default=60, help='Slowest pacing the rate controller may back off to')
+    parser.add_argument('--discovery-workers', type=int, default=4, help='Listing pages to fetch concurrently')
+    parser.add_argument('--http2', action='store_true', help='Use HTTP/2 (requires httpx[http2])')
+    parser.add_argument('--timeout', type=float, default=30, help='Read timeout per request in seconds')
+    parser.add_argument('--sitemap', help='Sitemap, sitemap index or RSS/Atom feed (URL or file) to discover articles from')
+    parser.add_argument('--sitemap-filter', default='/irsyad-hukum/', help='Only sitemap URLs containing this path are scraped')
+    parser.add_argument('--metrics-file', default='crawl_metrics.jsonl', help='Per-URL timings as JSON lines (empty to disable)')
+    parser.add_argument('--report-file', default='crawl_report.json', help='Where to write the end-of-run summary')
+    parser.add_argument('--formats', default='csv,xlsx',
+                        help='Comma-separated exports written at the end: csv, xlsx, parquet (JSON is always written)')
+    parser.add_argument('--stream', nargs='?', const='mufti_wp_articles.jsonl',
+                        help='Append articles to a JSONL file (default mufti_wp_articles.jsonl) instead of keeping them in memory')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    scraper = MuftiWPAdvancedScraper(
-        delay_between_requests=(args.delay_min, args.delay_max)
-    )
+    recorder = CrawlRecorder(path=args.metrics_file or None)
     
-    scraper.scrape_all_pages(
-        start_page=args.start_page,
-        max_pages=args.max_pages,
-        resume=not args.no_resume
+    scraper = MuftiWPAdvancedScraper(
+        delay_between_requests=(args.delay_min, args.delay_max),
+        discovery_workers=args.discovery_workers,
+        max_delay=args.max_delay,
+        http2=args.http2,
+        timeout=(DEFAULT_TIMEOUT[0], args.timeout),
+        recorder=recorder,
+        base_url=args.base_url,
+        stream_path=args.stream
     )
+    scraper.article_path = args.sitemap_filter
     
-    scraper.save_to_csv()
-    
-    logging.info(f"Total articles scraped: {len(scraper.data)}")
+    try:
+        scraper.scrape_all_pages(
+            start_page=args.start_page,
+            max_pages=args.max_pages,
+            resume=not args.no_resume,
+            sitemap=args.sitemap
+        )
+        
+        formats = {name.strip() for name in args.formats.split(',')}
+        if 'csv' in formats:
+            scraper.save_to_csv(excel='xlsx' in formats)
+        if 'parquet' in formats:
+            scraper.save_to_parquet()
+        
+        logging.info(f"Total articles scraped: {scraper.article_count}")
+    finally:
+        # Report even when the run fails, that's when the numbers matter most
+        report = recorder.write_report(args.report_file)
+        recorder.close()
+        for line in format_report(report):
+            logging.info(line)
+        logging.info(f"Crawl report saved to {args.report_file}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -3,63 +3,202 @@ import matplotlib.pyplot as plt
 import re
 import os
 import json
+import argparse
 from collections import Counter
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
 import seaborn as sns
 
-# Download NLTK resources (uncomment if needed)
-# nltk.download('punkt')
-# nltk.download('stopwords')
+# The columns the analysis uses; Parquet input only reads these
+ANALYSIS_COLUMNS = ['title', 'question', 'answer', 'url', 'scraped_at']
 
-def load_data(file_path):
-    """Load data from CSV or JSON file."""
-    if file_path.endswith('.csv'):
-        return pd.read_csv(file_path)
+# Fields whose words and n-grams are counted
+TEXT_FIELDS = ('title', 'question')
+
+# Lowercase words, keeping Malay reduplication such as "kanak-kanak" as one token
+TOKEN_RE = re.compile(r"[a-z]+(?:-[a-z]+)*")
+
+MALAY_STOPWORDS = frozenset("""
+ada adakah adalah adapun agak agar akan aku amat anda antara apa apabila apakah atas atau bagaimana bagi
+bahawa bahawasanya bahkan baik banyak beberapa begini begitu belum berapa berikut bersama beliau boleh bukan
+dahulu dalam dan dapat dari daripada demi dengan di dia dialah dikatakan diri hal hanya harus hendak
+hendaklah hingga ia iaitu ialah ini itu jadi jangan jika jikalau juga justeru kalau kami kamu kan
+kata ke kecuali kemudian kepada kerana ketika kita lagi lain lalu lebih maka malah mana manakala masih
+mereka mesti mungkin namun nya oleh pada padahal para pernah pula saja sahaja sama sambil sangat
+satu sebab sebagai sebagaimana sebelum sedang sedangkan sehingga sejak sekali selain selama selepas semua
+sendiri seorang seperti serta sesuatu setelah setiap sini situ suatu sudah supaya tanpa tatkala telah
+tentang tersebut tetapi tiada tidak turut untuk walaupun yaitu yakni yang
+""".split())
+
+# Headings and series labels that appear in every article and say nothing about its topic
+BOILERPLATE_WORDS = frozenset("""
+soalan jawapan ringkasan huraian mukadimah irsyad fatwa al-fatwa siri swt saw
+""".split())
+
+STOPWORDS = MALAY_STOPWORDS | BOILERPLATE_WORDS
+
+def iter_chunks(file_path, columns=ANALYSIS_COLUMNS, chunk_size=2000):
+    """Yield the data as {column: list of values} chunks without loading the whole file.
+    
+    Parquet, CSV and JSONL are read incrementally; a JSON array has to be
+    parsed in one go, but is still handed out in chunks.
+    """
+    if file_path.endswith('.parquet'):
+        from dataset import require_pyarrow
+        _, pq = require_pyarrow()
+        parquet_file = pq.ParquetFile(file_path, memory_map=True)
+        available = [column for column in columns if column in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=available):
+            yield batch.to_pydict()
+    elif file_path.endswith('.csv'):
+        for frame in pd.read_csv(file_path, chunksize=chunk_size, usecols=lambda column: column in columns):
+            yield {column: frame[column].tolist() for column in frame.columns}
+    elif file_path.endswith('.jsonl'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            records = []
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+                if len(records) >= chunk_size:
+                    yield records_to_chunk(records, columns)
+                    records = []
+            if records:
+                yield records_to_chunk(records, columns)
     elif file_path.endswith('.json'):
         with open(file_path, 'r', encoding='utf-8') as f:
-            return pd.DataFrame(json.load(f))
+            records = json.load(f)
+        for start in range(0, len(records), chunk_size):
+            yield records_to_chunk(records[start:start + chunk_size], columns)
     else:
-        raise ValueError("Unsupported file format. Use CSV or JSON.")
-
-def basic_stats(df):
-    """Print basic statistics about the dataset."""
-    print(f"Total articles: {len(df)}")
-    print("\nColumns in the dataset:")
-    for col in df.columns:
-        print(f"- {col}")
-    
-    # Check for missing values
-    print("\nMissing values:")
-    for col in df.columns:
-        missing = df[col].isna().sum()
-        if missing > 0:
-            print(f"- {col}: {missing} ({missing/len(df)*100:.2f}%)")
-    
-    # Content length statistics
-    if 'question' in df.columns:
-        df['question_length'] = df['question'].str.len()
-        print("\nQuestion length statistics:")
-        print(df['question_length'].describe())
-    
-    if 'answer' in df.columns:
-        df['answer_length'] = df['answer'].str.len()
-        print("\nAnswer length statistics:")
-        print(df['answer_length'].describe())
-
-def plot_content_length_distribution(df):
-    """Plot the distribution of content lengths."""
+        raise ValueError("Unsupported file format. Use Parquet, CSV, JSONL or JSON.")
+
+def records_to_chunk(records, columns):
+    present = [column for column in columns if any(column in record for record in records)]
+    return {column: [record.get(column) for record in records] for column in present}
+
+def as_text(value):
+    """Text of a cell, treating None and NaN as empty."""
+    return value if isinstance(value, str) else ''
+
+def tokenize(text, min_length=3, stopwords=STOPWORDS):
+    """Lowercase word tokens with stopwords and short words removed."""
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) >= min_length and token not in stopwords]
+
+def ngrams(text, n, min_length=3, stopwords=STOPWORDS):
+    """Word n-grams that neither start nor end with a stopword, joined by spaces."""
+    tokens = TOKEN_RE.findall(text.lower())
+    return ngrams_from_tokens(tokens, [len(token) >= min_length and token not in stopwords for token in tokens], n)
+
+def ngrams_from_tokens(tokens, usable, n):
+    return [
+        ' '.join(tokens[i:i + n])
+        for i in range(len(tokens) - n + 1)
+        if usable[i] and usable[i + n - 1]
+    ]
+
+def year_of(published, scraped_at):
+    """Year of an article: its publication date when known, otherwise when it was scraped."""
+    for value in (published, scraped_at):
+        if isinstance(value, (int, np.integer)) and value > 10000000:
+            return str(value)[:4]  # yyyymmdd
+        if isinstance(value, str) and re.match(r'\d{4}', value):
+            return value[:4]
+    return 'unknown'
+
+def count_chunk(chunk, fields=TEXT_FIELDS, max_ngram=2, min_length=3):
+    """Count words, n-grams, lengths and per-year figures for one chunk; runs in a worker process."""
+    rows = len(next(iter(chunk.values()), []))
+    fields = [field for field in fields if field in chunk]
+    counts = {(field, n): Counter() for field in fields for n in range(1, max_ngram + 1)}
+    lengths = {}
+    for field in ('question', 'answer'):
+        if field in chunk:
+            lengths[field] = np.fromiter((len(as_text(value)) for value in chunk[field]), dtype=np.int64, count=rows)
+    
+    published = chunk.get('published', [None] * rows)
+    scraped_at = chunk.get('scraped_at', [None] * rows)
+    per_year = {}
+    for index in range(rows):
+        year = year_of(published[index], scraped_at[index])
+        entry = per_year.setdefault(year, {'articles': 0, 'answer_chars': 0, 'words': Counter()})
+        entry['articles'] += 1
+        if 'answer' in lengths:
+            entry['answer_chars'] += int(lengths['answer'][index])
+        
+        # Each text is tokenized once; words and n-grams both come from the same token list
+        for field in fields:
+            tokens = TOKEN_RE.findall(as_text(chunk[field][index]).lower())
+            usable = [len(token) >= min_length and token not in STOPWORDS for token in tokens]
+            words = [token for token, keep in zip(tokens, usable) if keep]
+            counts[(field, 1)].update(words)
+            entry['words'].update(words)
+            for n in range(2, max_ngram + 1):
+                counts[(field, n)].update(ngrams_from_tokens(tokens, usable, n))
+    
+    return {'rows': rows, 'counts': counts, 'lengths': lengths, 'per_year': per_year}
+
+def merge_partial(total, partial):
+    """Fold one chunk's counts into the running totals."""
+    total['rows'] += partial['rows']
+    for key, counter in partial['counts'].items():
+        total['counts'].setdefault(key, Counter()).update(counter)
+    for field, values in partial['lengths'].items():
+        total['lengths'].setdefault(field, []).append(values)
+    for year, entry in partial['per_year'].items():
+        merged = total['per_year'].setdefault(year, {'articles': 0, 'answer_chars': 0, 'words': Counter()})
+        merged['articles'] += entry['articles']
+        merged['answer_chars'] += entry['answer_chars']
+        merged['words'].update(entry['words'])
+
+def analyze_corpus(file_path, fields=TEXT_FIELDS, max_ngram=2, min_length=3, workers=None, chunk_size=2000):
+    """Stream a dataset through worker processes in chunks and merge their counts.
+    
+    One pass produces everything the report needs: word and n-gram counts per
+    field, question/answer lengths and per-year breakdowns.
+    """
+    workers = workers or os.cpu_count() or 1
+    columns = list(dict.fromkeys(ANALYSIS_COLUMNS + ['published'] + list(fields)))
+    total = {'rows': 0, 'counts': {}, 'lengths': {}, 'per_year': {}}
+    chunks = iter_chunks(file_path, columns, chunk_size)
+    
+    if workers == 1:
+        for chunk in chunks:
+            merge_partial(total, count_chunk(chunk, fields, max_ngram, min_length))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep only a couple of chunks per worker in flight so memory stays bounded
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(count_chunk, chunk, fields, max_ngram, min_length))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge_partial(total, future.result())
+            for future in pending:
+                merge_partial(total, future.result())
+    
+    total['lengths'] = {field: np.concatenate(parts) for field, parts in total['lengths'].items()}
+    return total
+
+def corpus_stats(stats):
+    """Print basic statistics from the streamed corpus counts."""
+    print(f"Total articles: {stats['rows']}")
+    for field, lengths in stats['lengths'].items():
+        print(f"\n{field.capitalize()} length statistics:")
+        print(pd.Series(lengths, name=f'{field}_length').describe())
+
+def plot_content_length_distribution(lengths):
+    """Plot the distribution of content lengths, given {'question': lengths, 'answer': lengths}."""
     plt.figure(figsize=(12, 6))
     
-    if 'question_length' in df.columns and 'answer_length' in df.columns:
+    if 'question' in lengths and 'answer' in lengths:
         plt.subplot(1, 2, 1)
-        sns.histplot(df['question_length'], kde=True)
+        sns.histplot(lengths['question'], kde=True)
         plt.title('Question Length Distribution')
         plt.xlabel('Length (characters)')
         
         plt.subplot(1, 2, 2)
-        sns.histplot(df['answer_length'], kde=True)
+        sns.histplot(lengths['answer'], kde=True)
         plt.title('Answer Length Distribution')
         plt.xlabel('Length (characters)')
     
@@ -67,81 +206,83 @@ def plot_content_length_distribution(df):
     plt.savefig('content_length_distribution.png')
     print("Saved content length distribution plot to 'content_length_distribution.png'")
 
-def extract_common_words(text_series, top_n=20, min_length=3):
-    """Extract the most common words from a series of text."""
-    # Combine all text
-    all_text = ' '.join(text_series.fillna('').astype(str))
-    
-    # Tokenize
-    tokens = word_tokenize(all_text.lower())
-    
-    # Filter out short words and non-alphabetic tokens
-    tokens = [word for word in tokens if len(word) >= min_length and word.isalpha()]
-    
-    # Get Malay stopwords if available, otherwise use English
-    try:
-        stop_words = set(stopwords.words('malay'))
-    except:
-        stop_words = set(stopwords.words('english'))
-    
-    # Filter out stopwords
-    filtered_tokens = [word for word in tokens if word not in stop_words]
-    
-    # Count frequencies
-    word_freq = Counter(filtered_tokens)
+def analyze_common_topics(stats, top_n=20, plot=True):
+    """Report and visualize common words and phrases from the streamed corpus counts."""
+    counts = stats['counts']
     
-    # Return top N words
-    return word_freq.most_common(top_n)
-
-def analyze_common_topics(df):
-    """Analyze and visualize common topics in the dataset."""
-    if 'title' in df.columns:
-        common_title_words = extract_common_words(df['title'])
+    if ('title', 1) in counts:
+        common_title_words = counts[('title', 1)].most_common(top_n)
         print("\nMost common words in titles:")
         for word, count in common_title_words:
             print(f"- {word}: {count}")
         
         # Plot common words
-        plt.figure(figsize=(12, 6))
-        words, counts = zip(*common_title_words)
-        plt.barh(words, counts)
-        plt.gca().invert_yaxis()  # Display the most common at the top
-        plt.title('Most Common Words in Titles')
-        plt.xlabel('Count')
-        plt.tight_layout()
-        plt.savefig('common_title_words.png')
-        print("Saved common title words plot to 'common_title_words.png'")
-    
-    if 'question' in df.columns:
-        common_question_words = extract_common_words(df['question'])
-        print("\nMost common words in questions:")
-        for word, count in common_question_words:
-            print(f"- {word}: {count}")
+        if plot and common_title_words:
+            plt.figure(figsize=(12, 6))
+            words, word_counts = zip(*common_title_words)
+            plt.barh(words, word_counts)
+            plt.gca().invert_yaxis()  # Display the most common at the top
+            plt.title('Most Common Words in Titles')
+            plt.xlabel('Count')
+            plt.tight_layout()
+            plt.savefig('common_title_words.png')
+            print("Saved common title words plot to 'common_title_words.png'")
+    
+    for (field, n), counter in sorted(counts.items()):
+        if field == 'title' and n == 1:
+            continue
+        label = 'words' if n == 1 else f'{n}-word phrases'
+        print(f"\nMost common {label} in {field}s:")
+        for phrase, count in counter.most_common(top_n):
+            print(f"- {phrase}: {count}")
+
+def per_year_breakdown(stats, top_n=5):
+    """Print articles, average answer length and top words per year."""
+    if not stats['per_year']:
+        return
+    print("\nPer-year breakdown:")
+    for year, entry in sorted(stats['per_year'].items()):
+        average = entry['answer_chars'] / entry['articles'] if entry['articles'] else 0
+        top_words = ', '.join(word for word, _ in entry['words'].most_common(top_n))
+        print(f"- {year}: {entry['articles']} articles, {average:.0f} chars per answer; {top_words}")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze the scraped articles')
+    parser.add_argument('input', nargs='?', help='Data file (.parquet, .csv, .jsonl or .json); found automatically if omitted')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='Articles per chunk handed to a worker')
+    parser.add_argument('--max-ngram', type=int, default=2, help='Count phrases of up to this many words')
+    parser.add_argument('--top', type=int, default=20, help='Number of words and phrases to list')
+    parser.add_argument('--no-plots', action='store_true', help='Skip the charts')
+    
+    args = parser.parse_args(argv)
+    
     # Check if the data file exists
-    csv_file = 'mufti_wp_articles.csv'
-    json_file = 'mufti_wp_articles.json'
-    
-    if os.path.exists(csv_file):
-        df = load_data(csv_file)
-        print(f"Loaded data from {csv_file}")
-    elif os.path.exists(json_file):
-        df = load_data(json_file)
-        print(f"Loaded data from {json_file}")
-    else:
+    file_path = args.input
+    if not file_path:
+        candidates = ['mufti_wp_articles.parquet', 'mufti_wp_articles.csv',
+                      'mufti_wp_articles.jsonl', 'mufti_wp_articles.json']
+        file_path = next((path for path in candidates if os.path.exists(path)), None)
+    if not file_path or not os.path.exists(file_path):
         print("No data file found. Please run the scraper first.")
         return
     
+    # One streaming pass over the data computes every statistic below
+    stats = analyze_corpus(file_path, max_ngram=args.max_ngram, workers=args.workers, chunk_size=args.chunk_size)
+    print(f"Analyzed data from {file_path}")
+    
     # Perform analysis
-    basic_stats(df)
+    corpus_stats(stats)
     
     try:
-        plot_content_length_distribution(df)
-        analyze_common_topics(df)
+        if not args.no_plots:
+            plot_content_length_distribution(stats['lengths'])
+        analyze_common_topics(stats, args.top, plot=not args.no_plots)
     except Exception as e:
         print(f"Error during visualization: {e}")
-        print("You may need to install additional dependencies: pip install matplotlib seaborn nltk")
+        print("You may need to install additional dependencies: pip install matplotlib seaborn")
+    
+    per_year_breakdown(stats)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,78 @@
+"""
+Retrieval-augmented answers for /ask.
+
+The top fatwas for a question are turned into a numbered context from their
+summary answers (ringkasan) and explanations (huraian). Summaries go in first
+for every source, then explanations fill what is left of the token budget in
+rank order, so the best fatwas contribute the most text and the prompt size
+stays bounded. The answer is streamed from a chat completions endpoint as
+server-sent events, and the [n] markers in it are resolved to citations.
+"""
+
+import json
+import re
+
+from cache import EmbeddingCache, normalize_query
+from projection import answer_sections, make_snippet
+
+# Rough token count for Malay and English text, without a model-specific tokenizer
+CHARS_PER_TOKEN = 4
+CITATION_RE = re.compile(r'\[(\d+)\]')
+
+SYSTEM_PROMPT = (
+    "Anda pembantu yang menjawab soalan hukum berdasarkan fatwa Pejabat Mufti Wilayah Persekutuan. "
+    "Jawab hanya berdasarkan sumber yang diberi, dalam bahasa yang sama dengan soalan. "
+    "Nyatakan sumber bagi setiap kenyataan dengan nombornya, contohnya [1] atau [2][3]. "
+    "Jika sumber tidak menjawab soalan, katakan begitu dan jangan meneka."
+)
+
+
+def build_context(metadatas, documents, max_tokens):
+    """The numbered context for the retrieved fatwas, within roughly max_tokens."""
+    sections = [answer_sections(metadata, document) for metadata, document in zip(metadatas, documents)]
+    headers = [f"[{number}] {metadata['title']}" for number, metadata in enumerate(metadatas, 1)]
+    budget = max_tokens * CHARS_PER_TOKEN - sum(len(header) + 2 for header in headers)
+
+    # Every source gets its summary first, an equal share of the budget at most
+    share = max(budget // max(len(sections), 1), 0)
+    summaries = [make_snippet(ringkasan, share) if ringkasan and share > 0 else "" for ringkasan, _ in sections]
+    budget -= sum(len(summary) for summary in summaries)
+
+    # Then explanations, best source first, until the budget runs out
+    explanations = []
+    for _, huraian in sections:
+        explanation = make_snippet(huraian, budget) if huraian and budget > 0 else ""
+        budget -= len(explanation)
+        explanations.append(explanation)
+
+    blocks = []
+    for header, summary, explanation in zip(headers, summaries, explanations):
+        blocks.append("\n".join(part for part in (header, summary, explanation) if part))
+    return "\n\n".join(blocks)
+
+
+def build_messages(question, context):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Sumber:\n\n{context}\n\nSoalan: {question}"},
+    ]
+
+
+def cited_sources(answer, count):
+    """Source numbers referenced as [n] in the answer, in order of first mention."""
+    numbers = [int(number) for number in CITATION_RE.findall(answer)]
+    return list(dict.fromkeys(number for number in numbers if 1 <= number <= count))
+
+
+def sse_event(event, data):
+    """One server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class ContextCache(EmbeddingCache):
+    """LRU cache of retrieved sources and assembled context, keyed by question, limit and filters."""
+
+    @staticmethod
+    def key(question, limit, filters):
+        filters_key = filters.model_dump_json(exclude_none=True) if filters else ""
+        return f"{limit}|{filters_key}|{normalize_query(question)}"
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Load-testing and latency benchmark for the Fatwa Search API.
+
+Replays a query corpus seeded from the scraped dataset against /search at a
+configurable concurrency and arrival rate, reports throughput and latency
+percentiles, and saves the results as JSON so runs can be compared across
+commits. With --spawn, a local stub embeddings server and the API itself are
+started as subprocesses so the benchmark needs no network access.
+"""
+
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(API_DIR)
+
+# The timing helpers are shared with the crawl metrics and the scraper benchmark in the repository root
+sys.path.insert(0, REPO_DIR)
+from timing import git_commit, percentile, wait_for  # noqa: E402
+
+DEFAULT_CORPORA = [
+    os.path.join(REPO_DIR, 'mufti_wp_articles.json'),
+    os.path.join(REPO_DIR, 'llm', 'mufti_wp_articles.json'),
+    os.path.join(REPO_DIR, 'llm', 'mufti-short.json'),
+]
+
+FALLBACK_QUERIES = [
+    "apa hukum mandi wajib puasa?",
+    "bolehkah solat tanpa wudhu?",
+    "hukum azan lebih awal"
+]
+
+
+def load_queries(corpus_path=None, max_length=300):
+    """Build the query corpus from the questions in the scraped dataset."""
+    paths = [corpus_path] if corpus_path else DEFAULT_CORPORA
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.jsonl'):
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = json.load(f)
+
+        queries = []
+        for record in records:
+            question = (record.get('question') or '').strip()
+            if not question or question == "No question found":
+                question = (record.get('title') or '').split(':', 1)[-1].strip()
+            if question:
+                queries.append(question[:max_length])
+
+        if queries:
+            print(f"Loaded {len(queries)} queries from {path}")
+            return queries
+
+    print("No corpus found, using built-in queries")
+    return list(FALLBACK_QUERIES)
+
+
+def summarize(values):
+    """Latency summary (in milliseconds) for a list of durations in seconds."""
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        'mean_ms': sum(values) / len(values) * 1000,
+        'p50_ms': percentile(values, 50) * 1000,
+        'p95_ms': percentile(values, 95) * 1000,
+        'p99_ms': percentile(values, 99) * 1000,
+        'max_ms': values[-1] * 1000,
+    }
+
+
+def parse_server_timing(header):
+    """Parse a Server-Timing header into a {stage: seconds} dict."""
+    stages = {}
+    for entry in (header or '').split(','):
+        parts = entry.strip().split(';')
+        for part in parts[1:]:
+            if part.startswith('dur='):
+                stages[parts[0]] = float(part[4:]) / 1000
+    return stages
+
+
+class SearchBenchmark:
+    """Replays queries against /search and records per-request outcomes."""
+
+    def __init__(self, api_url, api_key, queries, limit=3, timeout=30):
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key
+        self.queries = queries
+        self.limit = limit
+        self.timeout = timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.samples = []
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+            self.local.session.headers.update({"X-API-Key": self.api_key})
+        return self.local.session
+
+    def send(self, query, scheduled_at=None):
+        """Send one query; latency is measured from its scheduled arrival time."""
+        started_at = time.perf_counter()
+        origin = scheduled_at if scheduled_at is not None else started_at
+        sample = {'status': None, 'latency': None, 'service_time': None}
+        try:
+            response = self.session().post(
+                f"{self.api_url}/search",
+                json={"query": query, "limit": self.limit},
+                timeout=self.timeout
+            )
+            sample['status'] = response.status_code
+            if response.status_code == 200:
+                body = response.json()
+                sample['processing_time'] = body.get('processing_time')
+                sample['fallback'] = body.get('fallback')
+                sample['stages'] = parse_server_timing(response.headers.get('Server-Timing'))
+        except requests.RequestException as e:
+            sample['status'] = type(e).__name__
+        finished_at = time.perf_counter()
+        sample['latency'] = finished_at - origin
+        sample['service_time'] = finished_at - started_at
+        with self.lock:
+            self.samples.append(sample)
+
+    def run(self, num_requests, concurrency, rate=None, seed=0):
+        """Run the benchmark, open-loop at `rate` req/s or closed-loop if rate is None."""
+        rng = random.Random(seed)
+        queries = [rng.choice(self.queries) for _ in range(num_requests)]
+        self.samples = []
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            if rate:
+                # Poisson arrivals, scheduled independently of completions
+                scheduled_at = start
+                for query in queries:
+                    scheduled_at += rng.expovariate(rate)
+                    delay = scheduled_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    executor.submit(self.send, query, scheduled_at)
+            else:
+                for query in queries:
+                    executor.submit(self.send, query)
+        duration = time.perf_counter() - start
+
+        return self.report(duration)
+
+    def report(self, duration):
+        ok = [s for s in self.samples if s['status'] == 200]
+        errors = {}
+        for sample in self.samples:
+            if sample['status'] != 200:
+                key = str(sample['status'])
+                errors[key] = errors.get(key, 0) + 1
+
+        degraded = {}
+        stage_values = {}
+        for sample in ok:
+            if sample.get('fallback'):
+                degraded[sample['fallback']] = degraded.get(sample['fallback'], 0) + 1
+            for stage, seconds in sample.get('stages', {}).items():
+                stage_values.setdefault(stage, []).append(seconds)
+
+        return {
+            'requests': len(self.samples),
+            'successful': len(ok),
+            'errors': errors,
+            'degraded': degraded,
+            'duration_s': duration,
+            'throughput_rps': len(ok) / duration if duration else 0.0,
+            'latency': summarize([s['latency'] for s in ok]),
+            'service_time': summarize([s['service_time'] for s in ok]),
+            'server_processing_time': summarize([s['processing_time'] for s in ok if s.get('processing_time') is not None]),
+            'server_stages': {stage: summarize(values) for stage, values in stage_values.items()},
+        }
+
+
+def spawn_services(args):
+    """Start the stub embeddings server and the API as local subprocesses."""
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, 'stub_openai_server.py'), '--port', str(args.stub_port)]
+        + shlex.split(args.stub_args or '')
+    )
+    if not wait_for(f"{stub_url}/health", timeout=60):
+        stub.terminate()
+        raise RuntimeError("Stub embeddings server did not start")
+
+    env = dict(os.environ)
+    env.update({
+        'API_KEY': args.api_key,
+        'OPENAI_API_KEY': env.get('OPENAI_API_KEY') or 'stub-key',
+        'OPENAI_BASE_URL': f"{stub_url}/v1",
+        'COLLECTION_NAME': env.get('COLLECTION_NAME') or 'mufti_fatwas',
+        'DB_PATH': args.db_path,
+        'RATE_LIMIT': '1000000/minute',
+        'SERVER_TIMING': 'true',
+    })
+    api = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(args.api_port), '--log-level', 'warning'],
+        cwd=API_DIR,
+        env=env
+    )
+    if not wait_for(f"http://127.0.0.1:{args.api_port}/health", timeout=60):
+        api.terminate()
+        stub.terminate()
+        raise RuntimeError("API did not start")
+
+    return [api, stub], f"http://127.0.0.1:{args.api_port}"
+
+
+def compare(result, baseline):
+    """Print latency and throughput deltas against a previous result file."""
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}):")
+    old_rps = baseline['results']['throughput_rps']
+    new_rps = result['results']['throughput_rps']
+    if old_rps:
+        print(f"  throughput: {old_rps:.1f} -> {new_rps:.1f} req/s ({(new_rps - old_rps) / old_rps * 100:+.1f}%)")
+    for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+        old = baseline['results']['latency'].get(key)
+        new = result['results']['latency'].get(key)
+        if old and new:
+            print(f"  {key}: {old:.2f} -> {new:.2f} ({(new - old) / old * 100:+.1f}%)")
+
+
+def print_report(results):
+    print(f"\nRequests: {results['requests']} ({results['successful']} successful)")
+    if results['errors']:
+        print(f"Errors: {results['errors']}")
+    if results.get('degraded'):
+        print(f"Degraded: {results['degraded']}")
+    print(f"Throughput: {results['throughput_rps']:.2f} req/s over {results['duration_s']:.2f}s")
+    latency = results['latency']
+    if latency:
+        print(f"Latency p50/p95/p99: {latency['p50_ms']:.2f} / {latency['p95_ms']:.2f} / {latency['p99_ms']:.2f} ms")
+    for stage, summary in results['server_stages'].items():
+        print(f"  {stage}: p50 {summary['p50_ms']:.2f} ms, p99 {summary['p99_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Fatwa Search API')
+    parser.add_argument('--api-url', default='http://localhost:8000', help='Base URL of a running API')
+    parser.add_argument('--api-key', default=os.getenv('API_KEY', 'dev-api-key-change-me'), help='API key to send')
+    parser.add_argument('--corpus', help='JSON/JSONL file of scraped articles to take queries from')
+    parser.add_argument('--requests', type=int, default=200, help='Number of measured requests')
+    parser.add_argument('--warmup', type=int, default=10, help='Number of unmeasured warm-up requests')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum requests in flight')
+    parser.add_argument('--rate', type=float, help='Open-loop arrival rate in req/s (default: closed loop)')
+    parser.add_argument('--limit', type=int, default=3, help='Results requested per query')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for query selection and arrivals')
+    parser.add_argument('--spawn', action='store_true', help='Start a stub embeddings server and the API locally')
+    parser.add_argument('--db-path', default=os.path.join(REPO_DIR, 'chroma_db'), help='Chroma path for --spawn')
+    parser.add_argument('--api-port', type=int, default=8100, help='API port for --spawn')
+    parser.add_argument('--stub-port', type=int, default=8101, help='Stub embeddings port for --spawn')
+    parser.add_argument('--stub-args', help='Extra stub server options for --spawn, e.g. "--latency-ms 150"')
+    parser.add_argument('--output', help='Where to write the JSON results (default: bench_results/)')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+
+    args = parser.parse_args()
+
+    processes = []
+    api_url = args.api_url
+    if args.spawn:
+        processes, api_url = spawn_services(args)
+
+    try:
+        queries = load_queries(args.corpus)
+        benchmark = SearchBenchmark(api_url, args.api_key, queries, limit=args.limit)
+
+        if args.warmup:
+            benchmark.run(args.warmup, args.concurrency, seed=args.seed + 1)
+
+        mode = f"open loop at {args.rate} req/s" if args.rate else "closed loop"
+        print(f"Running {args.requests} requests, concurrency {args.concurrency}, {mode}...")
+        results = benchmark.run(args.requests, args.concurrency, rate=args.rate, seed=args.seed)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print_report(results)
+
+    output = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'config': {
+            'api_url': api_url,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'limit': args.limit,
+            'seed': args.seed,
+            'spawned': args.spawn,
+            'stub_args': args.stub_args if args.spawn else None,
+            'queries': len(queries),
+        },
+        'results': results,
+    }
+
+    output_file = args.output
+    if not output_file:
+        os.makedirs('bench_results', exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output_file = os.path.join('bench_results', f"search-{output['commit'] or 'nogit'}-{stamp}.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults saved to {output_file}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(output, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+In-process LRU cache for query embeddings.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """Normalize a query so trivially different spellings share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache mapping normalized queries to embeddings."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        """Return the cached embedding for a query, or None."""
+        if self.maxsize <= 0:
+            return None
+        key = normalize_query(query)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+            return embedding
+
+    def put(self, query, embedding):
+        """Store an embedding, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def closest(self, query, min_overlap=0.5):
+        """The cached embedding of the most similar query by word overlap (Jaccard), or None below min_overlap."""
+        if self.maxsize <= 0:
+            return None
+        words = set(normalize_query(query).split())
+        if not words:
+            return None
+        with self._lock:
+            entries = list(self._entries.items())
+        best, best_overlap = None, min_overlap
+        for key, embedding in entries:
+            cached_words = set(key.split())
+            overlap = len(words & cached_words) / len(words | cached_words)
+            if overlap >= best_overlap:
+                best, best_overlap = embedding, overlap
+        return best
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,71 @@
+"""
+Deadline-aware query embedding for /search.
+
+The embedding call runs in a dedicated thread pool so a slow provider never
+blocks the event loop, nor starves the default executor used by other
+stages. If the first request has not answered after hedge_after seconds (or
+fails outright), a duplicate request is sent and whichever answers first
+wins; most slow calls are one unlucky request, not a slow provider. Past the
+budget the search stops waiting and falls back, while the calls still in
+flight are left to finish and warm the embedding cache.
+"""
+
+import asyncio
+
+from metrics import EMBEDDING_HEDGES
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+def create_embedding(client, text):
+    """Embed a single query with the OpenAI client; blocking."""
+    return client.embeddings.create(model=EMBEDDING_MODEL, input=[text]).data[0].embedding
+
+
+def _consume(task, on_late):
+    # Late answers still warm the cache; late failures are dropped quietly
+    if task.cancelled() or task.exception() is not None:
+        return
+    if on_late is not None:
+        on_late(task.result())
+
+
+async def embed_with_deadline(create, text, budget, hedge_after=None, on_late=None, executor=None):
+    """(embedding, outcome) with outcome one of primary, hedge, timeout or error; embedding is None unless answered.
+
+    `create(text)` is a blocking call returning the embedding. At most one hedge is sent.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+    hedge_at = loop.time() + hedge_after if hedge_after is not None else None
+    attempts = [loop.run_in_executor(executor, create, text)]
+
+    try:
+        while True:
+            now = loop.time()
+            if now >= deadline:
+                return None, "timeout"
+
+            hedge_pending = hedge_at is not None and len(attempts) == 1
+            wait_until = min(deadline, hedge_at) if hedge_pending else deadline
+            pending = [attempt for attempt in attempts if not attempt.done()]
+            if pending:
+                await asyncio.wait(pending, timeout=max(wait_until - now, 0), return_when=asyncio.FIRST_COMPLETED)
+
+            for attempt in attempts:
+                if attempt.done() and attempt.exception() is None:
+                    return attempt.result(), "primary" if attempt is attempts[0] else "hedge"
+
+            failed = all(attempt.done() for attempt in attempts)
+            if hedge_pending and (failed or loop.time() >= hedge_at):
+                # Hedge a slow call, or retry a failed one while there is budget left
+                EMBEDDING_HEDGES.inc()
+                attempts.append(loop.run_in_executor(executor, create, text))
+            elif failed:
+                return None, "error"
+    finally:
+        for attempt in attempts:
+            if attempt.done():
+                _consume(attempt, None)
+            else:
+                attempt.add_done_callback(lambda task: _consume(task, on_late))
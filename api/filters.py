@@ -0,0 +1,96 @@
+"""
+Metadata filters for /search.
+
+Filters on the structured fields stored with each fatwa (series number,
+publication date and topic) are pushed down into the Chroma query as a
+`where` clause, so only matching fatwas are scored instead of filtering the
+top hits afterwards. Dates are stored as yyyymmdd integers. `sources` picks
+which shards are searched at all instead of being a condition on fatwas.
+"""
+
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, model_validator
+
+
+class SearchFilters(BaseModel):
+    series_min: Optional[int] = None
+    series_max: Optional[int] = None
+    published_from: Optional[date] = None
+    published_to: Optional[date] = None
+    # Topic categories from the URL path, e.g. "umum"
+    topics: Optional[List[str]] = None
+    # Sources (shards) to search, e.g. "muftiwp"; all of them by default
+    sources: Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.series_min is not None and self.series_max is not None and self.series_min > self.series_max:
+            raise ValueError("series_min must not be greater than series_max")
+        if self.published_from and self.published_to and self.published_from > self.published_to:
+            raise ValueError("published_from must not be after published_to")
+        return self
+
+
+def date_key(value):
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def format_date_key(value):
+    """A stored yyyymmdd integer as an ISO date string."""
+    if value is None:
+        return None
+    value = int(value)
+    return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}"
+
+
+def filter_mask(filters, series, published, topics, sources=None):
+    """Boolean mask over in-memory field arrays (-1 and '' where a fatwa lacks a field), or None when unfiltered.
+
+    The same conditions as build_where, for the indexes that are searched without Chroma. Indexes that span
+    several shards pass each fatwa's source so the source filter applies too.
+    """
+    if filters is None:
+        return None
+    # Only the lazily loaded lexical and reduced indexes get here, so the API starts without numpy
+    import numpy as np
+
+    mask = np.ones(len(series), dtype=bool)
+    if filters.series_min is not None:
+        mask &= series >= filters.series_min
+    if filters.series_max is not None:
+        mask &= (series <= filters.series_max) & (series >= 0)
+    if filters.published_from is not None:
+        mask &= published >= date_key(filters.published_from)
+    if filters.published_to is not None:
+        mask &= (published <= date_key(filters.published_to)) & (published >= 0)
+    if filters.topics:
+        mask &= np.isin(topics, list(filters.topics))
+    if filters.sources and sources is not None:
+        mask &= np.isin(sources, list(filters.sources))
+    return mask
+
+
+def build_where(filters):
+    """Translate SearchFilters into a Chroma where clause, or None when nothing is filtered."""
+    if filters is None:
+        return None
+
+    conditions = []
+    if filters.series_min is not None:
+        conditions.append({"series_number": {"$gte": filters.series_min}})
+    if filters.series_max is not None:
+        conditions.append({"series_number": {"$lte": filters.series_max}})
+    if filters.published_from is not None:
+        conditions.append({"published": {"$gte": date_key(filters.published_from)}})
+    if filters.published_to is not None:
+        conditions.append({"published": {"$lte": date_key(filters.published_to)}})
+    if filters.topics:
+        topics = sorted(set(filters.topics))
+        conditions.append({"topic": topics[0]} if len(topics) == 1 else {"topic": {"$in": topics}})
+
+    if not conditions:
+        return None
+    # Chroma wants a single condition on its own and several under $and
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
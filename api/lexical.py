@@ -0,0 +1,106 @@
+"""
+Lexical fallback index for /search.
+
+When the query embedding cannot be computed in time, /search answers from
+this BM25 index over fatwa titles and questions instead of failing. It is
+built once at startup from the collection, kept as flat numpy postings
+(term -> fatwa positions and term counts), and scores a query with a few
+vectorized additions, so it answers in about a millisecond with no network
+call. The structured fields and each fatwa's source are kept alongside so
+/search filters apply here too. One index spans all shards, so BM25 scores
+from different sources are comparable.
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+
+from filters import filter_mask
+from projection import split_document
+from suggest import normalize
+
+PAGE_SIZE = 1000
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+class LexicalIndex:
+    """BM25 over title and question, keyed by the same ids as the collection."""
+
+    def __init__(self, entries, k1=1.2, b=0.75):
+        self.ids = [entry['id'] for entry in entries]
+        self.k1 = k1
+        self.b = b
+
+        term_ids = {}
+        postings = []
+        lengths = np.zeros(len(entries), dtype=np.float32)
+        for position, entry in enumerate(entries):
+            tokens = tokenize(f"{entry.get('title', '')} {entry.get('question', '')}")
+            lengths[position] = len(tokens)
+            for term, count in Counter(tokens).items():
+                postings.append((term_ids.setdefault(term, len(term_ids)), position, count))
+
+        # Postings sorted by term, with offsets[t]:offsets[t + 1] spanning term t
+        postings.sort()
+        terms = np.array([term for term, _, _ in postings], dtype=np.int32)
+        self.positions = np.array([position for _, position, _ in postings], dtype=np.int32)
+        self.counts = np.array([count for _, _, count in postings], dtype=np.float32)
+        self.offsets = np.searchsorted(terms, np.arange(len(term_ids) + 1)).astype(np.int64)
+        self.term_ids = term_ids
+        self.lengths = lengths
+        self.average_length = float(lengths.mean()) if len(entries) else 0.0
+
+        # Structured fields for filtering, with sentinels for fatwas that lack them
+        self.series = np.array([entry.get('series_number') or -1 for entry in entries], dtype=np.int64)
+        self.published = np.array([entry.get('published') or -1 for entry in entries], dtype=np.int64)
+        self.topics = np.array([entry.get('topic') or '' for entry in entries], dtype=object)
+        self.sources = np.array([entry.get('source') or '' for entry in entries], dtype=object)
+
+    @classmethod
+    def from_collections(cls, shards, page_size=PAGE_SIZE):
+        """Build the index from the metadata and documents stored in (source, Chroma collection) pairs."""
+        entries = []
+        for source, collection in shards:
+            offset = 0
+            while True:
+                page = collection.get(limit=page_size, offset=offset, include=["metadatas", "documents"])
+                for fatwa_id, metadata, document in zip(page["ids"], page["metadatas"], page["documents"]):
+                    question, _ = split_document(document, metadata)
+                    entries.append(dict(metadata, id=fatwa_id, question=question, source=source))
+                if len(page["ids"]) < page_size:
+                    break
+                offset += page_size
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query, limit=3, filters=None):
+        """(ids, scores) of the best matching fatwas, best first, with scores scaled so the top hit is 1."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            positions = self.positions[start:end]
+            counts = self.counts[start:end]
+            idf = math.log(1 + (len(self.ids) - len(positions) + 0.5) / (len(positions) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[positions] / self.average_length)
+            scores[positions] += idf * counts * (self.k1 + 1) / (counts + norm)
+
+        mask = filter_mask(filters, self.series, self.published, self.topics, self.sources)
+        if mask is not None:
+            scores[~mask] = 0
+        matches = np.flatnonzero(scores > 0)
+        if not len(matches) or limit <= 0:
+            return [], []
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        top = float(scores[matches[0]])
+        return [self.ids[position] for position in matches], [float(scores[position]) / top for position in matches]
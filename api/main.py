@@ -1,23 +1,96 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, status
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import APIKeyHeader
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import os
-import chromadb
-from openai import OpenAI
-from typing import List, Optional
-import time
+import json
+import heapq
+import asyncio
+from typing import List, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
+from ask import ContextCache, build_context, build_messages, cited_sources, sse_event
+from cache import EmbeddingCache
+from embedding import create_embedding, embed_with_deadline
+from filters import SearchFilters, build_where, format_date_key
+from metrics import (ASK_CONTEXT_CACHE, ASK_ERRORS, ASK_LATENCY, ASK_TIME_TO_FIRST_TOKEN, DEGRADED_SEARCHES, EMBEDDING_OUTCOMES, IN_FLIGHT,
+                     INDEX_RELOAD_SECONDS, INDEX_RELOADS, RATE_LIMITED, RERANK_LATENCY, RERANK_PAIRS, SHARD_ERRORS,
+                     SHARD_LATENCY, SUGGEST_LATENCY, StageTimer, record_cache_lookup, render_metrics)
+from projection import project_fields
+from rerank import rerank_order, rerank_passage
+from snapshots import close_client, current_version, is_published, snapshot_path
+from startup import StartupState, load_index, load_snapshot
+
 # Environment variables with defaults for development
 API_KEY = os.getenv("API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # e.g. http://localhost:8001/v1 for the stub server
 COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+# Source shards to search, comma-separated; by default every collection tagged with a source, else COLLECTION_NAME
+COLLECTION_NAMES = [name.strip() for name in os.getenv("COLLECTION_NAMES", "").split(",") if name.strip()]
+# Threads for querying shards in parallel; each search uses one per shard it searches
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "16"))
 DB_PATH = os.getenv("DB_PATH", "/app/chroma_db")
 RATE_LIMIT = os.getenv("RATE_LIMIT")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+# How long a search waits for the query embedding before answering from a fallback
+EMBED_BUDGET_MS = float(os.getenv("EMBED_BUDGET_MS", "1000"))
+# Send a duplicate embedding request when the first is this slow; 0 disables hedging
+EMBED_HEDGE_MS = float(os.getenv("EMBED_HEDGE_MS", "250"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "10"))
+# Threads for embedding calls; they mostly wait on the network, so this is sized for I/O, not cores
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "32"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "0"))
+# Minimum word overlap for answering with the embedding of a similar cached query
+CACHE_FALLBACK_OVERLAP = float(os.getenv("CACHE_FALLBACK_OVERLAP", "0.5"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+STREAM_MIN_RESULTS = int(os.getenv("STREAM_MIN_RESULTS", "50"))
+# Most results one /search may ask for; larger requests get 422
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "200"))
+SNIPPET_LENGTH = int(os.getenv("SNIPPET_LENGTH", "300"))
+WARMUP_QUERIES = int(os.getenv("WARMUP_QUERIES", "5"))
+# Offline artifacts such as the related fatwas table from llm/related.py
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", os.path.join(DB_PATH, "artifacts"))
+# Typeahead fires on every keystroke, so it gets its own limit
+SUGGEST_RATE_LIMIT = os.getenv("SUGGEST_RATE_LIMIT", RATE_LIMIT)
+SUGGEST_MAX_LIMIT = int(os.getenv("SUGGEST_MAX_LIMIT", "10"))
+# Optional cross-encoder re-ranking: a directory with model.onnx and tokenizer.json
+RERANK_MODEL = os.getenv("RERANK_MODEL")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "256"))
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", "0")) or None
+# Answer generation for /ask: any OpenAI-compatible chat completions endpoint, e.g. a local server
+# docker-compose passes unset variables through as empty strings, which the OpenAI client would use as the URL
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or OPENAI_BASE_URL
+LLM_API_KEY = os.getenv("LLM_API_KEY") or OPENAI_API_KEY
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+ASK_TOP_K = int(os.getenv("ASK_TOP_K", "4"))
+ASK_MAX_SOURCES = int(os.getenv("ASK_MAX_SOURCES", "8"))
+ASK_CONTEXT_TOKENS = int(os.getenv("ASK_CONTEXT_TOKENS", "3000"))
+ASK_MAX_TOKENS = int(os.getenv("ASK_MAX_TOKENS", "512"))
+ASK_RATE_LIMIT = os.getenv("ASK_RATE_LIMIT", RATE_LIMIT)
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "256"))
+# "reduced" searches the PCA index from llm/reduce.py and re-ranks a short list on full vectors
+SEARCH_MODE = os.getenv("SEARCH_MODE", "vector")
+REDUCED_SHORTLIST = int(os.getenv("REDUCED_SHORTLIST", "100"))
+# Serve the live snapshot under this root (see snapshot.py) instead of DB_PATH, with hot reload
+INDEX_ROOT = os.getenv("INDEX_ROOT")
+# Seconds between checks of INDEX_ROOT/CURRENT for a newly published snapshot; 0 disables watching
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "5"))
+# How long a replaced snapshot stays open for requests that started before the swap
+INDEX_RETIRE_SECONDS = float(os.getenv("INDEX_RETIRE_SECONDS", "30"))
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY") or API_KEY
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -27,20 +100,30 @@ limiter = Limiter(key_func=get_remote_address)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: initialize clients
-    app.openai_client = OpenAI(api_key=OPENAI_API_KEY)
-    app.chroma_client = chromadb.PersistentClient(path=DB_PATH)
-    try:
-        app.collection = app.chroma_client.get_collection(COLLECTION_NAME)
-        print(f"Connected to collection: {COLLECTION_NAME}")
-    except Exception as e:
-        print(f"Error connecting to collection: {e}")
-        raise
+    # Startup: load and warm the index in the background so /health answers immediately
+    app.embedding_cache = EmbeddingCache(maxsize=EMBEDDING_CACHE_SIZE)
+    app.context_cache = ContextCache(maxsize=CONTEXT_CACHE_SIZE)
+    app.embed_executor = ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="embed")
+    app.shard_executor = ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="shard")
+    app.state.loader = asyncio.create_task(asyncio.to_thread(
+        load_index, app, app.state.startup, DB_PATH, COLLECTION_NAME,
+        OPENAI_API_KEY, OPENAI_BASE_URL, WARMUP_QUERIES, ARTIFACTS_DIR,
+        RERANK_MODEL, RERANK_MAX_LENGTH, RERANK_THREADS, OPENAI_TIMEOUT, OPENAI_MAX_RETRIES,
+        LLM_API_KEY, LLM_BASE_URL, LLM_TIMEOUT, SEARCH_MODE, INDEX_ROOT, COLLECTION_NAMES
+    ))
+    app.state.reload_lock = asyncio.Lock()
+    app.state.retiring = set()
+    app.state.watcher = None
+    if INDEX_ROOT and INDEX_WATCH_INTERVAL > 0:
+        app.state.watcher = asyncio.create_task(watch_index())
 
     yield
 
-    # Shutdown: cleanup if needed
-    # No specific cleanup required
+    # Shutdown: don't wait for embedding calls nobody is waiting for
+    if app.state.watcher is not None:
+        app.state.watcher.cancel()
+    app.embed_executor.shutdown(wait=False, cancel_futures=True)
+    app.shard_executor.shutdown(wait=False, cancel_futures=True)
 
 # Initialize API
 app = FastAPI(
@@ -50,9 +133,18 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.state.startup = StartupState()
+
 # Register rate limit error handler
+
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    RATE_LIMITED.labels(path=request.url.path).inc()
+    return _rate_limit_exceeded_handler(request, exc)
+
+
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 # Add CORS middleware
 app.add_middleware(
@@ -63,6 +155,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    with IN_FLIGHT.track_inprogress():
+        return await call_next(request)
+
 # Security
 api_key_header = APIKeyHeader(name="X-API-Key")
 
@@ -71,19 +169,95 @@ api_key_header = APIKeyHeader(name="X-API-Key")
 
 class QueryRequest(BaseModel):
     query: str
-    limit: Optional[int] = 3
+    limit: int = Field(3, ge=1, le=SEARCH_MAX_LIMIT)
+    # Extra fields to return with each hit: question, ringkasan, snippet, document
+    include: Optional[List[Literal["question", "ringkasan", "snippet", "document"]]] = None
+    # Stream results as NDJSON; defaults to streaming when limit >= STREAM_MIN_RESULTS
+    stream: Optional[bool] = None
+    # Narrow the search by series number, publication date or topic before ranking
+    filters: Optional[SearchFilters] = None
+    # Re-rank the top RERANK_CANDIDATES hits with the cross-encoder; defaults to on when a model is loaded
+    rerank: Optional[bool] = None
 
 
 class FatwaResult(BaseModel):
+    id: Optional[str] = None
     title: str
     url: str
     score: Optional[float] = None
+    rerank_score: Optional[float] = None
+    question: Optional[str] = None
+    ringkasan: Optional[str] = None
+    snippet: Optional[str] = None
+    document: Optional[str] = None
+    series_number: Optional[int] = None
+    published: Optional[str] = None
+    topic: Optional[str] = None
+    # The source (shard) the fatwa came from
+    source: Optional[str] = None
 
 
 class QueryResponse(BaseModel):
     results: List[FatwaResult]
     query: str
     processing_time: float
+    # True when the query embedding was late and the results come from a fallback
+    degraded: bool = False
+    fallback: Optional[Literal["cache", "lexical"]] = None
+
+
+class AskRequest(BaseModel):
+    question: str
+    # Fatwas to answer from; defaults to ASK_TOP_K and is capped at ASK_MAX_SOURCES
+    limit: Optional[int] = None
+    filters: Optional[SearchFilters] = None
+
+
+class ReloadRequest(BaseModel):
+    # Snapshot to load; defaults to the one named by INDEX_ROOT/CURRENT
+    version: Optional[str] = None
+    # Reload even if the snapshot is already live
+    force: bool = False
+
+
+class RelatedFatwa(BaseModel):
+    id: str
+    title: str
+    url: str
+    score: float
+
+
+class RelatedResponse(BaseModel):
+    id: str
+    title: str
+    url: str
+    related: List[RelatedFatwa]
+    processing_time: float
+
+
+class Suggestion(BaseModel):
+    title: str
+    url: str
+    series_number: Optional[int] = None
+    popularity: float
+
+
+class Source(BaseModel):
+    name: str
+    label: str
+    collection: str
+    fatwas: int
+
+
+class SourcesResponse(BaseModel):
+    sources: List[Source]
+    version: Optional[str] = None
+
+
+class SuggestResponse(BaseModel):
+    suggestions: List[Suggestion]
+    query: str
+    processing_time: float
 
 # Dependency for API key validation
 
@@ -97,6 +271,26 @@ async def verify_api_key(api_key: str = Depends(api_key_header)):
     return api_key
 
 
+async def verify_admin_key(api_key: str = Depends(api_key_header)):
+    if not ADMIN_API_KEY or api_key != ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API Key"
+        )
+    return api_key
+
+# Dependency that rejects requests until the index is loaded
+
+
+def require_ready():
+    if not app.state.startup.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Index is still loading",
+            headers={"Retry-After": "1"}
+        )
+
+
 @app.get("/", dependencies=[Depends(verify_api_key)])
 def root():
     return {"message": "Fatwa Search API is running"}
@@ -107,48 +301,528 @@ def health_check():
     return {"status": "healthy"}
 
 
-@app.post("/search", response_model=QueryResponse, dependencies=[Depends(verify_api_key)])
+@app.get("/ready")
+def readiness_check():
+    startup = app.state.startup
+    if not startup.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=startup.as_dict())
+    return {**startup.as_dict(), "index": app.index.as_dict()}
+
+
+@app.get("/metrics")
+def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+def select_shards(index, filters):
+    """The shards a request searches, or a 400 naming the sources that do not exist."""
+    try:
+        return index.select(filters.sources if filters else None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def fetch_hits(index, ids, scores, include):
+    """(ids, metadatas, distances, documents) for hits found outside Chroma, in the given order."""
+    # One get() per shard holding some of the hits
+    by_shard = {}
+    for fatwa_id in ids:
+        shard = index.shard_of.get(fatwa_id)
+        if shard is not None:
+            by_shard.setdefault(shard, []).append(fatwa_id)
+    rows = {}
+    for shard, shard_ids in by_shard.items():
+        found = shard.collection.get(ids=shard_ids, include=[field for field in include if field != "distances"])
+        for row, fatwa_id in enumerate(found["ids"]):
+            metadata = found["metadatas"][row]
+            metadata.setdefault("source", shard.name)
+            rows[fatwa_id] = (metadata, found["documents"][row] if "documents" in include else None)
+
+    # get() does not keep the order of the ids; the index scores stand in for similarity
+    hits = [(fatwa_id, score) for fatwa_id, score in zip(ids, scores) if fatwa_id in rows]
+    ids = [fatwa_id for fatwa_id, _ in hits]
+    distances = [1.0 - score for _, score in hits]
+    metadatas = [rows[fatwa_id][0] for fatwa_id in ids]
+    documents = [rows[fatwa_id][1] for fatwa_id in ids]
+    return ids, metadatas, distances, documents
+
+
+async def scatter(shards, search):
+    """search(shard) for every shard, in parallel when there are several; the results of the shards that answered."""
+    def timed(shard):
+        start = time.perf_counter()
+        try:
+            return search(shard)
+        finally:
+            SHARD_LATENCY.labels(shard=shard.name).observe(time.perf_counter() - start)
+
+    if len(shards) == 1:
+        return [timed(shards[0])]
+
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(app.shard_executor, timed, shard) for shard in shards), return_exceptions=True
+    )
+    answered = []
+    for shard, result in zip(shards, results):
+        if isinstance(result, Exception):
+            # One failing shard leaves its fatwas out instead of failing the search
+            SHARD_ERRORS.labels(shard=shard.name).inc()
+            print(f"Error querying shard {shard.name}: {result}")
+        else:
+            answered.append(result)
+    if not answered:
+        raise results[0]
+    return answered
+
+
+async def search_shards(index, shards, query_embedding, n_results, filters, include):
+    """(ids, metadatas, distances, documents) of the best n_results fatwas across the shards, best first."""
+    # Reduced scores are cosine similarities and Chroma's are distances, so a search uses one or the other everywhere
+    if all(shard.reduced_index is not None for shard in shards):
+        def search(shard):
+            return shard.reduced_index.search(query_embedding, n_results, filters, REDUCED_SHORTLIST)
+
+        hits = [hit for ids, scores in await scatter(shards, search) for hit in zip(ids, scores)]
+        hits = heapq.nlargest(n_results, hits, key=lambda hit: hit[1])
+        return fetch_hits(index, [fatwa_id for fatwa_id, _ in hits], [score for _, score in hits], include)
+
+    where = build_where(filters)
+
+    def search(shard):
+        results = shard.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            where=where,
+            include=include
+        )
+        metadatas = results["metadatas"][0]
+        for metadata in metadatas:
+            metadata.setdefault("source", shard.name)
+        documents = results["documents"][0] if "documents" in include else [None] * len(metadatas)
+        return zip(results["ids"][0], metadatas, results["distances"][0], documents)
+
+    # Each shard returns its own top n_results, so the merged top n_results is exact
+    hits = [hit for result in await scatter(shards, search) for hit in result]
+    hits = heapq.nsmallest(n_results, hits, key=lambda hit: hit[2])
+    return ([hit[column] for hit in hits] for column in range(4))
+
+
+async def retrieve(index, shards, query, n_results, filters, include, timer):
+    """(ids, metadatas, distances, documents, fallback) of the best n_results fatwas for a query in the shards.
+
+    fallback is None for a regular vector search, or "cache"/"lexical" when the embedding was late.
+    """
+    # Reuse the embedding of a recently seen query if we have one
+    with timer.stage("cache"):
+        query_embedding = app.embedding_cache.get(query)
+    record_cache_lookup(query_embedding is not None)
+
+    fallback = None
+    if query_embedding is None:
+        # Generate the embedding off the event loop, hedged and bounded by the budget
+        def remember(embedding):
+            app.embedding_cache.put(query, embedding)
+
+        with timer.stage("embed"):
+            query_embedding, outcome = await embed_with_deadline(
+                lambda text: create_embedding(app.openai_client, text),
+                query,
+                EMBED_BUDGET_MS / 1000,
+                EMBED_HEDGE_MS / 1000 if EMBED_HEDGE_MS > 0 else None,
+                on_late=remember,
+                executor=app.embed_executor
+            )
+        EMBEDDING_OUTCOMES.labels(outcome=outcome).inc()
+
+        if query_embedding is not None:
+            remember(query_embedding)
+        else:
+            # Too slow or failing: reuse a similar query's embedding, else search titles and questions
+            with timer.stage("fallback"):
+                query_embedding = app.embedding_cache.closest(query, CACHE_FALLBACK_OVERLAP)
+            fallback = "cache" if query_embedding is not None else "lexical"
+            DEGRADED_SEARCHES.labels(fallback=fallback).inc()
+
+    if fallback == "lexical":
+        with timer.stage("lexical"):
+            ids, scores = index.lexical_index.search(query, n_results, filters)
+            return (*fetch_hits(index, ids, scores, include), fallback)
+
+    with timer.stage("query"):
+        ids, metadatas, distances, documents = await search_shards(
+            index, shards, query_embedding, n_results, filters, include
+        )
+    return ids, metadatas, distances, documents, fallback
+
+
+async def rerank_hits(query, ids, metadatas, distances, documents, timer):
+    """The hits reordered by the cross-encoder, with their rerank scores (None when the vector order stands)."""
+    rerank_scores = [None] * len(metadatas)
+    if not metadatas:
+        return ids, metadatas, distances, documents, rerank_scores
+
+    # Score all candidates in one batch; past the budget the vector order stands
+    passages = [rerank_passage(metadata, document) for metadata, document in zip(metadatas, documents)]
+    with timer.stage("rerank"):
+        order, scores, outcome = await rerank_order(app.reranker, query, passages, RERANK_BUDGET_MS / 1000)
+    RERANK_LATENCY.labels(outcome=outcome).observe(timer.stages["rerank"])
+    if order is not None:
+        RERANK_PAIRS.observe(len(passages))
+        order = order.tolist()
+        ids, metadatas, distances, documents = (
+            [column[i] for i in order] for column in (ids, metadatas, distances, documents)
+        )
+        rerank_scores = [float(scores[i]) for i in order]
+    return ids, metadatas, distances, documents, rerank_scores
+
+
+@app.post("/search", response_model=QueryResponse, dependencies=[Depends(verify_api_key), Depends(require_ready)])
 @limiter.limit(RATE_LIMIT)
 async def search_fatwas(request: Request, query_request: QueryRequest):
-    start_time = time.time()
+    timer = StageTimer()
+    # One snapshot for the whole request, even if a reload swaps it meanwhile
+    index = app.index
+    shards = select_shards(index, query_request.filters)
 
     try:
-        # Generate embedding for the query
-        query_embedding = app.openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=[query_request.query]
-        ).data[0].embedding
-
-        # Query the collection
-        results = app.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=query_request.limit,
-            include=["metadatas", "distances"]
+        rerank = app.reranker is not None and query_request.rerank is not False
+        n_results = max(query_request.limit, RERANK_CANDIDATES) if rerank else query_request.limit
+
+        # Query the collection, fetching documents only when fields are projected from them or re-ranked.
+        # Re-ranking over-fetches so the cross-encoder can promote hits from below the limit.
+        include = ["metadatas", "distances"]
+        if query_request.include or rerank:
+            include.append("documents")
+
+        ids, metadatas, distances, documents, fallback = await retrieve(
+            index, shards, query_request.query, n_results, query_request.filters, include, timer
         )
+        rerank_scores = [None] * len(metadatas)
+        if rerank:
+            ids, metadatas, distances, documents, rerank_scores = await rerank_hits(
+                query_request.query, ids, metadatas, distances, documents, timer
+            )
 
-        # Format results
-        fatwa_results = []
-        for i, (metadata, distance) in enumerate(zip(results["metadatas"][0], results["distances"][0])):
-            fatwa_results.append(
-                FatwaResult(
-                    title=metadata['title'],
-                    url=metadata['url'],
-                    score=1.0 - distance  # Convert distance to similarity score
-                )
+        limit = query_request.limit
+        ids, metadatas, distances, documents = ids[:limit], metadatas[:limit], distances[:limit], documents[:limit]
+        if not query_request.include:
+            documents = [None] * len(metadatas)
+
+        # Fatwas people find through search rank higher in /suggest
+        for rank, metadata in enumerate(metadatas):
+            index.suggest_index.bump(metadata['url'], 1.0 / (rank + 1))
+
+        def format_result(fatwa_id, metadata, distance, document, rerank_score=None):
+            return FatwaResult(
+                id=fatwa_id,
+                title=metadata['title'],
+                url=metadata['url'],
+                score=1.0 - distance,  # Convert distance to similarity score
+                rerank_score=rerank_score,
+                series_number=metadata.get('series_number'),
+                published=format_date_key(metadata.get('published')),
+                topic=metadata.get('topic'),
+                source=metadata.get('source'),
+                **project_fields(metadata, document, query_request.include, SNIPPET_LENGTH)
             )
 
-        processing_time = time.time() - start_time
+        stream = query_request.stream
+        if stream is None:
+            stream = (query_request.limit >= STREAM_MIN_RESULTS
+                      or "application/x-ndjson" in request.headers.get("accept", ""))
+
+        if stream:
+            headers = {}
+            if SERVER_TIMING:
+                headers["Server-Timing"] = timer.server_timing()
+
+            def ndjson_lines():
+                # One result per line so clients can render hits before the list is complete
+                serialize_seconds = 0.0
+                for hit in zip(ids, metadatas, distances, documents, rerank_scores):
+                    line_start = time.perf_counter()
+                    line = format_result(*hit).model_dump_json(exclude_none=True)
+                    serialize_seconds += time.perf_counter() - line_start
+                    yield line + "\n"
+                # One serialize sample per request, as in the JSON response, not counting time spent sending
+                timer.record("serialize", serialize_seconds)
+                processing_time = timer.finish()
+                yield json.dumps({
+                    "query": query_request.query,
+                    "processing_time": processing_time,
+                    "total": len(metadatas),
+                    "degraded": fallback is not None,
+                    **({"fallback": fallback} if fallback else {})
+                }) + "\n"
+
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson", headers=headers)
+
+        # Format and serialize results
+        with timer.stage("serialize"):
+            fatwa_results = [
+                format_result(*hit) for hit in zip(ids, metadatas, distances, documents, rerank_scores)
+            ]
+
+            body = QueryResponse(
+                results=fatwa_results,
+                query=query_request.query,
+                processing_time=timer.elapsed(),
+                degraded=fallback is not None,
+                fallback=fallback
+            ).model_dump_json(exclude_none=True)
+
+        processing_time = timer.finish()
+
+        headers = {}
+        if SERVER_TIMING:
+            headers["Server-Timing"] = timer.server_timing(total=processing_time)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing query: {str(e)}"
+        )
 
-        return QueryResponse(
-            results=fatwa_results,
-            query=query_request.query,
-            processing_time=processing_time
+
+@app.post("/ask", dependencies=[Depends(verify_api_key), Depends(require_ready)])
+@limiter.limit(ASK_RATE_LIMIT)
+async def ask_question(request: Request, ask_request: AskRequest):
+    timer = StageTimer()
+    index, context_cache = app.index, app.context_cache
+    shards = select_shards(index, ask_request.filters)
+    limit = max(1, min(ask_request.limit or ASK_TOP_K, ASK_MAX_SOURCES))
+
+    # Repeated questions skip the embedding, the vector query and context assembly
+    cache_key = ContextCache.key(ask_request.question, limit, ask_request.filters)
+    cached = context_cache.get(cache_key)
+    ASK_CONTEXT_CACHE.labels(result="hit" if cached is not None else "miss").inc()
+
+    if cached is None:
+        try:
+            rerank = app.reranker is not None
+            ids, metadatas, distances, documents, fallback = await retrieve(
+                index, shards, ask_request.question, max(limit, RERANK_CANDIDATES) if rerank else limit, ask_request.filters,
+                ["metadatas", "distances", "documents"], timer
+            )
+            if rerank:
+                ids, metadatas, distances, documents, _ = await rerank_hits(
+                    ask_request.question, ids, metadatas, distances, documents, timer
+                )
+            ids, metadatas, distances, documents = ids[:limit], metadatas[:limit], distances[:limit], documents[:limit]
+            with timer.stage("context"):
+                context = build_context(metadatas, documents, ASK_CONTEXT_TOKENS)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error retrieving context: {str(e)}"
+            )
+        sources = [
+            {"n": number, "id": fatwa_id, "title": metadata["title"], "url": metadata["url"],
+             "source": metadata.get("source"), "score": round(1.0 - distance, 4)}
+            for number, (fatwa_id, metadata, distance) in enumerate(zip(ids, metadatas, distances), 1)
+        ]
+        cached = (sources, context, fallback)
+        # A degraded retrieval is not worth keeping once the embedding provider recovers
+        if fallback is None:
+            context_cache.put(cache_key, cached)
+    sources, context, fallback = cached
+
+    async def answer_events():
+        yield sse_event("sources", {"sources": sources, "degraded": fallback is not None, "fallback": fallback})
+        if not sources:
+            yield sse_event("done", {"citations": [], "processing_time": timer.elapsed()})
+            return
+
+        parts = []
+        first_token = None
+        stream = None
+        try:
+            stream = await app.llm_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=build_messages(ask_request.question, context),
+                max_tokens=ASK_MAX_TOKENS,
+                temperature=0.2,
+                stream=True
+            )
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if not text:
+                    continue
+                if first_token is None:
+                    first_token = timer.elapsed()
+                    ASK_TIME_TO_FIRST_TOKEN.observe(first_token)
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+        except Exception as e:
+            ASK_ERRORS.inc()
+            yield sse_event("error", {"detail": f"Error generating answer: {str(e)}"})
+            return
+        finally:
+            # Also reached when the client disconnects mid-answer: stop generating
+            if stream is not None:
+                await stream.close()
+
+        processing_time = timer.elapsed()
+        ASK_LATENCY.observe(processing_time)
+        yield sse_event("done", {
+            "citations": cited_sources("".join(parts), len(sources)),
+            "time_to_first_token": first_token,
+            "processing_time": processing_time
+        })
+
+    return StreamingResponse(answer_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/sources", response_model=SourcesResponse, dependencies=[Depends(verify_api_key), Depends(require_ready)])
+def list_sources():
+    # The names accepted by filters.sources
+    index = app.index
+    return SourcesResponse(sources=[shard.as_dict() for shard in index.shards], version=index.version)
+
+
+@app.get("/suggest", response_model=SuggestResponse, dependencies=[Depends(verify_api_key), Depends(require_ready)])
+@limiter.limit(SUGGEST_RATE_LIMIT)
+async def suggest_titles(request: Request, q: str = Query(..., max_length=200),
+                         limit: int = Query(5, ge=1)):
+    # Served from the in-memory title index: no embedding call and no vector query
+    start = time.perf_counter()
+    suggestions = app.index.suggest_index.suggest(q, min(limit, SUGGEST_MAX_LIMIT))
+    processing_time = time.perf_counter() - start
+    SUGGEST_LATENCY.observe(processing_time)
+    body = SuggestResponse(
+        suggestions=suggestions,
+        query=q,
+        processing_time=processing_time
+    ).model_dump_json(exclude_none=True)
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/fatwa/{fatwa_id}/related", response_model=RelatedResponse,
+         dependencies=[Depends(verify_api_key), Depends(require_ready)])
+@limiter.limit(RATE_LIMIT)
+async def related_fatwas(request: Request, fatwa_id: str, limit: int = Query(10, ge=1)):
+    # Served from the table precomputed by llm/related.py, so article pages cost no embedding call
+    start = time.perf_counter()
+    related_index = app.index.related_index
+    if related_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Related fatwas have not been computed; run llm/related.py"
         )
+    fatwa = related_index.fatwa(fatwa_id)
+    if fatwa is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fatwa not found")
+    body = RelatedResponse(
+        related=related_index.related(fatwa_id, limit),
+        processing_time=time.perf_counter() - start,
+        **fatwa
+    ).model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+async def retire_index(index):
+    """Close a replaced snapshot once the requests that started on it have had time to finish."""
+    await asyncio.sleep(INDEX_RETIRE_SECONDS)
+    # A rollback may have made the same snapshot live again in the meantime
+    if index.path != app.index.path:
+        await asyncio.to_thread(close_client, index.path)
+        print(f"Closed snapshot {index.version}")
+
+
+async def reload_index(version=None, force=False):
+    """Load and warm a snapshot off the event loop, then swap it in; returns (index, previous index)."""
+    async with app.state.reload_lock:
+        previous = app.index
+        version = version or current_version(INDEX_ROOT)
+        if version is None:
+            raise ValueError(f"No snapshot published in {INDEX_ROOT}")
+        if version == previous.version and not force:
+            INDEX_RELOADS.labels(outcome="unchanged").inc()
+            return previous, previous
+
+        # The version may come from a request, so only published snapshot names are accepted
+        if not is_published(INDEX_ROOT, version):
+            raise ValueError(f"No published snapshot {version} in {INDEX_ROOT}")
+        path = snapshot_path(INDEX_ROOT, version)
+        start = time.perf_counter()
+        try:
+            index = await asyncio.to_thread(
+                load_snapshot, path, COLLECTION_NAME, version, WARMUP_QUERIES, None, SEARCH_MODE, None,
+                COLLECTION_NAMES
+            )
+        except Exception as e:
+            INDEX_RELOADS.labels(outcome="failed").inc()
+            raise RuntimeError(f"Could not load snapshot {version}: {e}") from e
+        # Typeahead keeps ranking what people searched for before the swap
+        index.suggest_index.carry_popularity(previous.suggest_index)
+        INDEX_RELOAD_SECONDS.observe(time.perf_counter() - start)
+
+        # The swap: requests that already hold the old index finish on it
+        app.index = index
+        app.context_cache = ContextCache(maxsize=CONTEXT_CACHE_SIZE)
+        INDEX_RELOADS.labels(outcome="swapped").inc()
+        print(f"Swapped in snapshot {version} (was {previous.version}) after {time.perf_counter() - start:.2f}s")
+
+        if previous.path != index.path:
+            # Keep a reference so the pending close is not garbage collected
+            task = asyncio.create_task(retire_index(previous))
+            app.state.retiring.add(task)
+            task.add_done_callback(app.state.retiring.discard)
+        return index, previous
+
+
+async def watch_index():
+    """Reload whenever INDEX_ROOT/CURRENT changes to name another snapshot."""
+    # Follows changes only, so a version pinned with /admin/reload stays until the next publish
+    seen = None
+    while True:
+        await asyncio.sleep(INDEX_WATCH_INTERVAL)
+        if not app.state.startup.ready:
+            continue
+        if seen is None:
+            seen = app.index.version
+        try:
+            version = await asyncio.to_thread(current_version, INDEX_ROOT)
+            if version is not None and version != seen:
+                await reload_index(version)
+                seen = version
+        except Exception as e:
+            # Keep serving the old snapshot and try again on the next change
+            print(f"Error reloading snapshot: {e}")
+            await asyncio.sleep(max(INDEX_WATCH_INTERVAL, 30))
+
+
+@app.post("/admin/reload", dependencies=[Depends(verify_admin_key), Depends(require_ready)])
+async def reload_snapshot(reload_request: Optional[ReloadRequest] = None):
+    # Only snapshots can be swapped: Chroma keeps one client per path, so DB_PATH cannot be reopened in place
+    if not INDEX_ROOT:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Hot reload needs INDEX_ROOT; the API is serving DB_PATH"
+        )
+    reload_request = reload_request or ReloadRequest()
+    start = time.perf_counter()
+    try:
+        index, previous = await reload_index(reload_request.version, reload_request.force)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing query: {str(e)}"
+            detail=f"{str(e)}; still serving {app.index.version}"
         )
+    return {
+        "version": index.version,
+        "previous": previous.version,
+        "swapped": index is not previous,
+        "seconds": time.perf_counter() - start,
+    }
+
+app.state.startup.record("import_api", time.perf_counter() - IMPORT_STARTED)
 
 if __name__ == "__main__":
     import uvicorn
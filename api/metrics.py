@@ -0,0 +1,181 @@
+"""
+Prometheus metrics and per-stage request timing for the Fatwa Search API.
+"""
+
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Buckets tuned for sub-millisecond cache lookups up to multi-second embedding calls
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_LATENCY = Histogram(
+    "fatwa_search_stage_seconds",
+    "Time spent in each stage of a search request",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "fatwa_search_request_seconds",
+    "End-to-end time spent handling a search request",
+    buckets=STAGE_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "fatwa_embedding_cache_lookups_total",
+    "Query embedding cache lookups",
+    ["result"],
+)
+CACHE_HIT_RATIO = Gauge(
+    "fatwa_embedding_cache_hit_ratio",
+    "Fraction of query embedding cache lookups that were hits",
+)
+IN_FLIGHT = Gauge(
+    "fatwa_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+RATE_LIMITED = Counter(
+    "fatwa_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter",
+    ["path"],
+)
+
+SUGGEST_LATENCY = Histogram(
+    "fatwa_suggest_seconds",
+    "Time spent answering a /suggest request",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+RERANK_LATENCY = Histogram(
+    "fatwa_rerank_seconds",
+    "Time a search spent re-ranking its candidates, by outcome",
+    ["outcome"],
+    buckets=STAGE_BUCKETS,
+)
+RERANK_PAIRS = Histogram(
+    "fatwa_rerank_pairs",
+    "Query-fatwa pairs scored per re-ranked search",
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 200),
+)
+
+EMBEDDING_OUTCOMES = Counter(
+    "fatwa_embedding_requests_total",
+    "Query embeddings by how they ended: answered by the first request or the hedge, timed out or failed",
+    ["outcome"],
+)
+EMBEDDING_HEDGES = Counter(
+    "fatwa_embedding_hedges_total",
+    "Duplicate embedding requests sent because the first one was slow or failed",
+)
+DEGRADED_SEARCHES = Counter(
+    "fatwa_search_degraded_total",
+    "Searches answered without a fresh query embedding, by fallback",
+    ["fallback"],
+)
+
+ASK_TIME_TO_FIRST_TOKEN = Histogram(
+    "fatwa_ask_time_to_first_token_seconds",
+    "Time from receiving an /ask request to streaming the first answer token",
+    buckets=STAGE_BUCKETS,
+)
+ASK_LATENCY = Histogram(
+    "fatwa_ask_seconds",
+    "Time from receiving an /ask request to the end of the streamed answer",
+    buckets=STAGE_BUCKETS + (30.0, 60.0),
+)
+ASK_CONTEXT_CACHE = Counter(
+    "fatwa_ask_context_cache_lookups_total",
+    "Retrieved context cache lookups for /ask",
+    ["result"],
+)
+ASK_ERRORS = Counter(
+    "fatwa_ask_errors_total",
+    "/ask answers that failed while generating",
+)
+
+STARTUP_SECONDS = Gauge(
+    "fatwa_startup_seconds",
+    "Time spent in each startup phase",
+    ["phase"],
+)
+READY = Gauge(
+    "fatwa_ready",
+    "Whether the index is loaded and warmed (1) or not yet (0)",
+)
+
+SHARD_LATENCY = Histogram(
+    "fatwa_shard_query_seconds",
+    "Time each source shard took to answer its part of a search",
+    ["shard"],
+    buckets=STAGE_BUCKETS,
+)
+SHARD_ERRORS = Counter(
+    "fatwa_shard_errors_total",
+    "Shard queries that failed; the search is answered from the other shards",
+    ["shard"],
+)
+
+INDEX_RELOADS = Counter(
+    "fatwa_index_reloads_total",
+    "Index reloads by outcome: swapped in, already live, or failed while the old snapshot kept serving",
+    ["outcome"],
+)
+INDEX_RELOAD_SECONDS = Histogram(
+    "fatwa_index_reload_seconds",
+    "Time spent loading and warming a snapshot before swapping it in",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+_cache_stats = {"hit": 0, "miss": 0}
+
+
+def record_cache_lookup(hit):
+    """Count an embedding cache lookup and refresh the hit ratio gauge."""
+    result = "hit" if hit else "miss"
+    _cache_stats[result] += 1
+    CACHE_LOOKUPS.labels(result=result).inc()
+    CACHE_HIT_RATIO.set(_cache_stats["hit"] / (_cache_stats["hit"] + _cache_stats["miss"]))
+
+
+def render_metrics():
+    """Render all metrics in the Prometheus text exposition format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class StageTimer:
+    """Collects per-stage timings for a single request using a monotonic clock."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block and record it under the given stage name."""
+        stage_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - stage_start)
+
+    def record(self, name, elapsed):
+        """Record seconds spent in a stage that was timed piecemeal, as one sample."""
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        STAGE_LATENCY.labels(stage=name).observe(elapsed)
+
+    def elapsed(self):
+        """Seconds since the timer was created."""
+        return time.perf_counter() - self.start
+
+    def finish(self):
+        """Record the end-to-end request latency and return it."""
+        total = self.elapsed()
+        REQUEST_LATENCY.observe(total)
+        return total
+
+    def server_timing(self, total=None):
+        """Format the collected stages as a Server-Timing header value."""
+        entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries)
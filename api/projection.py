@@ -0,0 +1,88 @@
+"""
+Field projection for search results.
+
+Pulls the question, answer summary (ringkasan), a short answer snippet or the
+full document out of the Chroma metadata and document returned by the query,
+so clients don't have to re-fetch each fatwa.
+"""
+
+import re
+
+INCLUDABLE_FIELDS = ("question", "ringkasan", "snippet", "document")
+
+RINGKASAN_RE = re.compile(r'Ringkasan\s+Jawapan\s*:?\s*(.*?)(?=Huraian\s+Jawapan\s*:?|$)', re.DOTALL | re.IGNORECASE)
+HURAIAN_RE = re.compile(r'Huraian\s+Jawapan\s*:?\s*(.*)', re.DOTALL | re.IGNORECASE)
+ANSWER_START_RE = re.compile(r'(Ringkasan\s+Jawapan|Huraian\s+Jawapan|Jawapan)\s*:?', re.IGNORECASE)
+
+
+def split_document(document, metadata):
+    """Split a stored document into (question, answer).
+
+    Documents are indexed as "<question> <answer>". Newer indexes also keep the
+    question in the metadata; older ones are split on the first answer heading.
+    """
+    document = document or ""
+    question = metadata.get("question")
+    if question and document.startswith(question):
+        return question, document[len(question):].strip()
+
+    match = ANSWER_START_RE.search(document)
+    if match:
+        return document[:match.start()].strip(), document[match.start():].strip()
+    return question or "", document
+
+
+def make_snippet(text, length):
+    """Trim text to roughly `length` characters on a word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[:cut if cut > 0 else length].rstrip(",.;: ") + "…"
+
+
+def ringkasan_of(metadata, answer):
+    """The summary answer: from the metadata when indexed, else parsed out of the answer text."""
+    ringkasan = metadata.get("ringkasan")
+    if ringkasan is None:
+        match = RINGKASAN_RE.search(answer)
+        ringkasan = match.group(1).strip() if match else ""
+    return ringkasan
+
+
+def answer_sections(metadata, document):
+    """(ringkasan, huraian): the summary answer and the detailed explanation of a stored fatwa."""
+    _, answer = split_document(document, metadata)
+    ringkasan = ringkasan_of(metadata, answer)
+    match = HURAIAN_RE.search(answer)
+    if match:
+        huraian = match.group(1).strip()
+    else:
+        # No headings: the whole answer is the explanation
+        heading = ANSWER_START_RE.match(answer)
+        huraian = "" if ringkasan else (answer[heading.end():] if heading else answer).strip()
+    return ringkasan, huraian
+
+
+def project_fields(metadata, document, include, snippet_length=300):
+    """Build the requested optional fields for one search hit."""
+    if not include:
+        return {}
+
+    question, answer = split_document(document, metadata)
+    fields = {}
+
+    if "question" in include:
+        fields["question"] = metadata.get("question") or question
+
+    if "ringkasan" in include:
+        fields["ringkasan"] = ringkasan_of(metadata, answer)
+
+    if "snippet" in include:
+        heading = ANSWER_START_RE.match(answer)
+        fields["snippet"] = make_snippet(answer[heading.end():] if heading else answer, snippet_length)
+
+    if "document" in include:
+        fields["document"] = document
+
+    return fields
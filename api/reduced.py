@@ -0,0 +1,78 @@
+"""
+Reduced-dimension vector search for SEARCH_MODE=reduced.
+
+llm/reduce.py fits a PCA projection of the stored embeddings and writes the
+projected, normalized vectors (reduced.npz) and the full-precision unit
+vectors (full_vectors.npy) to ARTIFACTS_DIR. A query is projected the same
+way and scored against every fatwa with one small matrix-vector product; the
+best `shortlist` candidates are then re-ranked by exact cosine similarity on
+the full vectors. The full vectors are memory-mapped, so only the
+short-listed rows are read and the resident index is the reduced one.
+"""
+
+import os
+
+import numpy as np
+
+from filters import filter_mask
+
+REDUCED_FILE = "reduced.npz"
+FULL_FILE = "full_vectors.npy"
+
+
+class ReducedIndex:
+    """The PCA projection, reduced vectors and memory-mapped full vectors from llm/reduce.py."""
+
+    def __init__(self, path, full_path):
+        with np.load(path) as table:
+            self.ids = table["ids"].tolist()
+            self.mean = table["mean"]
+            self.components = table["components"]
+            self.vectors = table["vectors"]
+            self.series = table["series"]
+            self.published = table["published"]
+            self.topics = table["topics"]
+            self.explained_variance = float(table["explained_variance"])
+            self.created_at = str(table["created_at"])
+            self.collection = str(table["collection"])
+        self.full = np.load(full_path, mmap_mode="r")
+        self.path = path
+
+    @classmethod
+    def load(cls, artifacts_dir):
+        """The reduced index in artifacts_dir, or None if it has not been computed."""
+        path = os.path.join(artifacts_dir, REDUCED_FILE)
+        full_path = os.path.join(artifacts_dir, FULL_FILE)
+        if not (os.path.exists(path) and os.path.exists(full_path)):
+            return None
+        return cls(path, full_path)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dims(self):
+        return self.components.shape[1]
+
+    def search(self, embedding, limit=3, filters=None, shortlist=100):
+        """(ids, scores) of the most similar fatwas by full-precision cosine similarity, best first."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        reduced = (query - self.mean) @ self.components
+        reduced /= np.linalg.norm(reduced) or 1.0
+        scores = self.vectors @ reduced
+
+        mask = filter_mask(filters, self.series, self.published, self.topics)
+        if mask is not None:
+            scores[~mask] = -np.inf
+        available = len(scores) if mask is None else int(mask.sum())
+        take = min(max(shortlist, limit), available)
+        if take <= 0 or limit <= 0:
+            return [], []
+
+        candidates = np.argpartition(-scores, take - 1)[:take] if take < len(scores) else np.arange(len(scores))
+        # Sorted rows read the memory-mapped file in order
+        candidates.sort()
+        exact = self.full[candidates] @ query
+        top = np.argsort(-exact, kind="stable")[:limit]
+        return [self.ids[row] for row in candidates[top].tolist()], exact[top].astype(float).tolist()
@@ -0,0 +1,62 @@
+"""
+Precomputed related fatwas for /fatwa/{id}/related.
+
+llm/related.py writes each fatwa's top-k nearest neighbors to
+ARTIFACTS_DIR/related.npz. Here the table is loaded once and served by direct
+lookup: id -> row -> neighbor positions, with no embedding call and no
+vector query.
+"""
+
+import os
+
+import numpy as np
+
+RELATED_FILE = "related.npz"
+
+
+class RelatedIndex:
+    """The neighbor table from llm/related.py, keyed by fatwa id."""
+
+    def __init__(self, path):
+        with np.load(path) as table:
+            self.ids = table["ids"].tolist()
+            self.titles = table["titles"].tolist()
+            self.urls = table["urls"].tolist()
+            self.neighbors = table["neighbors"]
+            self.scores = table["scores"].astype(np.float32)
+            self.created_at = str(table["created_at"])
+        self.rows = {fatwa_id: row for row, fatwa_id in enumerate(self.ids)}
+        self.path = path
+
+    @classmethod
+    def load(cls, artifacts_dir):
+        """The related table in artifacts_dir, or None if it has not been computed."""
+        path = os.path.join(artifacts_dir, RELATED_FILE)
+        return cls(path) if os.path.exists(path) else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fatwa(self, fatwa_id):
+        """Title and url of a fatwa, or None if it is not in the table."""
+        row = self.rows.get(fatwa_id)
+        if row is None:
+            return None
+        return {"id": fatwa_id, "title": self.titles[row], "url": self.urls[row]}
+
+    def related(self, fatwa_id, limit=None):
+        """The most similar fatwas, best first, or None if the id is not in the table."""
+        row = self.rows.get(fatwa_id)
+        if row is None:
+            return None
+        neighbors = self.neighbors[row][:limit]
+        scores = self.scores[row][:limit]
+        return [
+            {
+                "id": self.ids[neighbor],
+                "title": self.titles[neighbor],
+                "url": self.urls[neighbor],
+                "score": round(float(score), 4),
+            }
+            for neighbor, score in zip(neighbors.tolist(), scores.tolist())
+        ]
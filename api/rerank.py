@@ -0,0 +1,99 @@
+"""
+Optional cross-encoder re-ranking for /search.
+
+The vector query over-fetches RERANK_CANDIDATES hits, and a small cross-encoder
+exported to ONNX (e.g. a multilingual MiniLM trained on mMARCO) scores every
+(query, fatwa) pair on the CPU. All pairs are tokenized together and padded
+to the longest one, so a request costs a single inference call. Scoring runs
+in a worker thread under a time budget: if it overruns, fails, or the model is
+already busy with other requests, the hits keep their vector order.
+
+onnxruntime and tokenizers are only imported when RERANK_MODEL is set.
+"""
+
+import asyncio
+import os
+import threading
+
+MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# Longer documents are cut before tokenizing; the tokenizer truncates to max_length anyway
+CHARS_PER_TOKEN = 6
+# BERT-style and XLM-R-style padding tokens
+PAD_TOKENS = ("[PAD]", "<pad>")
+
+
+class CrossEncoderReranker:
+    """An ONNX cross-encoder and its tokenizer, loaded from a model directory."""
+
+    def __init__(self, model_dir, max_length=256, threads=None, max_concurrent=1):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.max_length = max_length
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        # Only the fatwa side is truncated, the query is kept whole
+        self.tokenizer.enable_truncation(max_length=max_length, strategy="only_second")
+        # Pad to the longest pair in the batch with the model's own pad token
+        pad_token = next((token for token in PAD_TOKENS if self.tokenizer.token_to_id(token) is not None), None)
+        if pad_token is None:
+            self.tokenizer.enable_padding()
+        else:
+            self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token), pad_token=pad_token)
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        # Inference calls that may run at once; extra requests skip re-ranking instead of queueing
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+
+    def score(self, query, passages):
+        """Relevance of each passage to the query, scored in one batched inference call."""
+        # Imported here rather than at module level, so importing main does not load numpy
+        import numpy as np
+
+        if not passages:
+            return np.zeros(0, dtype=np.float32)
+        limit = self.max_length * CHARS_PER_TOKEN
+        encodings = self.tokenizer.encode_batch([(query, passage[:limit]) for passage in passages])
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+        logits = np.asarray(logits, dtype=np.float32).reshape(len(passages), -1)
+        # Single-logit models output relevance directly; two-logit models put it last
+        return logits[:, -1]
+
+
+def rerank_passage(metadata, document):
+    """The text a hit is scored on: its title followed by the indexed question and answer."""
+    title = metadata.get("title", "")
+    return f"{title}. {document}" if document else title
+
+
+async def rerank_order(reranker, query, passages, budget):
+    """(order, scores, outcome): the new order of the passages, or None to keep the vector order."""
+    if not reranker.slots.acquire(blocking=False):
+        return None, None, "busy"
+
+    def run():
+        try:
+            return reranker.score(query, passages)
+        finally:
+            # Released when inference actually ends, so an overrun keeps later requests from piling on
+            reranker.slots.release()
+
+    try:
+        scores = await asyncio.wait_for(asyncio.to_thread(run), budget)
+    except asyncio.TimeoutError:
+        return None, None, "timeout"
+    except Exception as e:
+        print(f"Re-ranking failed: {e}")
+        return None, None, "error"
+    return (-scores).argsort(kind="stable"), scores, "reranked"
@@ -0,0 +1,132 @@
+"""
+Index snapshots, source shards and hot reload.
+
+With INDEX_ROOT set, the API serves the snapshot named by INDEX_ROOT/CURRENT
+(published by snapshot.py) instead of DB_PATH. A snapshot holds one Chroma
+collection per source (a shard, see sources.py at the repository root).
+Everything read from one snapshot (the shards, their reduced indexes, and the
+suggest, lexical and related indexes built across them) lives on one
+IndexState. A reload builds and warms a complete new IndexState in a worker
+thread while requests keep using the old one, then swaps it in with a single
+assignment. Requests read the current IndexState once, so none of them mixes
+two snapshots, and the old Chroma client is only closed after a grace period.
+"""
+
+import os
+import time
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "SNAPSHOT.json"
+
+
+def snapshot_path(index_root, version):
+    return os.path.join(index_root, SNAPSHOTS_DIR, version)
+
+
+def current_version(index_root):
+    """The live snapshot version, or None if nothing has been published."""
+    try:
+        with open(os.path.join(index_root, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def published_versions(index_root):
+    """The versions snapshot.py has published (written a manifest for) under index_root."""
+    directory = os.path.join(index_root, SNAPSHOTS_DIR)
+    if not os.path.isdir(directory):
+        return set()
+    return {name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name, MANIFEST_FILE))}
+
+
+def is_published(index_root, version):
+    """Whether version names a published snapshot; paths such as "../.." never do."""
+    if not version or os.sep in version or (os.altsep and os.altsep in version):
+        return False
+    return version in published_versions(index_root)
+
+
+class Shard:
+    """One source's Chroma collection, and the reduced index searched in its place if one is loaded."""
+
+    def __init__(self, collection):
+        metadata = collection.metadata or {}
+        # Collections tagged by pipeline.py --sources carry their source name; others go by their own name
+        self.name = metadata.get("source") or collection.name
+        self.label = metadata.get("label") or self.name
+        self.collection = collection
+        self.count = collection.count()
+        self.reduced_index = None
+
+    def as_dict(self):
+        return {"name": self.name, "label": self.label, "collection": self.collection.name, "fatwas": self.count}
+
+
+def open_shards(client, collection_names=None, default_collection=None):
+    """Shards for the named collections, else for every collection tagged with a source, else the default one."""
+    if not collection_names:
+        tagged = [client.get_collection(name) for name in sorted(client.list_collections())]
+        tagged = [collection for collection in tagged if (collection.metadata or {}).get("source")]
+        if tagged:
+            shards = [Shard(collection) for collection in tagged]
+        else:
+            shards = [Shard(client.get_collection(default_collection))]
+    else:
+        shards = [Shard(client.get_collection(name)) for name in collection_names]
+
+    names = [shard.name for shard in shards]
+    repeated = sorted({name for name in names if names.count(name) > 1})
+    if repeated:
+        raise ValueError(f"Several collections claim the source {', '.join(repeated)}")
+    return shards
+
+
+class IndexState:
+    """The shards of one snapshot (or DB_PATH) and the in-memory indexes built from them."""
+
+    def __init__(self, path, shards, version=None):
+        self.path = path
+        self.version = version
+        self.shards = shards
+        self.shards_by_name = {shard.name: shard for shard in shards}
+        # Which shard holds each fatwa, for hits found outside Chroma
+        self.shard_of = {}
+        self.suggest_index = None
+        self.lexical_index = None
+        self.related_index = None
+        self.loaded_at = time.time()
+
+    def select(self, names=None):
+        """The shards of the named sources (all of them when names is empty); raises ValueError for unknown ones."""
+        if not names:
+            return self.shards
+        unknown = sorted(set(names) - set(self.shards_by_name))
+        if unknown:
+            raise ValueError(f"Unknown sources: {', '.join(unknown)}. Available: {', '.join(self.shards_by_name)}")
+        return [shard for shard in self.shards if shard.name in names]
+
+    def as_dict(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "fatwas": sum(shard.count for shard in self.shards),
+            "sources": [shard.name for shard in self.shards],
+            "loaded_at": self.loaded_at,
+        }
+
+
+def close_client(path):
+    """Stop the Chroma client opened for path, releasing its files and memory."""
+    # Chroma keeps one system per persistent path for the life of the process and has no public close,
+    # so this relies on its internals; if they change, the client is left open rather than failing the reload
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+
+        system = SharedSystemClient._identifier_to_system.pop(path, None)
+    except (ImportError, AttributeError) as e:
+        print(f"Could not close the Chroma client for {path}: {e}")
+        return
+    if system is not None:
+        system.stop()
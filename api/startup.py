@@ -0,0 +1,195 @@
+"""
+Background index loading and warm-up.
+
+The heavy imports (chromadb, openai), opening the persistent Chroma client and
+its source shards, the first HNSW queries, building the /suggest title index
+and the lexical fallback index, and loading the related fatwas table, the
+reduced search indexes and the optional re-ranking model all happen off the
+event loop, so /health answers as soon as the server is listening and /ready
+flips once the index is usable. A hot reload runs the same load_snapshot steps for the new
+snapshot while the old one keeps serving.
+"""
+
+import os
+import random
+import time
+from contextlib import contextmanager, nullcontext
+
+from metrics import READY, STARTUP_SECONDS
+from snapshots import IndexState, current_version, open_shards, snapshot_path
+
+
+class StartupState:
+    """Tracks readiness and how long each startup phase took."""
+
+    def __init__(self):
+        self.ready = False
+        self.error = None
+        self.timings = {}
+        self.started_at = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a startup phase and publish it as a metric."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        self.timings[name] = seconds
+        STARTUP_SECONDS.labels(phase=name).set(seconds)
+
+    def as_dict(self):
+        return {
+            "status": "ready" if self.ready else ("failed" if self.error else "loading"),
+            "error": self.error,
+            "startup_seconds": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+        }
+
+
+def warm_collection(collection, num_queries=5, n_results=3):
+    """Run a few synthetic vector queries so the index is paged in before traffic arrives."""
+    sample = collection.get(limit=1, include=["embeddings"])
+    embeddings = sample.get("embeddings")
+    if embeddings is None or len(embeddings) == 0:
+        return 0
+
+    dimensions = len(embeddings[0])
+    n_results = min(n_results, collection.count())
+    rng = random.Random(0)
+    for _ in range(num_queries):
+        collection.query(
+            query_embeddings=[[rng.gauss(0, 1) for _ in range(dimensions)]],
+            n_results=n_results,
+            include=["metadatas", "distances"]
+        )
+    return num_queries
+
+
+def load_reranker(model_dir, max_length=256, threads=None):
+    """The cross-encoder in model_dir, or None if re-ranking is not configured or cannot be loaded."""
+    if not model_dir:
+        return None
+    try:
+        from rerank import CrossEncoderReranker
+        return CrossEncoderReranker(model_dir, max_length=max_length, threads=threads)
+    except Exception as e:
+        # Search still works without it, in plain vector order
+        print(f"Could not load re-ranking model from {model_dir}: {e}")
+        return None
+
+
+def load_reduced(artifacts_dir, shard, single):
+    """The shard's reduced index from ARTIFACTS_DIR/<collection>/, or from ARTIFACTS_DIR itself when it is the only shard."""
+    from reduced import ReducedIndex
+
+    name = shard.collection.name
+    reduced = ReducedIndex.load(os.path.join(artifacts_dir, name))
+    if reduced is None and single:
+        reduced = ReducedIndex.load(artifacts_dir)
+    if reduced is not None and reduced.collection != name:
+        print(f"Ignoring the reduced index of {reduced.collection} found for {name}")
+        return None
+    return reduced
+
+
+def load_snapshot(db_path, collection_name, version=None, warmup_queries=5, artifacts_dir=None,
+                  search_mode="vector", phase=None, collection_names=None):
+    """Open one snapshot's shards, warm them and build the indexes served from them; runs in a worker thread."""
+    import chromadb
+
+    phase = phase or (lambda name: nullcontext())
+    artifacts_dir = artifacts_dir or os.path.join(db_path, "artifacts")
+
+    with phase("open_collection"):
+        shards = open_shards(chromadb.PersistentClient(path=db_path), collection_names, collection_name)
+        index = IndexState(db_path, shards, version)
+    print("Connected to shards: "
+          + ", ".join(f"{shard.name} ({shard.collection.name}, {shard.count} fatwas)" for shard in shards)
+          + (f" in snapshot {version}" if version else ""))
+
+    with phase("warmup"):
+        for shard in shards:
+            warm_collection(shard.collection, warmup_queries)
+
+    with phase("suggest_index"):
+        from suggest import SuggestIndex
+        index.suggest_index = SuggestIndex.from_collections([shard.collection for shard in shards])
+    print(f"Suggest index built over {len(index.suggest_index)} titles")
+
+    # Answers /search when the query embedding is late; one index across shards so scores compare
+    with phase("lexical_index"):
+        from lexical import LexicalIndex
+        index.lexical_index = LexicalIndex.from_collections([(shard.name, shard.collection) for shard in shards])
+        index.shard_of = {fatwa_id: index.shards_by_name[source]
+                          for fatwa_id, source in zip(index.lexical_index.ids, index.lexical_index.sources)}
+    print(f"Lexical fallback index built over {len(index.lexical_index)} fatwas")
+
+    # Precomputed by llm/related.py; /fatwa/{id}/related answers 503 until it exists
+    with phase("related_index"):
+        from related import RelatedIndex
+        index.related_index = RelatedIndex.load(artifacts_dir)
+    if index.related_index is None:
+        print("No related fatwas table found; run llm/related.py to enable /fatwa/{id}/related")
+    else:
+        print(f"Related fatwas loaded for {len(index.related_index)} fatwas")
+
+    # Precomputed by llm/reduce.py; without it search stays on the Chroma index
+    if search_mode == "reduced":
+        with phase("reduced_index"):
+            for shard in shards:
+                shard.reduced_index = load_reduced(artifacts_dir, shard, len(shards) == 1)
+        missing = [shard.name for shard in shards if shard.reduced_index is None]
+        if missing:
+            print(f"SEARCH_MODE=reduced but no reduced index found for {', '.join(missing)}; run llm/reduce.py. "
+                  "Searching the Chroma index")
+        else:
+            print(f"Searching {sum(len(shard.reduced_index) for shard in shards)} fatwas in "
+                  f"{shards[0].reduced_index.dims} PCA dimensions")
+    return index
+
+
+def load_index(app, state, db_path, collection_name, openai_api_key, openai_base_url, warmup_queries=5,
+               artifacts_dir=None, rerank_model=None, rerank_max_length=256, rerank_threads=None,
+               openai_timeout=10.0, openai_max_retries=0, llm_api_key=None, llm_base_url=None, llm_timeout=60.0,
+               search_mode="vector", index_root=None, collection_names=None):
+    """Import the heavy clients, open the collection and warm it; runs in a worker thread."""
+    try:
+        with state.phase("import_openai"):
+            from openai import AsyncOpenAI, OpenAI
+        with state.phase("import_chromadb"):
+            import chromadb  # noqa: F401
+
+        with state.phase("open_clients"):
+            # Bounded so worker threads are not held by calls the search stopped waiting for
+            app.openai_client = OpenAI(api_key=openai_api_key, base_url=openai_base_url,
+                                       timeout=openai_timeout, max_retries=openai_max_retries)
+            # Chat completions for /ask, possibly from a local OpenAI-compatible server
+            app.llm_client = AsyncOpenAI(api_key=llm_api_key or openai_api_key, base_url=llm_base_url or openai_base_url,
+                                         timeout=llm_timeout)
+
+        # With an index root the live snapshot replaces DB_PATH, and its artifacts travel with it
+        version = None
+        if index_root:
+            version = current_version(index_root)
+            if version is None:
+                raise RuntimeError(f"No snapshot published in {index_root}; run snapshot.py publish")
+            db_path = snapshot_path(index_root, version)
+            artifacts_dir = None
+        app.index = load_snapshot(db_path, collection_name, version, warmup_queries, artifacts_dir,
+                                  search_mode, state.phase, collection_names)
+
+        with state.phase("reranker"):
+            app.reranker = load_reranker(rerank_model, rerank_max_length, rerank_threads)
+        if app.reranker is not None:
+            print(f"Re-ranking search results with {rerank_model}")
+
+        state.record("total", time.perf_counter() - state.started_at)
+        state.ready = True
+        READY.set(1)
+        print(f"Index ready in {state.timings['total']:.2f}s")
+    except Exception as e:
+        state.error = str(e)
+        print(f"Error loading index: {e}")
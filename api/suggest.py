@@ -0,0 +1,142 @@
+"""
+Title typeahead for /suggest.
+
+A compact prefix index over fatwa titles, built once at startup from the
+metadata of every shard. Every title is normalized and indexed under each of its
+word suffixes ("hukum wudhu ...", "wudhu ...", "865 ..."), so typing any word
+of a title, or its series number, finds it. The keys live in one sorted list
+and a prefix lookup is two bisections, giving a contiguous range of keys
+whose titles are then ranked by popularity with numpy. No embedding call or
+vector query is involved.
+
+Popularity starts from recency (newer fatwas first) and is bumped whenever a
+fatwa shows up in /search results, so suggestions follow what people find.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+
+import numpy as np
+
+NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+# Keys are truncated; longer queries are checked against the full title
+MAX_KEY_LENGTH = 32
+PAGE_SIZE = 1000
+
+
+def normalize(text):
+    return NON_ALNUM_RE.sub(' ', (text or '').lower()).strip()
+
+
+def word_suffixes(text, max_length=MAX_KEY_LENGTH):
+    """The text from the start of each word onwards, truncated to max_length."""
+    keys = {text[:max_length]}
+    for match in re.finditer(r' (?=\S)', text):
+        keys.add(text[match.end():match.end() + max_length])
+    return keys
+
+
+class SuggestIndex:
+    """Sorted word-suffix keys over titles, ranked by a popularity score per fatwa."""
+
+    def __init__(self, entries, max_key_length=MAX_KEY_LENGTH):
+        self.max_key_length = max_key_length
+        self.titles = [entry['title'] for entry in entries]
+        self.urls = [entry['url'] for entry in entries]
+        self.series = [entry.get('series_number') for entry in entries]
+        self.normalized = [f" {normalize(title)}" for title in self.titles]
+        self.positions = {url: index for index, url in enumerate(self.urls)}
+
+        pairs = sorted(
+            (key, index)
+            for index, text in enumerate(self.normalized)
+            for key in word_suffixes(text.strip(), max_key_length)
+        )
+        self.keys = [key for key, _ in pairs]
+        self.key_entries = np.array([index for _, index in pairs], dtype=np.int32)
+
+        # Recency only breaks ties: it stays below the weight of a single search hit
+        recency = np.array([entry.get('published') or entry.get('series_number') or 0 for entry in entries],
+                           dtype=np.float64)
+        order = np.argsort(recency, kind='stable')
+        self.tiebreak = np.zeros(len(entries), dtype=np.float64)
+        if len(entries):
+            self.tiebreak[order] = np.arange(len(entries)) / (2 * len(entries))
+        self.popularity = np.zeros(len(entries), dtype=np.float64)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_collections(cls, collections, page_size=PAGE_SIZE):
+        """Build the index from the title, url and structured fields stored in one or more Chroma collections."""
+        entries = []
+        for collection in collections:
+            offset = 0
+            while True:
+                page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+                metadatas = page["metadatas"] or []
+                entries.extend(metadata for metadata in metadatas if metadata.get('title') and metadata.get('url'))
+                if len(metadatas) < page_size:
+                    break
+                offset += page_size
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def bump(self, url, weight=1.0):
+        """Raise a fatwa's popularity, e.g. when it is returned by a search."""
+        index = self.positions.get(url)
+        if index is not None:
+            with self.lock:
+                self.popularity[index] += weight
+
+    def carry_popularity(self, previous):
+        """Start from the popularity another index (e.g. of the previous snapshot) learned, matched by url."""
+        with previous.lock:
+            popularity = {url: previous.popularity[index] for url, index in previous.positions.items()}
+        with self.lock:
+            for url, index in self.positions.items():
+                self.popularity[index] = popularity.get(url, 0.0)
+
+    def candidates(self, prefix):
+        """Distinct fatwas with a title word starting with the normalized prefix."""
+        key_prefix = prefix[:self.max_key_length]
+        lo = bisect_left(self.keys, key_prefix)
+        hi = bisect_left(self.keys, key_prefix + '\x7f', lo)
+        matches = self.key_entries[lo:hi]
+        if len(prefix) > self.max_key_length:
+            needle = f" {prefix}"
+            matches = np.array([index for index in set(matches.tolist()) if needle in self.normalized[index]],
+                               dtype=np.int32)
+        return matches
+
+    def suggest(self, query, limit=5):
+        """Up to limit fatwas whose title has a word starting with query, most popular first."""
+        prefix = normalize(query)
+        if not prefix or limit <= 0:
+            return []
+        matches = self.candidates(prefix)
+        if not len(matches):
+            return []
+
+        scores = self.popularity[matches] + self.tiebreak[matches]
+        # A title can match through several of its words, so take a few extra before deduplicating
+        take = min(len(matches), limit * 4)
+        top = np.argpartition(-scores, take - 1)[:take] if take < len(matches) else np.arange(len(matches))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        chosen = list(dict.fromkeys(matches[top].tolist()))[:limit]
+        if len(chosen) < limit and take < len(matches):
+            unique = np.unique(matches)
+            unique_scores = self.popularity[unique] + self.tiebreak[unique]
+            chosen = unique[np.argsort(-unique_scores, kind='stable')][:limit].tolist()
+
+        return [
+            {
+                'title': self.titles[index],
+                'url': self.urls[index],
+                'series_number': self.series[index],
+                'popularity': float(self.popularity[index]),
+            }
+            for index in chosen
+        ]
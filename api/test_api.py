@@ -48,6 +48,76 @@ def test_search():
         
         print("=" * 50)
 
+def test_suggest():
+    """Test the title typeahead endpoint."""
+    headers = {"X-API-Key": API_KEY}
+    
+    for prefix in ["h", "hukum s", "solat"]:
+        response = requests.get(f"{API_URL}/suggest", headers=headers, params={"q": prefix, "limit": 5})
+        print(f"Prefix: '{prefix}' -> {response.status_code}")
+        
+        if response.status_code == 200:
+            results = response.json()
+            print(f"Processing time: {results['processing_time'] * 1000:.3f}ms")
+            for suggestion in results['suggestions']:
+                print(f"- {suggestion['title']} (popularity {suggestion['popularity']:.2f})")
+        else:
+            print(f"Error: {response.text}")
+    
+    print("-" * 50)
+
+def test_ask():
+    """Test the streamed question answering endpoint."""
+    headers = {"X-API-Key": API_KEY}
+    data = {"question": "apa hukum mandi wajib puasa?", "limit": 3}
+    
+    with requests.post(f"{API_URL}/ask", headers=headers, json=data, stream=True) as response:
+        print(f"Ask: {response.status_code}")
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                payload = json.loads(line[len("data: "):])
+                if event == "sources":
+                    for source in payload["sources"]:
+                        print(f"[{source['n']}] {source['title']}")
+                elif event == "token":
+                    print(payload["text"], end="", flush=True)
+                else:
+                    print(f"\n{event}: {payload}")
+    
+    print("-" * 50)
+
+def test_sources():
+    """Test listing the source shards and searching only some of them."""
+    headers = {"X-API-Key": API_KEY}
+    
+    response = requests.get(f"{API_URL}/sources", headers=headers)
+    print(f"Sources: {response.status_code}")
+    sources = response.json()["sources"]
+    for source in sources:
+        print(f"- {source['name']}: {source['label']} ({source['fatwas']} fatwas)")
+    
+    data = {"query": "apa hukum mandi wajib puasa?", "limit": 3, "filters": {"sources": [sources[0]["name"]]}}
+    response = requests.post(f"{API_URL}/search", headers=headers, json=data)
+    print(f"Search in {sources[0]['name']}: {response.status_code}")
+    for result in response.json()["results"]:
+        print(f"- [{result['source']}] {result['title']}")
+    
+    data["filters"]["sources"] = ["no-such-source"]
+    print(f"Unknown source: {requests.post(f'{API_URL}/search', headers=headers, json=data).status_code}")
+    print("-" * 50)
+
+def test_metrics():
+    """Test the metrics endpoint."""
+    response = requests.get(f"{API_URL}/metrics")
+    print(f"Metrics: {response.status_code}")
+    for line in response.text.splitlines():
+        if line.startswith("fatwa_") and not line.startswith("fatwa_search_stage_seconds_bucket"):
+            print(line)
+    print("-" * 50)
+
 def test_rate_limit():
     """Test the rate limiting functionality."""
     headers = {"X-API-Key": API_KEY}
@@ -68,5 +138,9 @@ def test_rate_limit():
 if __name__ == "__main__":
     test_health()
     test_search()
+    test_suggest()
+    test_ask()
+    test_sources()
+    test_metrics()
     # Uncomment to test rate limiting (will hit limits)
     # test_rate_limit() 
\ No newline at end of file
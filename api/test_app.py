@@ -0,0 +1,281 @@
+"""
+In-process tests for the search API: no server, no OpenAI.
+
+A throwaway INDEX_ROOT holds two published snapshots of two source shards with
+hand-picked 4-dimensional embeddings, and the OpenAI client is replaced by a
+fake whose latency the tests control. Run with `python -m pytest api/test_app.py`
+or `python test_app.py` from api/.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import chromadb
+
+INDEX_ROOT = tempfile.mkdtemp(prefix="fatwa-api-test-")
+atexit.register(shutil.rmtree, INDEX_ROOT, True)
+V1, V2 = "20250101-000000", "20250102-000000"
+API_KEY = "test-key"
+HEADERS = {"X-API-Key": API_KEY}
+
+# main reads its configuration at import
+os.environ.update({
+    "API_KEY": API_KEY,
+    "OPENAI_API_KEY": "test",
+    "INDEX_ROOT": INDEX_ROOT,
+    "INDEX_WATCH_INTERVAL": "0",
+    "INDEX_RETIRE_SECONDS": "0.2",
+    "EMBED_BUDGET_MS": "300",
+    "EMBED_HEDGE_MS": "0",
+    "WARMUP_QUERIES": "1",
+    "SUGGEST_MAX_LIMIT": "2",
+    "ANONYMIZED_TELEMETRY": "False",
+})
+for name in ("COLLECTION_NAMES", "RERANK_MODEL", "SEARCH_MODE", "RATE_LIMIT"):
+    os.environ.pop(name, None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from startup import StartupState  # noqa: E402
+
+# Query embeddings by query text; fatwas sit at increasing distances from QUERY
+QUERY = [1.0, 0.0, 0.0, 0.0]
+EMBEDDINGS = {"hukum solat jamak": QUERY}
+
+# (source, collection, [(id, title, embedding)]), as pipeline.py --sources stores them
+SHARDS = [
+    ("negeri", "fatwas_negeri", [
+        ("n1", "Hukum solat jamak ketika musafir", [0.99, 0.14, 0.0, 0.0]),
+        ("n2", "Hukum zakat pendapatan", [0.0, 1.0, 0.0, 0.0]),
+    ]),
+    ("wp", "fatwas_wp", [
+        ("w1", "IRSYAD HUKUM SIRI KE-865: Solat jamak dan qasar", [1.0, 0.0, 0.0, 0.0]),
+        ("w2", "Waktu solat di masjid berdekatan", [0.87, 0.5, 0.0, 0.0]),
+        ("w3", "Puasa sunat enam Syawal", [0.0, 0.0, 1.0, 0.0]),
+    ]),
+]
+# Structured fields, as article_fields.py parses them; w3 has none
+FIELDS = {
+    "n1": {"published": 20240101},
+    "n2": {"published": 20250101},
+    "w1": {"series_number": 865, "published": 20230101},
+    "w2": {"published": 20220101},
+}
+
+
+def publish(version, extra=()):
+    """Write a snapshot of SHARDS (plus extra wp fatwas) and make it the live one."""
+    path = os.path.join(INDEX_ROOT, "snapshots", version)
+    client = chromadb.PersistentClient(path=path)
+    for source, collection_name, fatwas in SHARDS:
+        fatwas = fatwas + list(extra) if source == "wp" else fatwas
+        collection = client.get_or_create_collection(collection_name, metadata={"source": source, "label": source})
+        collection.upsert(
+            ids=[fatwa_id for fatwa_id, _, _ in fatwas],
+            embeddings=[vector for _, _, vector in fatwas],
+            documents=[title for _, title, _ in fatwas],
+            metadatas=[{"title": title, "url": f"https://example.com/{source}/{fatwa_id}", "question": title,
+                        "ringkasan": title, "scraped_at": "2025-01-01T00:00:00", **FIELDS.get(fatwa_id, {})}
+                       for fatwa_id, title, _ in fatwas],
+        )
+    main.close_client(path)
+    with open(os.path.join(path, "SNAPSHOT.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version}, f)
+    with open(os.path.join(INDEX_ROOT, "CURRENT"), "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+
+
+class FakeEmbeddings:
+    """Stands in for the OpenAI client: answers from EMBEDDINGS after `delay` seconds."""
+
+    def __init__(self, delay=0.0, slow_calls=None):
+        self.delay = delay
+        # Only the first slow_calls calls are delayed (None: all of them)
+        self.slow_calls = slow_calls
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.embeddings = self
+
+    def create(self, model, input):
+        with self.lock:
+            self.calls += 1
+            slow = self.slow_calls is None or self.calls <= self.slow_calls
+        if slow:
+            time.sleep(self.delay)
+        vector = EMBEDDINGS.get(input[0], [0.0, 0.0, 0.0, 1.0])
+        return type("Response", (), {"data": [type("Embedding", (), {"embedding": vector})]})
+
+
+@contextmanager
+def serving(embeddings=None):
+    """A TestClient on a freshly loaded live snapshot, with the fake embeddings client."""
+    main.app.state.startup = StartupState()
+    with TestClient(main.app) as client:
+        deadline = time.time() + 60
+        while not main.app.state.startup.ready:
+            assert main.app.state.startup.error is None, main.app.state.startup.error
+            assert time.time() < deadline, "index did not load"
+            time.sleep(0.05)
+        main.app.openai_client = embeddings or FakeEmbeddings()
+        yield client
+
+
+def search(client, query, **body):
+    response = client.post("/search", headers=HEADERS, json={"query": query, **body})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_shard_results_merge():
+    """Hits from every shard are merged by distance and tagged with their source."""
+    with serving() as client:
+        results = search(client, "hukum solat jamak", limit=3)["results"]
+        assert [result["url"].rsplit("/", 1)[1] for result in results] == ["w1", "n1", "w2"]
+        assert [result["source"] for result in results] == ["wp", "negeri", "wp"]
+
+        only_negeri = search(client, "hukum solat jamak", limit=3, filters={"sources": ["negeri"]})["results"]
+        assert {result["source"] for result in only_negeri} == {"negeri"}
+        assert len(only_negeri) == 2
+
+        response = client.post("/search", headers=HEADERS,
+                               json={"query": "hukum solat jamak", "filters": {"sources": ["kedah"]}})
+        assert response.status_code == 400
+
+
+def test_search_limit_validated():
+    """limit must be a whole number between 1 and SEARCH_MAX_LIMIT."""
+    with serving() as client:
+        for limit in (None, 0, -1, main.SEARCH_MAX_LIMIT + 1):
+            response = client.post("/search", headers=HEADERS, json={"query": "hukum solat jamak", "limit": limit})
+            assert response.status_code == 422, (limit, response.text)
+        assert len(search(client, "hukum solat jamak", limit=main.SEARCH_MAX_LIMIT, stream=False)["results"]) == 5
+
+
+def suggest(client, q, limit=5):
+    response = client.get("/suggest", headers=HEADERS, params={"q": q, "limit": limit})
+    assert response.status_code == 200, response.text
+    return [suggestion["url"].rsplit("/", 1)[1] for suggestion in response.json()["suggestions"]]
+
+
+def test_suggest():
+    """Titles are found by any word prefix or series number, newest first until searches make some popular."""
+    with serving() as client:
+        assert suggest(client, "zak") == ["n2"]
+        assert set(suggest(client, "solat ja")) == {"n1", "w1"}
+        assert suggest(client, "akat") == []
+
+        response = client.get("/suggest", headers=HEADERS, params={"q": "865"})
+        assert [(suggestion["url"].rsplit("/", 1)[1], suggestion["series_number"])
+                for suggestion in response.json()["suggestions"]] == [("w1", 865)]
+
+        # Three titles start a word with "hukum"; limit is capped at SUGGEST_MAX_LIMIT (2) and ties go to the newest
+        assert suggest(client, "hukum", limit=5) == ["n2", "n1"]
+        assert client.get("/suggest", headers=HEADERS, params={"q": "hukum", "limit": 0}).status_code == 422
+
+        # Search hits are bumped by rank: w1 first, then n1
+        search(client, "hukum solat jamak", limit=3)
+        assert suggest(client, "hukum", limit=5) == ["w1", "n1"]
+
+
+def test_failed_shard_is_left_out():
+    """A shard that fails is dropped from the results; only a search where every shard fails errors."""
+    with serving() as client:
+        shards = main.app.index.shards_by_name
+
+        def broken(**kwargs):
+            raise RuntimeError("shard unavailable")
+
+        shards["wp"].collection.query = broken
+        results = search(client, "hukum solat jamak", limit=3)["results"]
+        assert {result["source"] for result in results} == {"negeri"}
+
+        shards["negeri"].collection.query = broken
+        response = client.post("/search", headers=HEADERS, json={"query": "hukum solat jamak", "limit": 3})
+        assert response.status_code == 500
+
+
+def test_slow_embedding_falls_back():
+    """Past the embedding budget a search answers from a similar cached query, else from the lexical index."""
+    embeddings = FakeEmbeddings(delay=2.0)
+    with serving(embeddings) as client:
+        start = time.perf_counter()
+        body = search(client, "solat jamak", limit=3)
+        assert time.perf_counter() - start < 1.5
+        assert body["degraded"] and body["fallback"] == "lexical"
+        assert {result["url"].rsplit("/", 1)[1] for result in body["results"][:2]} == {"n1", "w1"}
+
+        main.app.embedding_cache.put("hukum solat jamak", QUERY)
+        body = search(client, "hukum solat jamak musafir", limit=3)
+        assert body["fallback"] == "cache"
+        assert body["results"][0]["url"].endswith("/w1")
+
+
+def test_hedged_embedding():
+    """A slow first embedding call is hedged, and the hedge's answer serves the search in time."""
+    original = main.EMBED_HEDGE_MS
+    main.EMBED_HEDGE_MS = 50
+    try:
+        embeddings = FakeEmbeddings(delay=2.0, slow_calls=1)
+        with serving(embeddings) as client:
+            body = search(client, "hukum solat jamak", limit=1)
+            assert not body["degraded"]
+            assert body["results"][0]["url"].endswith("/w1")
+            assert embeddings.calls == 2
+    finally:
+        main.EMBED_HEDGE_MS = original
+
+
+def test_reload_swaps_and_retires():
+    """A reload swaps in the new snapshot for later requests and closes the old one after the grace period."""
+    closed = []
+    original_close = main.close_client
+    main.close_client = lambda path: (closed.append(path), original_close(path))
+    try:
+        with serving() as client:
+            old = main.app.index
+            assert old.version == V1
+
+            response = client.post("/admin/reload", headers=HEADERS, json={"version": V2})
+            assert response.status_code == 200, response.text
+            assert response.json()["swapped"] and response.json()["previous"] == V1
+            assert main.app.index.version == V2
+            assert client.get("/ready").json()["index"]["fatwas"] == 6
+            assert any(result["url"].endswith("/w4") for result in search(client, "hukum solat jamak", limit=6)["results"])
+
+            # The old snapshot stays open for in-flight requests, then is closed
+            assert old.path not in closed
+            deadline = time.time() + 5
+            while old.path not in closed and time.time() < deadline:
+                time.sleep(0.05)
+            assert closed == [old.path]
+
+            # Reloading the live version is a no-op, and only published snapshot names are accepted
+            assert client.post("/admin/reload", headers=HEADERS, json={"version": V2}).json()["swapped"] is False
+            for version in ("../..", "snapshots", "19990101-000000"):
+                response = client.post("/admin/reload", headers=HEADERS, json={"version": version})
+                assert response.status_code == 404
+            assert main.app.index.version == V2
+    finally:
+        main.close_client = original_close
+
+
+# Built once per process: V2 adds a fatwa to the wp shard, V1 is the live one
+publish(V2, extra=[("w4", "Hukum solat jamak bagi pesakit", [0.6, 0.8, 0.0, 0.0])])
+publish(V1)
+
+if __name__ == "__main__":
+    test_shard_results_merge()
+    test_search_limit_validated()
+    test_suggest()
+    test_failed_shard_is_left_out()
+    test_slow_embedding_falls_back()
+    test_hedged_embedding()
+    test_reload_swaps_and_retires()
+    print("All in-process API tests passed")
@@ -0,0 +1,122 @@
+"""
+Structured fields parsed from an article's title, URL and page.
+
+Titles follow "IRSYAD HUKUM SIRI KE-865: ...", the URL path names the topic
+category (.../irsyad-hukum/<topic>/<id>-<slug>), and Joomla article pages
+carry a publication date. These are computed once at extraction time and
+stored as scalar metadata, so searches can filter on them without parsing
+titles at query time. Dates are kept as yyyymmdd integers, which vector store
+metadata filters can compare with $gte/$lte.
+"""
+
+import re
+from datetime import date, datetime
+from urllib.parse import urlparse
+
+SERIES_RE = re.compile(r'\bSIRI\s+KE\s*-?\s*(\d+)', re.IGNORECASE)
+DAY_MONTH_YEAR_RE = re.compile(r'(\d{1,2})(?:hb)?\s+([A-Za-z]+)\.?\s+(\d{4})')
+NUMERIC_DATE_RE = re.compile(r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})')
+
+# Malay and English month names as they appear on the site
+MONTHS = {
+    'januari': 1, 'january': 1, 'jan': 1,
+    'februari': 2, 'february': 2, 'feb': 2,
+    'mac': 3, 'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4,
+    'mei': 5, 'may': 5,
+    'jun': 6, 'june': 6,
+    'julai': 7, 'july': 7, 'jul': 7,
+    'ogos': 8, 'august': 8, 'aug': 8,
+    'september': 9, 'sep': 9, 'sept': 9,
+    'oktober': 10, 'october': 10, 'okt': 10, 'oct': 10,
+    'november': 11, 'nov': 11,
+    'disember': 12, 'december': 12, 'dis': 12, 'dec': 12,
+}
+
+# Where Joomla templates put the publication date, most specific first
+PUBLISHED_SELECTORS = [
+    ('time[itemprop="datePublished"]', 'datetime'),
+    ('meta[itemprop="datePublished"]', 'content'),
+    ('meta[property="article:published_time"]', 'content'),
+    ('dd.published time', 'datetime'),
+    ('.published', None),
+    ('dd.create', None),
+]
+
+
+def series_number(title):
+    """The "SIRI KE-<n>" number in a title, or None."""
+    match = SERIES_RE.search(title or '')
+    return int(match.group(1)) if match else None
+
+
+def topic_from_url(url):
+    """The topic category of an article: the path segment before its slug (e.g. "umum")."""
+    segments = [segment for segment in urlparse(url or '').path.split('/') if segment]
+    return segments[-2] if len(segments) >= 2 else ''
+
+
+def date_key(value):
+    """A date or datetime as a yyyymmdd integer."""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def parse_date(text):
+    """Parse an ISO, "20 Mac 2025" or "20/03/2025" date into a yyyymmdd integer, or None."""
+    text = (text or '').strip()
+    if not text:
+        return None
+    try:
+        return date_key(datetime.fromisoformat(text.replace('Z', '+00:00')))
+    except ValueError:
+        pass
+    try:
+        return date_key(date.fromisoformat(text[:10]))
+    except ValueError:
+        pass
+
+    match = DAY_MONTH_YEAR_RE.search(text)
+    if match and match.group(2).lower() in MONTHS:
+        day, month, year = int(match.group(1)), MONTHS[match.group(2).lower()], int(match.group(3))
+    else:
+        match = NUMERIC_DATE_RE.search(text)
+        if not match:
+            return None
+        day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    try:
+        return date_key(date(year, month, day))
+    except ValueError:
+        return None
+
+
+def find_published(soup):
+    """The publication date on an article page as a yyyymmdd integer, or None."""
+    for selector, attribute in PUBLISHED_SELECTORS:
+        element = soup.select_one(selector)
+        if element is None:
+            continue
+        published = parse_date(element.get(attribute) if attribute else element.get_text(' ', strip=True))
+        if published:
+            return published
+    return None
+
+
+def structured_fields(title, url, soup=None):
+    """series_number, published and topic for an article; missing values are None or ''."""
+    return {
+        'series_number': series_number(title),
+        'published': find_published(soup) if soup is not None else None,
+        'topic': topic_from_url(url),
+    }
+
+
+def metadata_fields(article):
+    """The structured fields of an article dict as vector store metadata.
+
+    Values stored with the article win; for older scrapes the series number
+    and topic are recovered from the title and URL. Chroma metadata can't hold
+    None, so unknown values are left out.
+    """
+    fields = structured_fields(article.get('title'), article.get('url'))
+    fields.update({name: article[name] for name in fields if article.get(name) is not None})
+    return {name: value for name, value in fields.items() if value not in (None, '')}
@@ -0,0 +1,45 @@
+"""
+Vector store ids for scraped articles.
+
+Articles are stored under a hash of their URL, so re-indexing the same article
+updates it in place. pipeline.py and llm/llm.py both index into the same
+collections, and both use these to name articles and to delete the copies left
+under the old position-numbered ids.
+"""
+
+import hashlib
+import re
+
+# Ids of the old position-numbered articles; URL ids are 16 hex digits
+LEGACY_ID_RE = re.compile(r'^\d{1,15}$')
+
+
+def article_id(url):
+    """Stable vector store id for an article: the first 16 hex digits of its URL's SHA-256."""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+
+
+def drop_legacy_ids(collection, page_size=1000):
+    """Delete fatwas stored under positional ids ("0", "1", ...) once their URL is stored under its article_id.
+
+    llm/llm.py used to number articles in file order; after a re-index with URL
+    ids both copies would be searched. Returns how many were deleted.
+    """
+    legacy = {}
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=['metadatas'])
+        for fatwa_id, metadata in zip(page['ids'], page['metadatas']):
+            if LEGACY_ID_RE.match(fatwa_id) and (metadata or {}).get('url'):
+                legacy[fatwa_id] = article_id(metadata['url'])
+        if len(page['ids']) < page_size:
+            break
+        offset += page_size
+    if not legacy:
+        return 0
+
+    replaced = set(collection.get(ids=sorted(set(legacy.values())), include=[])['ids'])
+    stale = [fatwa_id for fatwa_id, new_id in legacy.items() if new_id in replaced]
+    for start in range(0, len(stale), page_size):
+        collection.delete(ids=stale[start:start + page_size])
+    return len(stale)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the scrapers.
+
+Starts mock_site.py as a subprocess and runs MuftiWPScraper and
+MuftiWPAdvancedScraper against it, each in its own scratch directory, exactly
+as their main() would (scrape everything, then save). Reports articles per
+second, CPU time per article and requests per article, and saves the results
+as JSON so runs can be compared across commits.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import requests
+
+from timing import git_commit, wait_for
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPERS = ('basic', 'advanced')
+
+
+def spawn_mock_site(args):
+    """Start mock_site.py and return the process and its base URL."""
+    site_url = f"http://127.0.0.1:{args.port}"
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, 'mock_site.py'), '--port', str(args.port),
+         '--articles', str(args.articles)] + shlex.split(args.site_args or ''),
+        stdout=subprocess.DEVNULL
+    )
+    if not wait_for(f"{site_url}/health"):
+        process.terminate()
+        raise RuntimeError("Mock site did not start")
+    return process, site_url
+
+
+def site_stats(site_url):
+    return requests.get(f"{site_url}/mock/config", timeout=5).json()
+
+
+def run_basic(base_url, args):
+    from scraper import MuftiWPScraper
+
+    scraper = MuftiWPScraper(base_url=base_url, article_delay=args.delay, page_delay=args.delay)
+    scraper.scrape_all_pages()
+    scraper.save_to_csv()
+    return scraper, None
+
+
+def run_advanced(base_url, args):
+    from advanced_scraper import MuftiWPAdvancedScraper
+
+    scraper = MuftiWPAdvancedScraper(
+        delay_between_requests=(args.delay, args.delay),
+        discovery_workers=args.discovery_workers,
+        base_url=base_url,
+        stream_path='mufti_wp_articles.jsonl' if args.stream else None
+    )
+    scraper.scrape_all_pages(resume=False)
+    scraper.save_to_csv()
+    return scraper, scraper.recorder.summarize()
+
+
+def measure(name, run, site_url, base_url, args):
+    """Run one scraper pass and collect wall time, CPU time and request counts."""
+    before = site_stats(site_url)
+    output = io.StringIO()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+        scraper, crawl = run(base_url, args)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    after = site_stats(site_url)
+
+    articles = scraper.article_count if hasattr(scraper, 'article_count') else len(scraper.data)
+    requests_made = after['requests'] - before['requests']
+    result = {
+        'scraper': name,
+        'articles': articles,
+        'expected_articles': after['articles'],
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'articles_per_second': articles / wall if wall else 0.0,
+        'cpu_ms_per_article': cpu * 1000 / articles if articles else None,
+        'requests': requests_made,
+        'requests_per_article': requests_made / articles if articles else None,
+        'injected_errors': after['errors'] - before['errors'],
+    }
+    if crawl:
+        result['cache_hit_ratio'] = crawl['cache_hit_ratio']
+        result['fetch_p50'] = crawl['fetch_seconds']['total'].get('p50')
+        result['parse_p50'] = crawl['parse_seconds'].get('p50')
+    return result
+
+
+def print_report(results):
+    print(f"\n{'scraper':<10} {'pass':>4} {'articles':>9} {'wall s':>8} {'art/s':>8} {'CPU ms/art':>11} {'req/art':>8} {'errors':>7}")
+    for result in results:
+        cpu = result['cpu_ms_per_article']
+        per_article = result['requests_per_article']
+        print(f"{result['scraper']:<10} {result['pass']:>4} "
+              f"{result['articles']:>4}/{result['expected_articles']:<4} {result['wall_seconds']:>8.2f} "
+              f"{result['articles_per_second']:>8.1f} {(f'{cpu:.1f}' if cpu is not None else '-'):>11} "
+              f"{(f'{per_article:.2f}' if per_article is not None else '-'):>8} {result['injected_errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against a local mock site')
+    parser.add_argument('--scrapers', default='basic,advanced', help='Comma-separated scrapers to run (basic, advanced)')
+    parser.add_argument('--articles', type=int, default=100, help='Articles on the mock site')
+    parser.add_argument('--site-args', help='Extra mock_site.py options, e.g. "--latency-ms 50 --error-rate 0.05"')
+    parser.add_argument('--site-url', help='Use an already running mock site instead of starting one')
+    parser.add_argument('--port', type=int, default=8102, help='Port for the spawned mock site')
+    parser.add_argument('--delay', type=float, default=0, help='Delay between requests given to the scrapers')
+    parser.add_argument('--discovery-workers', type=int, default=4, help='Listing page workers (advanced scraper)')
+    parser.add_argument('--passes', type=int, default=1,
+                        help='Runs per scraper in the same directory; later passes use a warm page cache')
+    parser.add_argument('--stream', action='store_true', help='Run the advanced scraper in stream mode')
+    parser.add_argument('--verbose', action='store_true', help='Show scraper logs and progress bars')
+    parser.add_argument('--output', help='Where to write the JSON results (default: bench_results/)')
+
+    args = parser.parse_args()
+    scrapers = [name.strip() for name in args.scrapers.split(',') if name.strip()]
+    unknown = set(scrapers) - set(SCRAPERS)
+    if unknown:
+        parser.error(f"Unknown scrapers: {', '.join(sorted(unknown))}")
+
+    output_file = os.path.abspath(args.output) if args.output else None
+    process = None
+    site_url = args.site_url
+    if not site_url:
+        process, site_url = spawn_mock_site(args)
+
+    # The scrapers write their cache, checkpoints, logs and output to the working directory
+    if not args.verbose:
+        os.environ['TQDM_DISABLE'] = '1'
+    sys.path.insert(0, REPO_DIR)
+    original_dir = os.getcwd()
+    work_root = tempfile.mkdtemp(prefix='scraper-bench-')
+    os.chdir(work_root)
+
+    results = []
+    try:
+        if not args.verbose:
+            import advanced_scraper  # noqa: F401 - configures logging on import
+            logging.getLogger().setLevel(logging.WARNING)
+
+        base_url = f"{site_url.rstrip('/')}{site_stats(site_url).get('listing_path', '/ms/artikel/irsyad-hukum/umum')}"
+        runners = {'basic': run_basic, 'advanced': run_advanced}
+        for name in scrapers:
+            work_dir = os.path.join(work_root, name)
+            os.makedirs(work_dir)
+            os.chdir(work_dir)
+            for pass_num in range(1, args.passes + 1):
+                print(f"Running {name} scraper (pass {pass_num}/{args.passes})...")
+                result = measure(name, runners[name], site_url, base_url, args)
+                result['pass'] = pass_num
+                results.append(result)
+    finally:
+        os.chdir(original_dir)
+        if process:
+            process.terminate()
+            process.wait()
+
+    print_report(results)
+    print(f"\nScraper working directories kept in {work_root}")
+
+    output = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'config': {
+            'articles': args.articles,
+            'site_args': args.site_args,
+            'delay': args.delay,
+            'discovery_workers': args.discovery_workers,
+            'passes': args.passes,
+            'stream': args.stream,
+        },
+        'results': results,
+    }
+    if not output_file:
+        os.makedirs('bench_results', exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output_file = os.path.join('bench_results', f"scraper-{output['commit'] or 'nogit'}-{stamp}.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"Results saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Structured crawl instrumentation for the scrapers.
+
+Every fetch, parse and save is written as one JSON line to a metrics file, so
+a run can be analysed afterwards (e.g. with pandas.read_json(lines=True)).
+At the end of a run summarize() condenses the events into a report with
+throughput, latency percentiles per phase and the slowest URLs.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from timing import percentile
+
+FETCH_PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download', 'total')
+
+
+def distribution(values):
+    """Count, mean and p50/p90/p99/max of a list of durations in seconds."""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1],
+    }
+
+
+class CrawlRecorder:
+    """Thread-safe JSONL event log for a crawl run.
+
+    Events are 'fetch' (network or cache), 'parse' and 'save'. With path=None
+    nothing is written to disk but the summary is still available.
+    """
+
+    def __init__(self, path='crawl_metrics.jsonl', slowest=10):
+        self.path = path
+        self.slowest = slowest
+        self.started_at = time.perf_counter()
+        self.lock = threading.Lock()
+        # Appended to, so resumed runs keep their history; each run starts with a 'start' event
+        self.file = open(path, 'a', encoding='utf-8') if path else None
+
+        # Running aggregates so the report doesn't have to re-read the log
+        self.fetch_phases = {phase: [] for phase in FETCH_PHASES}
+        self.parse_times = []
+        self.save_times = {}
+        self.cache = Counter()
+        self.statuses = Counter()
+        self.extraction_paths = Counter()
+        self.bytes = 0
+        self.wire_bytes = 0
+        self.errors = 0
+        self.articles = 0
+        self.url_times = {}
+        self.record('start')
+
+    def record(self, event, url=None, **fields):
+        """Append one event to the log and fold it into the aggregates."""
+        entry = {'ts': datetime.now().isoformat(), 'event': event}
+        if url is not None:
+            entry['url'] = url
+        entry.update({key: round(value, 6) if isinstance(value, float) else value for key, value in fields.items()})
+
+        with self.lock:
+            if self.file:
+                self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._aggregate(event, url, fields)
+
+    def _aggregate(self, event, url, fields):
+        if event == 'fetch':
+            self.cache[fields.get('cache', 'miss')] += 1
+            if fields.get('error'):
+                self.errors += 1
+            if fields.get('status'):
+                self.statuses[fields['status']] += 1
+            if fields.get('cache') == 'miss':
+                for phase in FETCH_PHASES:
+                    if phase in fields:
+                        self.fetch_phases[phase].append(fields[phase])
+            self.bytes += fields.get('bytes', 0)
+            self.wire_bytes += fields.get('wire_bytes', 0)
+            if url is not None and 'total' in fields:
+                self.url_times[url] = self.url_times.get(url, 0.0) + fields['total']
+        elif event == 'parse':
+            self.articles += 1
+            self.parse_times.append(fields.get('parse_time', 0.0))
+            self.extraction_paths[f"{fields.get('question_source')}/{fields.get('answer_source')}"] += 1
+            if url is not None:
+                self.url_times[url] = self.url_times.get(url, 0.0) + fields.get('parse_time', 0.0)
+        elif event == 'save':
+            self.save_times.setdefault(fields.get('format', 'unknown'), []).append(fields.get('seconds', 0.0))
+
+    def summarize(self):
+        """Build the end-of-run report."""
+        with self.lock:
+            elapsed = time.perf_counter() - self.started_at
+            fetches = sum(self.cache.values())
+            slowest = sorted(self.url_times.items(), key=lambda item: item[1], reverse=True)[:self.slowest]
+            return {
+                'elapsed_seconds': elapsed,
+                'throughput': {
+                    'articles_per_second': self.articles / elapsed if elapsed else 0.0,
+                    'fetches_per_second': fetches / elapsed if elapsed else 0.0,
+                    'bytes_per_second': self.bytes / elapsed if elapsed else 0.0,
+                },
+                'articles': self.articles,
+                'fetches': fetches,
+                'errors': self.errors,
+                'cache': dict(self.cache),
+                'cache_hit_ratio': self.cache['hit'] / fetches if fetches else 0.0,
+                'status_codes': {str(status): count for status, count in sorted(self.statuses.items())},
+                'bytes': self.bytes,
+                'wire_bytes': self.wire_bytes,
+                'fetch_seconds': {phase: distribution(values) for phase, values in self.fetch_phases.items()},
+                'parse_seconds': distribution(self.parse_times),
+                'save_seconds': {name: distribution(values) for name, values in self.save_times.items()},
+                'extraction_paths': dict(self.extraction_paths.most_common()),
+                'slowest_urls': [{'url': url, 'seconds': seconds} for url, seconds in slowest],
+            }
+
+    def write_report(self, path='crawl_report.json'):
+        """Write the summary report as JSON and return it."""
+        report = self.summarize()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+
+def format_report(report):
+    """Render the headline numbers of a report as a few log-friendly lines."""
+    fetch = report['fetch_seconds']['total']
+    lines = [
+        f"Crawl took {report['elapsed_seconds']:.1f}s: {report['articles']} articles "
+        f"({report['throughput']['articles_per_second']:.2f}/s), {report['fetches']} fetches, "
+        f"{report['errors']} errors, cache hit ratio {report['cache_hit_ratio']:.0%}",
+    ]
+    if fetch['count']:
+        phases = ', '.join(
+            f"{phase} {report['fetch_seconds'][phase]['p50'] * 1000:.0f}ms"
+            for phase in FETCH_PHASES[:-1] if report['fetch_seconds'][phase]['count']
+        )
+        lines.append(f"Network fetch p50 {fetch['p50']:.3f}s, p90 {fetch['p90']:.3f}s, p99 {fetch['p99']:.3f}s (median {phases})")
+    if report['parse_seconds']['count']:
+        parse = report['parse_seconds']
+        lines.append(f"Parse p50 {parse['p50'] * 1000:.1f}ms, p90 {parse['p90'] * 1000:.1f}ms")
+    for entry in report['slowest_urls'][:3]:
+        lines.append(f"Slow: {entry['seconds']:.2f}s {entry['url']}")
+    return lines
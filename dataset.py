@@ -0,0 +1,128 @@
+"""
+Columnar Parquet output for the scraped articles.
+
+The Parquet file has a fixed schema: the scraped fields, the structured
+series number, publication date and topic, plus a content hash and the
+Ringkasan/Huraian answer sections, so downstream stages don't have to
+re-split the answer text. It is written in row groups as records stream in,
+and read back memory-mapped with only the columns a stage needs.
+Requires pyarrow (pip install pyarrow).
+"""
+
+import hashlib
+import re
+
+COLUMNS = ['title', 'question', 'answer', 'url', 'scraped_at', 'series_number', 'published', 'topic',
+           'content_hash', 'ringkasan', 'huraian']
+# Everything else is a string column
+INT_COLUMNS = {'series_number', 'published'}
+DEFAULT_ROW_GROUP_SIZE = 1000
+
+RINGKASAN_RE = re.compile(r'Ringkasan\s+Jawapan\s*:?\s*(.*?)(?=Huraian\s+Jawapan\s*:?|$)', re.DOTALL | re.IGNORECASE)
+HURAIAN_RE = re.compile(r'Huraian\s+Jawapan\s*:?\s*(.*?)(?=$)', re.DOTALL | re.IGNORECASE)
+
+
+def require_pyarrow():
+    """Import pyarrow and pyarrow.parquet, with a helpful error if they are missing."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet support needs pyarrow: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def content_hash(title, question, answer):
+    """Stable SHA-256 of an article's text, for change detection and deduplication."""
+    digest = hashlib.sha256()
+    for part in (title, question, answer):
+        digest.update((part or '').encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def split_sections(answer):
+    """Return the (ringkasan, huraian) sections of an answer, empty when absent."""
+    answer = answer or ''
+    ringkasan = RINGKASAN_RE.search(answer)
+    huraian = HURAIAN_RE.search(answer)
+    return (ringkasan.group(1).strip() if ringkasan else '',
+            huraian.group(1).strip() if huraian else '')
+
+
+def to_row(record):
+    """Build a Parquet row from an ArticleRecord or an article dict."""
+    values = record if isinstance(record, dict) else record.to_dict()
+    title, question, answer = values.get('title', ''), values.get('question', ''), values.get('answer', '')
+    ringkasan, huraian = split_sections(answer)
+    return {
+        'title': title,
+        'question': question,
+        'answer': answer,
+        'url': values.get('url', ''),
+        'scraped_at': values.get('scraped_at', ''),
+        'series_number': values.get('series_number'),
+        'published': values.get('published'),
+        'topic': values.get('topic', ''),
+        'content_hash': content_hash(title, question, answer),
+        'ringkasan': ringkasan,
+        'huraian': huraian,
+    }
+
+
+class ParquetWriter:
+    """Writes articles to a Parquet file, one row group every row_group_size records."""
+
+    def __init__(self, path, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression='zstd'):
+        self.pa, pq = require_pyarrow()
+        self.schema = self.pa.schema([
+            (name, self.pa.int32() if name in INT_COLUMNS else self.pa.string()) for name in COLUMNS
+        ])
+        self.path = path
+        self.row_group_size = row_group_size
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        self.buffer = {name: [] for name in COLUMNS}
+        self.buffered = 0
+        self.count = 0
+
+    def write(self, record):
+        for name, value in to_row(record).items():
+            self.buffer[name].append(value)
+        self.buffered += 1
+        self.count += 1
+        if self.buffered >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records out as one row group."""
+        if not self.buffered:
+            return
+        table = self.pa.Table.from_pydict(self.buffer, schema=self.schema)
+        self.writer.write_table(table, row_group_size=self.buffered)
+        self.buffer = {name: [] for name in COLUMNS}
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_parquet(records, filename, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """Stream records into a Parquet file and return how many were written."""
+    with ParquetWriter(filename, row_group_size) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def read_table(path, columns=None):
+    """Read a Parquet file memory-mapped, loading only the requested columns."""
+    _, pq = require_pyarrow()
+    return pq.read_table(path, columns=columns, memory_map=True)
+
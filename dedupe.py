@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for the scraped fatwas.
+
+Articles are reduced to word shingles, each shingle set is summarised by a
+MinHash signature, and signatures are bucketed with LSH banding so that only
+articles sharing a band are ever compared; the cost grows with the number of
+articles rather than the number of pairs. Candidate pairs whose estimated
+Jaccard similarity passes the threshold are merged into clusters with
+union-find, and each cluster keeps one canonical article.
+
+The result is a duplicates file mapping every duplicate URL to its canonical
+URL, which llm/llm.py uses to skip or link duplicates instead of embedding them.
+"""
+
+import argparse
+import json
+import os
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Boilerplate headings every article shares; they would inflate the similarity of unrelated answers
+HEADING_RE = re.compile(r'\b(soalan|ringkasan jawapan|huraian jawapan|jawapan|mukadimah)\s*:?', re.IGNORECASE)
+
+
+def load_records(path):
+    """Load articles as dicts from a JSON, JSONL or Parquet file."""
+    if path.endswith('.parquet'):
+        from dataset import read_table
+        return read_table(path, ['title', 'question', 'answer', 'url']).to_pylist()
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def shingles(text, size=5):
+    """Hash the overlapping word n-grams of a text to 32-bit integers."""
+    words = WORD_RE.findall(HEADING_RE.sub(' ', text.lower()))
+    if len(words) < size:
+        words = words + [''] * (size - len(words))
+    return np.array(sorted({
+        zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    }), dtype=np.uint64)
+
+
+class MinHasher:
+    """MinHash signatures from num_perm universal hash functions (a*x + b) mod (2^61 - 1)."""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+        self.b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % MERSENNE_PRIME
+
+    def signature(self, hashed_shingles):
+        """The num_perm minimum hash values over a shingle set, one column per hash function."""
+        # uint64 arithmetic wraps; as in common MinHash implementations the result is still
+        # a well-mixed hash, and only its low 32 bits are kept
+        with np.errstate(over='ignore'):
+            values = (np.outer(hashed_shingles, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return values.min(axis=0)
+
+
+def lsh_parameters(num_perm, threshold, false_negative_weight=0.9):
+    """Pick (bands, rows) with bands * rows == num_perm for a similarity threshold.
+
+    Minimises the weighted area under the LSH S-curve below the threshold (false
+    positives) and above it (false negatives). Candidates are verified on the full
+    signature afterwards, so missing a duplicate costs far more than an extra check.
+    """
+    below = np.linspace(0.0, threshold, 200)
+    above = np.linspace(threshold, 1.0, 200)
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        false_positive = np.trapz(1 - (1 - below ** rows) ** bands, below)
+        false_negative = np.trapz((1 - above ** rows) ** bands, above)
+        error = (1 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class LSHIndex:
+    """Incremental LSH buckets, for checking articles one at a time as they arrive."""
+
+    def __init__(self, bands, rows):
+        self.bands = bands
+        self.rows = rows
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.signatures = {}
+
+    def band_keys(self, signature):
+        return [bytes(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, key, signature):
+        self.signatures[key] = signature
+        for bucket, band_key in zip(self.buckets, self.band_keys(signature)):
+            bucket[band_key].append(key)
+
+    def most_similar(self, signature, threshold):
+        """The indexed key most similar to a signature, with its similarity, or (None, 0.0) below threshold."""
+        candidates = set()
+        for bucket, band_key in zip(self.buckets, self.band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+        best, best_similarity = None, 0.0
+        for key in sorted(candidates):
+            similarity = float(np.mean(self.signatures[key] == signature))
+            if similarity >= threshold and similarity > best_similarity:
+                best, best_similarity = key, similarity
+        return best, best_similarity
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+
+def record_text(record):
+    return f"{record.get('question') or ''} {record.get('answer') or ''}"
+
+
+def canonical_index(records, members):
+    """Prefer the article with structured answer sections, then the most text, then the lowest URL."""
+    def rank(index):
+        record = records[index]
+        answer = record.get('answer') or ''
+        structured = 'ringkasan jawapan' in answer.lower() or 'huraian jawapan' in answer.lower()
+        return (not structured, -len(record_text(record)), record.get('url') or '')
+    return min(members, key=rank)
+
+
+def find_duplicates(records, threshold=0.8, num_perm=128, shingle_size=5, seed=1):
+    """Cluster near-duplicate records.
+
+    Returns (clusters, number of candidate pairs, (bands, rows)). Each cluster is
+    a dict with the canonical index, the member indices and the lowest estimated
+    similarity of a member to the canonical record.
+    """
+    hasher = MinHasher(num_perm, seed)
+    signatures = np.vstack([hasher.signature(shingles(record_text(record), shingle_size)) for record in records]) \
+        if records else np.zeros((0, num_perm), dtype=np.uint64)
+    bands, rows = lsh_parameters(num_perm, threshold)
+
+    # Bucket every band of every signature; articles sharing any bucket become candidates
+    candidates = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        band_values = signatures[:, band * rows:(band + 1) * rows]
+        for index, key in enumerate(map(bytes, band_values)):
+            buckets[key].append(index)
+        for members in buckets.values():
+            for position, first in enumerate(members):
+                for second in members[position + 1:]:
+                    candidates.add((first, second))
+
+    # Verify candidates on the full signature to weed out LSH false positives
+    union_find = UnionFind(len(records))
+    for first, second in candidates:
+        if np.mean(signatures[first] == signatures[second]) >= threshold:
+            union_find.union(first, second)
+
+    groups = defaultdict(list)
+    for index in range(len(records)):
+        groups[union_find.find(index)].append(index)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        canonical = canonical_index(records, members)
+        similarity = min(float(np.mean(signatures[canonical] == signatures[member]))
+                         for member in members if member != canonical)
+        clusters.append({'canonical': canonical, 'members': sorted(members), 'min_similarity': similarity})
+    clusters.sort(key=lambda cluster: len(cluster['members']), reverse=True)
+    return clusters, len(candidates), (bands, rows)
+
+
+def build_report(records, clusters, candidate_pairs, lsh, threshold, batch_size=10):
+    """Summarise the clusters, including how many embedding inputs and batched calls are saved."""
+    duplicates = {}
+    for cluster in clusters:
+        canonical_url = records[cluster['canonical']]['url']
+        for member in cluster['members']:
+            if member != cluster['canonical']:
+                duplicates[records[member]['url']] = canonical_url
+
+    unique = len(records) - len(duplicates)
+    calls_before = -(-len(records) // batch_size)
+    calls_after = -(-unique // batch_size)
+    return {
+        'articles': len(records),
+        'unique_articles': unique,
+        'duplicate_articles': len(duplicates),
+        'clusters': len(clusters),
+        'threshold': threshold,
+        'lsh_bands': lsh[0],
+        'lsh_rows': lsh[1],
+        'candidate_pairs': candidate_pairs,
+        'all_pairs': len(records) * (len(records) - 1) // 2,
+        'embedding_inputs_saved': len(duplicates),
+        'embedding_calls_saved': calls_before - calls_after,
+        'embedding_batch_size': batch_size,
+        'cluster_details': [
+            {
+                'canonical': records[cluster['canonical']]['url'],
+                'title': records[cluster['canonical']].get('title'),
+                'duplicates': [records[m]['url'] for m in cluster['members'] if m != cluster['canonical']],
+                'min_similarity': round(cluster['min_similarity'], 3),
+            }
+            for cluster in clusters
+        ],
+    }, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find near-duplicate fatwas with MinHash/LSH')
+    parser.add_argument('input', nargs='?', default='mufti_wp_articles.json', help='Scraped articles (.json, .jsonl or .parquet)')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Estimated Jaccard similarity at which articles are duplicates')
+    parser.add_argument('--num-perm', type=int, default=128, help='MinHash signature length')
+    parser.add_argument('--shingle-size', type=int, default=5, help='Words per shingle')
+    parser.add_argument('--batch-size', type=int, default=10, help='Embedding batch size used by llm/llm.py, for the savings estimate')
+    parser.add_argument('--output', default='duplicates.json', help='Where to write the duplicate URL -> canonical URL mapping')
+    parser.add_argument('--report', default='dedupe_report.json', help='Where to write the cluster report')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"{args.input} not found. Please run the scraper first.")
+        return
+
+    records = [record for record in load_records(args.input) if record.get('url')]
+    clusters, candidate_pairs, lsh = find_duplicates(records, args.threshold, args.num_perm, args.shingle_size)
+    report, duplicates = build_report(records, clusters, candidate_pairs, lsh, args.threshold, args.batch_size)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(duplicates, f, ensure_ascii=False, indent=2)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"{report['articles']} articles, {report['duplicate_articles']} near-duplicates in {report['clusters']} clusters")
+    print(f"Compared {report['candidate_pairs']} candidate pairs instead of {report['all_pairs']} "
+          f"(LSH {report['lsh_bands']} bands x {report['lsh_rows']} rows)")
+    print(f"Embedding calls saved: {report['embedding_calls_saved']} "
+          f"({report['embedding_inputs_saved']} inputs at batch size {report['embedding_batch_size']})")
+    print(f"Duplicates saved to {args.output}, report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
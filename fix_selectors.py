@@ -10,6 +10,7 @@ import argparse
 import json
 import os
 import re
+from http_client import get_default_client
 
 def get_page_content(url, headers=None):
     """Get the HTML content of a page."""
@@ -19,7 +20,7 @@ def get_page_content(url, headers=None):
         }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = get_default_client().get(url, headers=headers)
         response.raise_for_status()
         return response.text
     except requests.RequestException as e:
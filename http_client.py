@@ -0,0 +1,258 @@
+"""
+Shared HTTP client for the scrapers.
+
+Keeps connections alive in a tuned pool so articles don't each pay for a new
+TCP/TLS handshake, negotiates gzip/brotli compression, applies connect/read
+timeouts to every request so a stalled socket can't hang the crawl, and can
+optionally speak HTTP/2 through httpx. Both backends raise requests
+exceptions, so callers only need to handle requests.RequestException.
+
+get_timed() additionally breaks a request down into DNS, connect, TLS,
+time-to-first-byte and download phases for the crawl instrumentation.
+"""
+
+import io
+import socket
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    # "gzip,deflate" plus "br" when the brotli package is installed
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+DEFAULT_POOL_SIZE = 10
+
+
+class TimedConnectionMixin:
+    """Records DNS, TCP connect and TLS handshake times when a pooled connection is opened.
+
+    Reused keep-alive connections have no timings, which is exactly what the
+    crawl report should show for them.
+    """
+
+    timings = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror:
+            # Let urllib3 raise its usual NewConnectionError
+            address = host
+        resolved = time.perf_counter()
+
+        # Connect to the address we just resolved; TLS SNI and certificate checks still use self.host
+        self._dns_host = address
+        try:
+            conn = super()._new_conn()
+        finally:
+            self._dns_host = host
+        self.timings = {'dns': resolved - start, 'connect': time.perf_counter() - resolved}
+        return conn
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        if self.timings is not None and isinstance(self, HTTPSConnection):
+            self.timings['tls'] = max(0.0, time.perf_counter() - start - self.timings['dns'] - self.timings['connect'])
+
+    def pop_timings(self):
+        """Return and clear the timings of the connection setup, if this request paid for one."""
+        timings, self.timings = self.timings, None
+        return timings or {}
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools open TimedHTTP(S)Connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class HttpxResponse:
+    """Wraps an httpx response in the parts of the requests.Response API the scrapers use."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.content = response.content
+        self.text = response.text
+        self.elapsed = response.elapsed
+        self.http_version = response.http_version
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class HttpClient:
+    """Pooled, compressed HTTP client with per-request timeouts."""
+
+    def __init__(self, headers=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, http2=False):
+        self.headers = dict(DEFAULT_HEADERS)
+        self.headers.update(headers or {})
+        self.timeout = timeout
+        self.http2 = http2
+
+        if http2:
+            try:
+                import httpx
+                import h2  # noqa: F401 - httpx needs it for HTTP/2
+            except ImportError:
+                raise RuntimeError("HTTP/2 needs httpx with HTTP/2 support: pip install 'httpx[http2]'")
+            self._httpx = httpx
+            self.client = httpx.Client(
+                http2=True,
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=self._httpx_timeout(timeout),
+                follow_redirects=True
+            )
+        else:
+            self.client = requests.Session()
+            self.client.headers.update(self.headers)
+            adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.client.mount('http://', adapter)
+            self.client.mount('https://', adapter)
+
+    def _httpx_timeout(self, timeout):
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return self._httpx.Timeout(read, connect=connect)
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        """GET a URL; returns a requests.Response (or a compatible wrapper for HTTP/2)."""
+        timeout = timeout or self.timeout
+        if not self.http2:
+            return self.client.get(url, headers=headers, timeout=timeout, stream=stream)
+
+        try:
+            return HttpxResponse(self.client.get(url, headers=headers, timeout=self._httpx_timeout(timeout)))
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except self._httpx.TransportError as e:
+            raise requests.ConnectionError(str(e))
+        except self._httpx.HTTPError as e:
+            raise requests.RequestException(str(e))
+
+    def get_timed(self, url, headers=None, timeout=None):
+        """GET a URL and return (response, timings).
+
+        timings has the connection setup phases ('dns', 'connect', 'tls'; zero
+        for a reused connection), 'ttfb' from sending the request to receiving
+        the response headers, 'download' for reading the body, 'total', the
+        decoded body size in 'bytes' and the on-the-wire size in 'wire_bytes'.
+        With HTTP/2, httpx reports DNS and TCP connect as a single 'connect' phase.
+        """
+        timeout = timeout or self.timeout
+        if self.http2:
+            return self._get_timed_httpx(url, headers, timeout)
+
+        start = time.perf_counter()
+        response = self.client.get(url, headers=headers, timeout=timeout, stream=True)
+        headers_at = time.perf_counter()
+        connection = getattr(response.raw, '_connection', None)
+        setup = connection.pop_timings() if hasattr(connection, 'pop_timings') else {}
+        content = response.content  # reads the body and returns the connection to the pool
+        done = time.perf_counter()
+
+        timings = self._phase_timings(setup, start, headers_at, done)
+        timings['bytes'] = len(content)
+        timings['wire_bytes'] = response.raw.tell()
+        return response, timings
+
+    def _get_timed_httpx(self, url, headers, timeout):
+        setup = {}
+        started = {}
+
+        def trace(event, info):
+            # e.g. "connection.connect_tcp.started" / "connection.start_tls.complete"
+            phase, _, state = event.rpartition('.')
+            if state == 'started':
+                started[phase] = time.perf_counter()
+            elif state == 'complete' and phase in started:
+                name = {'connection.connect_tcp': 'connect', 'connection.start_tls': 'tls'}.get(phase)
+                if name:
+                    setup[name] = time.perf_counter() - started[phase]
+
+        start = time.perf_counter()
+        try:
+            with self.client.stream('GET', url, headers=headers, timeout=self._httpx_timeout(timeout),
+                                    extensions={'trace': trace}) as response:
+                headers_at = time.perf_counter()
+                response.read()
+                done = time.perf_counter()
+                wire_bytes = response.num_bytes_downloaded
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except self._httpx.TransportError as e:
+            raise requests.ConnectionError(str(e))
+        except self._httpx.HTTPError as e:
+            raise requests.RequestException(str(e))
+
+        wrapped = HttpxResponse(response)
+        timings = self._phase_timings(setup, start, headers_at, done, phases=('connect', 'tls'))
+        timings['bytes'] = len(wrapped.content)
+        timings['wire_bytes'] = wire_bytes
+        return wrapped, timings
+
+    @staticmethod
+    def _phase_timings(setup, start, headers_at, done, phases=('dns', 'connect', 'tls')):
+        timings = {phase: setup.get(phase, 0.0) for phase in phases}
+        timings['ttfb'] = max(0.0, headers_at - start - sum(timings.values()))
+        timings['download'] = done - headers_at
+        timings['total'] = done - start
+        return timings
+
+    def open_stream(self, url):
+        """Return a binary file-like object for incremental parsing of a large response."""
+        response = self.get(url, stream=True)
+        response.raise_for_status()
+        if self.http2:
+            return io.BytesIO(response.content)
+        response.raw.decode_content = True
+        return response.raw
+
+    def close(self):
+        self.client.close()
+
+
+_default_client = None
+
+
+def get_default_client():
+    """Process-wide client for scripts that don't manage their own."""
+    global _default_client
+    if _default_client is None:
+        _default_client = HttpClient()
+    return _default_client
@@ -1,26 +1,96 @@
 import json
+import os
+import sys
 import chromadb
 from openai import OpenAI
 
+# Article parsing is shared with the scrapers and pipeline.py in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from article_fields import metadata_fields  # noqa: E402
+from dataset import split_sections  # noqa: E402
+from article_ids import article_id, drop_legacy_ids  # noqa: E402
+
 # Initialize OpenAI client with your API key
-client = OpenAI(api_key="")
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY", ""),
+    base_url=os.getenv("OPENAI_BASE_URL")  # point at stub_openai_server.py for offline runs
+)
+
+# Columns read from a Parquet dataset; the answer sections are already split out there
+PARQUET_COLUMNS = ["title", "url", "scraped_at", "question", "answer", "ringkasan",
+                   "series_number", "published", "topic"]
+
+
+def load_articles(path):
+    """Load the scraped articles from a JSON, JSONL or Parquet file."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        # Files written before the structured fields existed lack some columns
+        names = [name for name in PARQUET_COLUMNS if name in pq.read_schema(path).names]
+        table = pq.read_table(path, columns=names, memory_map=True)
+        columns = {name: table.column(name).to_pylist() for name in names}
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
 
-# Load your data
-with open("llm/mufti_wp_articles.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+# Load your data (ARTICLES_FILE may point at the scraper's .json, .jsonl or .parquet output)
+data = load_articles(os.getenv("ARTICLES_FILE", "llm/mufti_wp_articles.json"))
+
+# Near-duplicates found by dedupe.py: "skip" leaves them out, "link" also lists them on
+# their canonical article's metadata; either way they are never embedded
+DEDUPE = os.getenv("DEDUPE", "off")
+DUPLICATES_FILE = os.getenv("DUPLICATES_FILE", "duplicates.json")
+batch_size = 10  # Adjust based on your data; 10 is conservative
+
+linked_duplicates = {}
+if DEDUPE in ("skip", "link"):
+    with open(DUPLICATES_FILE, "r", encoding="utf-8") as f:
+        duplicates = json.load(f)
+    for duplicate_url, canonical_url in duplicates.items():
+        linked_duplicates.setdefault(canonical_url, []).append(duplicate_url)
+    total = len(data)
+    data = [entry for entry in data if entry["url"] not in duplicates]
+    calls_saved = -(-total // batch_size) - -(-len(data) // batch_size)
+    print(f"Skipping {total - len(data)} near-duplicates ({DEDUPE} mode): "
+          f"{total - len(data)} fewer texts to embed, {calls_saved} fewer embedding calls")
 
 # Persistent Chroma client
-chroma_client = chromadb.PersistentClient(path="./chroma_db")
+chroma_client = chromadb.PersistentClient(path=os.getenv("DB_PATH", "./chroma_db"))
 # Use get_or_create_collection instead of create_collection to avoid errors if collection already exists
-collection = chroma_client.get_or_create_collection("mufti_fatwas")
+collection = chroma_client.get_or_create_collection(os.getenv("COLLECTION_NAME", "mufti_fatwas"))
+# A source name from sources.json tags the collection (a search shard) and every fatwa, as pipeline.py --sources does
+SOURCE = os.getenv("SOURCE")
+if SOURCE and (collection.metadata or {}).get("source") != SOURCE:
+    collection.modify(metadata={**(collection.metadata or {}), "source": SOURCE})
 
 # Prepare data
 texts = [f"{entry['question']} {entry['answer']}" for entry in data]
-metadatas = [{"title": entry["title"], "url": entry["url"], "scraped_at": entry["scraped_at"]} for entry in data]
-ids = [str(i) for i in range(len(data))]
+# Question and summary are stored as metadata so /search can return them without re-fetching
+metadatas = [
+    {
+        "title": entry["title"],
+        "url": entry["url"],
+        "scraped_at": entry["scraped_at"],
+        "question": entry["question"],
+        "ringkasan": entry["ringkasan"] if "ringkasan" in entry else split_sections(entry["answer"])[0],
+        **metadata_fields(entry),
+        **({"source": SOURCE} if SOURCE else {})
+    }
+    for entry in data
+]
+if DEDUPE == "link":
+    for entry, metadata in zip(data, metadatas):
+        if entry["url"] in linked_duplicates:
+            # Chroma metadata values must be scalars
+            metadata["duplicate_urls"] = "\n".join(linked_duplicates[entry["url"]])
+# Ids derived from the URL (article_ids.py, shared with pipeline.py), so re-running replaces articles
+# instead of duplicating them
+ids = [article_id(entry["url"]) for entry in data]
 
 # Batch processing
-batch_size = 10  # Adjust based on your data; 10 is conservative
 embeddings = []
 successful_indices = []  # Track which texts were successfully embedded
 
@@ -47,11 +117,16 @@ filtered_ids = [ids[i] for i in successful_indices]
 print(f"Successfully embedded {len(embeddings)} out of {len(texts)} texts")
 
 # Add to Chroma
-collection.add(
+collection.upsert(
     embeddings=embeddings,
     documents=filtered_texts,
     metadatas=filtered_metadatas,
     ids=filtered_ids
 )
 
-print("Data successfully added to vector DB!")
\ No newline at end of file
+print("Data successfully added to vector DB!")
+
+# Collections indexed before ids came from URLs still hold the old "0", "1", ... copies
+dropped = drop_legacy_ids(collection)
+if dropped:
+    print(f"Deleted {dropped} old copies stored under positional ids")
\ No newline at end of file
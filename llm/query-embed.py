@@ -1,8 +1,12 @@
+import os
 import chromadb
 from openai import OpenAI
 
 # Initialize OpenAI client for embeddings
-openai_client = OpenAI(api_key="")
+openai_client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY", ""),
+    base_url=os.getenv("OPENAI_BASE_URL")  # point at stub_openai_server.py for offline runs
+)
 
 # Load existing Chroma database
 chroma_client = chromadb.PersistentClient(
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Fit a PCA projection of the stored embeddings for reduced-dimension search.
+
+The 1536-dim ada-002 embeddings are centered and projected onto their top
+principal components (eigendecomposition of the covariance matrix), and the
+projected vectors are normalized so a dot product is a cosine similarity.
+With SEARCH_MODE=reduced the API scores every fatwa in this reduced space,
+keeps a short list, and re-ranks the short list with the full-precision
+vectors, which are memory-mapped so only the short-listed rows are read.
+
+Before writing anything the projection is evaluated on a held-out query set:
+either real queries from --queries (embedded with the OpenAI API), or a
+random --holdout of the stored embeddings that the PCA is not fitted on.
+Recall@k against exact full-dimension search, per-query latency and the
+memory of the search vectors are reported for each of --eval-dims, next to
+exact full-dimension search and the Chroma HNSW query the API uses today.
+
+Re-run it after ingesting new articles (llm/llm.py or pipeline.py). Given
+several comma-separated shards in --collection, each gets its own projection
+under ARTIFACTS_DIR/<collection>/, where the API looks for it first.
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import chromadb
+import numpy as np
+
+from related import load_vectors
+
+REDUCED_FILE = "reduced.npz"
+FULL_FILE = "full_vectors.npy"
+REPORT_FILE = "reduce_report.json"
+
+
+def unit_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+def fit_pca(embeddings, dims):
+    """(mean, components, explained): the top dims principal axes as a d x dims matrix, and the variance they keep."""
+    mean = embeddings.mean(axis=0)
+    centered = (embeddings - mean).astype(np.float64)
+    covariance = centered.T @ centered / max(len(embeddings) - 1, 1)
+    values, vectors = np.linalg.eigh(covariance)
+    # eigh sorts eigenvalues in ascending order
+    top = np.argsort(values)[::-1][:dims]
+    explained = float(values[top].sum() / values.sum()) if values.sum() > 0 else 0.0
+    return mean.astype(np.float32), vectors[:, top].astype(np.float32), explained
+
+
+def project(vectors, mean, components):
+    """Unit-length reduced vectors."""
+    return unit_rows((vectors - mean) @ components)
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def reduced_search(query, reduced, full, mean, components, k, shortlist=None):
+    """Top-k rows for a unit query: by reduced score, re-ranked on full vectors when shortlist is given."""
+    scores = reduced @ project(query[None], mean, components)[0]
+    if shortlist is None:
+        return top_k(scores, k)
+    candidates = np.sort(top_k(scores, max(shortlist, k)))
+    return candidates[top_k(full[candidates] @ query, k)]
+
+
+def percentiles_ms(seconds):
+    values = np.array(seconds) * 1000
+    return {"p50_ms": round(float(np.percentile(values, 50)), 4), "p99_ms": round(float(np.percentile(values, 99)), 4)}
+
+
+def recall(found, truth):
+    return float(np.mean([len(set(f.tolist()) & set(t.tolist())) / len(t) for f, t in zip(found, truth)]))
+
+
+def timed(search, queries):
+    """(results, per-query seconds) of running search on each query."""
+    results, seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        seconds.append(time.perf_counter() - start)
+    return results, seconds
+
+
+def evaluate(corpus, queries, dims_list, k=10, shortlist=100):
+    """Recall@k, latency and memory of reduced search against exact full-dimension search over corpus."""
+    truth, seconds = timed(lambda query: top_k(corpus @ query, k), queries)
+    report = {
+        "corpus": len(corpus),
+        "queries": len(queries),
+        "k": k,
+        "shortlist": shortlist,
+        "full": {"dims": corpus.shape[1], "recall": 1.0, **percentiles_ms(seconds),
+                 "vector_bytes": int(corpus.nbytes)},
+        "reduced": [],
+    }
+    for dims in dims_list:
+        mean, components, explained = fit_pca(corpus, dims)
+        reduced = project(corpus, mean, components)
+        entry = {"dims": dims, "explained_variance": round(explained, 4),
+                 "vector_bytes": int(reduced.nbytes + components.nbytes)}
+        found, seconds = timed(lambda query: reduced_search(query, reduced, corpus, mean, components, k), queries)
+        entry["no_rerank"] = {"recall": round(recall(found, truth), 4), **percentiles_ms(seconds)}
+        found, seconds = timed(
+            lambda query: reduced_search(query, reduced, corpus, mean, components, k, shortlist), queries
+        )
+        entry["rerank"] = {"recall": round(recall(found, truth), 4), **percentiles_ms(seconds)}
+        report["reduced"].append(entry)
+    return report
+
+
+def evaluate_chroma(collection, ids, embeddings, query_rows, k=10):
+    """Recall@k and latency of the Chroma HNSW query for stored fatwas used as queries, excluding themselves."""
+    unit = unit_rows(embeddings)
+    found, truth, seconds = [], [], []
+    for row in query_rows:
+        scores = unit @ unit[row]
+        scores[row] = -np.inf
+        truth.append(np.array([ids[i] for i in top_k(scores, k)]))
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[embeddings[row].tolist()], n_results=k + 1, include=[])
+        seconds.append(time.perf_counter() - start)
+        found.append(np.array([fatwa_id for fatwa_id in result["ids"][0] if fatwa_id != ids[row]][:k]))
+    return {"recall": round(recall(found, truth), 4), **percentiles_ms(seconds)}
+
+
+def embed_queries(path):
+    """Embed one query per line of a text file with the OpenAI API."""
+    from openai import OpenAI
+
+    with open(path, encoding='utf-8') as f:
+        queries = [line.strip() for line in f if line.strip()]
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", ""), base_url=os.getenv("OPENAI_BASE_URL"))
+    vectors = []
+    for start in range(0, len(queries), 100):
+        response = client.embeddings.create(model="text-embedding-ada-002", input=queries[start:start + 100])
+        vectors.extend(item.embedding for item in response.data)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def save_reduced(artifacts_dir, ids, metadatas, unit, mean, components, explained, collection_name):
+    """Write the projection, reduced vectors and full vectors atomically."""
+    os.makedirs(artifacts_dir, exist_ok=True)
+    full_path = os.path.join(artifacts_dir, FULL_FILE)
+    temp_path = f"{full_path}.tmp.npy"
+    np.save(temp_path, unit)
+    os.replace(temp_path, full_path)
+
+    path = os.path.join(artifacts_dir, REDUCED_FILE)
+    temp_path = f"{path}.tmp.npz"
+    np.savez(
+        temp_path,
+        ids=np.array(ids),
+        mean=mean,
+        components=components,
+        vectors=project(unit, mean, components),
+        series=np.array([metadata.get("series_number") or -1 for metadata in metadatas], dtype=np.int64),
+        published=np.array([metadata.get("published") or -1 for metadata in metadatas], dtype=np.int64),
+        topics=np.array([metadata.get("topic") or "" for metadata in metadatas]),
+        explained_variance=np.array(explained),
+        collection=np.array(collection_name),
+        created_at=np.array(datetime.now().isoformat()),
+    )
+    os.replace(temp_path, path)
+    return path
+
+
+def print_report(report):
+    print(f"\nRecall@{report['k']} and per-query latency over {report['queries']} held-out queries "
+          f"({report['corpus']} fatwas):")
+    full = report["full"]
+    print(f"  {'full ' + str(full['dims']) + 'd exact':<24} recall {full['recall']:.3f}  "
+          f"p50 {full['p50_ms']:.3f} ms  p99 {full['p99_ms']:.3f} ms  vectors {full['vector_bytes'] / 2**20:.1f} MiB")
+    if "chroma" in report:
+        chroma = report["chroma"]
+        print(f"  {'chroma hnsw':<24} recall {chroma['recall']:.3f}  "
+              f"p50 {chroma['p50_ms']:.3f} ms  p99 {chroma['p99_ms']:.3f} ms")
+    for entry in report["reduced"]:
+        for mode in ("no_rerank", "rerank"):
+            label = f"pca {entry['dims']}d" + (f" + rerank {report['shortlist']}" if mode == "rerank" else "")
+            result = entry[mode]
+            print(f"  {label:<24} recall {result['recall']:.3f}  p50 {result['p50_ms']:.3f} ms  "
+                  f"p99 {result['p99_ms']:.3f} ms  vectors {entry['vector_bytes'] / 2**20:.1f} MiB  "
+                  f"variance kept {entry['explained_variance']:.1%}")
+
+
+def reduce_collection(args, collection, collection_name, artifacts_dir):
+    """Evaluate and save the projection of one collection's embeddings."""
+    start = time.perf_counter()
+    ids, metadatas, embeddings = load_vectors(collection)
+    unit = unit_rows(embeddings)
+    print(f"Loaded {len(ids)} embeddings of {unit.shape[1] if len(ids) else 0} dims "
+          f"in {time.perf_counter() - start:.2f}s")
+    if not len(ids):
+        print("Nothing to reduce")
+        return
+
+    if not args.skip_eval:
+        report = None
+        if args.queries:
+            queries = unit_rows(embed_queries(args.queries))
+            if len(queries):
+                report = evaluate(unit, queries, [int(d) for d in args.eval_dims.split(',')], args.k, args.shortlist)
+        else:
+            # The projection is fitted without the held-out fatwas, which then stand in for queries
+            order = np.random.default_rng(args.seed).permutation(len(ids))
+            holdout = min(args.holdout, len(ids) // 5)
+            if holdout:
+                report = evaluate(unit[order[holdout:]], unit[order[:holdout]],
+                                  [int(d) for d in args.eval_dims.split(',')], args.k, args.shortlist)
+                report["chroma"] = evaluate_chroma(collection, ids, embeddings, order[:holdout], args.k)
+
+        if report is None:
+            # Percentiles of no queries are undefined; the projection is still worth saving
+            reason = f"no queries in {args.queries}" if args.queries else f"{len(ids)} fatwas are too few to hold any out"
+            print(f"Skipping the evaluation: {reason}")
+        else:
+            print_report(report)
+            os.makedirs(artifacts_dir, exist_ok=True)
+            with open(os.path.join(artifacts_dir, REPORT_FILE), 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    # The persisted projection is fitted on the whole corpus
+    start = time.perf_counter()
+    mean, components, explained = fit_pca(unit, min(args.dims, unit.shape[1]))
+    path = save_reduced(artifacts_dir, ids, metadatas, unit, mean, components, explained, collection_name)
+    print(f"\nFitted {components.shape[1]}-dim projection keeping {explained:.1%} of the variance "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"Reduced index saved to {path} ({os.path.getsize(path) / 2**20:.1f} MiB), "
+          f"full vectors to {os.path.join(artifacts_dir, FULL_FILE)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit a PCA projection of the stored embeddings for reduced search')
+    parser.add_argument('--db-path', default=os.getenv("DB_PATH", "./chroma_db"), help='Chroma database directory')
+    parser.add_argument('--collection', default=os.getenv("COLLECTION_NAME", "mufti_fatwas"),
+                        help='Chroma collection, or comma-separated shards reduced one by one')
+    parser.add_argument('--artifacts-dir', default=os.getenv("ARTIFACTS_DIR"),
+                        help='Where the API looks for precomputed artifacts (default: <db-path>/artifacts)')
+    parser.add_argument('--dims', type=int, default=256, help='Dimensions of the persisted projection')
+    parser.add_argument('--eval-dims', default='128,192,256', help='Comma-separated dimensions to evaluate')
+    parser.add_argument('--k', type=int, default=10, help='Neighbors compared for recall@k')
+    parser.add_argument('--shortlist', type=int, default=100, help='Reduced-space candidates re-ranked on full vectors')
+    parser.add_argument('--queries', help='Text file with one held-out query per line (embedded with OpenAI)')
+    parser.add_argument('--holdout', type=int, default=200,
+                        help='Without --queries: stored embeddings held out of the fit and used as queries')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for choosing the held-out embeddings')
+    parser.add_argument('--skip-eval', action='store_true', help='Only fit and save the projection')
+
+    args = parser.parse_args()
+    artifacts_dir = args.artifacts_dir or os.path.join(args.db_path, "artifacts")
+
+    client = chromadb.PersistentClient(path=args.db_path)
+    names = [name.strip() for name in args.collection.split(',')]
+    for name in names:
+        if len(names) > 1:
+            print(f"\n== {name}")
+        reduce_collection(args, client.get_collection(name), name,
+                          os.path.join(artifacts_dir, name) if len(names) > 1 else artifacts_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Precompute the "related fatwas" table from the stored embeddings.
+
+Reads every embedding from the Chroma collection (or from every shard listed
+in --collection), normalizes them and finds
+each fatwa's top-k most similar fatwas (cosine similarity) with blocked
+matrix products: each block of rows is scored against the whole corpus in a
+single matmul and reduced with argpartition, so memory stays at
+block_size x n scores. The result is written as a compact .npz (int32
+neighbor positions, float16 scores, plus ids, titles and urls) that the API
+loads at startup and serves from /fatwa/{id}/related with a direct lookup.
+
+Re-run it after ingesting new articles (llm/llm.py or pipeline.py).
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import chromadb
+import numpy as np
+
+RELATED_FILE = "related.npz"
+
+
+def load_vectors(collection, page_size=1000):
+    """All ids, metadatas and embeddings (float32) of a collection, read in pages."""
+    ids, metadatas, vectors = [], [], []
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=["embeddings", "metadatas"])
+        if not len(page["ids"]):
+            break
+        ids.extend(page["ids"])
+        metadatas.extend(page["metadatas"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+        if len(page["ids"]) < page_size:
+            break
+        offset += page_size
+    embeddings = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return ids, metadatas, embeddings
+
+
+def load_embeddings(collection, page_size=1000):
+    """All ids, titles, urls and embeddings of a collection, read in pages."""
+    ids, metadatas, embeddings = load_vectors(collection, page_size)
+    titles = [metadata.get("title", "") for metadata in metadatas]
+    urls = [metadata.get("url", "") for metadata in metadatas]
+    return ids, titles, urls, embeddings
+
+
+def top_k_neighbors(embeddings, k=10, block_size=1024):
+    """(neighbors, scores): each row's k most similar other rows by cosine similarity, best first."""
+    count = len(embeddings)
+    k = min(k, max(count - 1, 0))
+    neighbors = np.zeros((count, k), dtype=np.int32)
+    scores = np.zeros((count, k), dtype=np.float32)
+    if not k:
+        return neighbors, scores
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = embeddings / np.where(norms == 0, 1, norms)
+
+    for start in range(0, count, block_size):
+        end = min(start + block_size, count)
+        similarity = unit[start:end] @ unit.T
+        # A fatwa is not related to itself
+        similarity[np.arange(end - start), np.arange(start, end)] = -np.inf
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        neighbors[start:end] = np.take_along_axis(top, order, axis=1)
+        scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+    return neighbors, scores
+
+
+def save_related(path, ids, titles, urls, neighbors, scores, collection_name):
+    """Write the neighbor table atomically, so the API never loads a half-written file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp.npz"
+    np.savez_compressed(
+        temp_path,
+        ids=np.array(ids),
+        titles=np.array(titles),
+        urls=np.array(urls),
+        neighbors=neighbors,
+        scores=scores.astype(np.float16),
+        collection=np.array(collection_name),
+        created_at=np.array(datetime.now().isoformat()),
+    )
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute the related fatwas table from stored embeddings')
+    parser.add_argument('--db-path', default=os.getenv("DB_PATH", "./chroma_db"), help='Chroma database directory')
+    parser.add_argument('--collection', default=os.getenv("COLLECTION_NAME", "mufti_fatwas"),
+                        help='Chroma collection, or comma-separated shards to relate across sources')
+    parser.add_argument('--artifacts-dir', default=os.getenv("ARTIFACTS_DIR"),
+                        help='Where the API looks for precomputed artifacts (default: <db-path>/artifacts)')
+    parser.add_argument('--k', type=int, default=10, help='Neighbors kept per fatwa')
+    parser.add_argument('--block-size', type=int, default=1024, help='Rows scored per matrix product')
+
+    args = parser.parse_args()
+    artifacts_dir = args.artifacts_dir or os.path.join(args.db_path, "artifacts")
+
+    client = chromadb.PersistentClient(path=args.db_path)
+    start = time.perf_counter()
+    # Ids are derived from URLs, so they stay unique across shards
+    shards = [load_embeddings(client.get_collection(name.strip())) for name in args.collection.split(',')]
+    ids, titles, urls = ([value for shard in shards for value in shard[column]] for column in range(3))
+    vectors = [shard[3] for shard in shards if len(shard[0])]
+    embeddings = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    loaded = time.perf_counter()
+    neighbors, scores = top_k_neighbors(embeddings, args.k, args.block_size)
+    computed = time.perf_counter()
+
+    path = os.path.join(artifacts_dir, RELATED_FILE)
+    save_related(path, ids, titles, urls, neighbors, scores, args.collection)
+    print(f"Loaded {len(ids)} embeddings in {loaded - start:.2f}s, "
+          f"computed top-{neighbors.shape[1]} neighbors in {computed - loaded:.2f}s")
+    print(f"Related fatwas saved to {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
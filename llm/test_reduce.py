@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from reduce import REDUCED_FILE, REPORT_FILE, reduce_collection
+
+# reduce imports llm/related.py as "related"; api/ has a module of that name too, so don't leave this one
+# cached or llm/ first on the path when the API tests run in the same session
+sys.modules.pop('related', None)
+LLM_DIR = os.path.dirname(os.path.abspath(__file__))
+while LLM_DIR in sys.path:
+    sys.path.remove(LLM_DIR)
+
+class FakeCollection:
+    """Serves stored embeddings from memory in place of a Chroma collection."""
+
+    def __init__(self, embeddings):
+        self.ids = [f"fatwa-{i}" for i in range(len(embeddings))]
+        self.embeddings = embeddings
+
+    def get(self, limit, offset=0, include=None):
+        rows = range(offset, min(offset + limit, len(self.ids)))
+        return {
+            'ids': [self.ids[row] for row in rows],
+            'metadatas': [{'series_number': row + 1} for row in rows],
+            'embeddings': [self.embeddings[row] for row in rows],
+        }
+
+def make_args(**options):
+    args = dict(dims=4, eval_dims='2,4', k=10, shortlist=100, queries=None, holdout=200, seed=0, skip_eval=False)
+    args.update(options)
+    return argparse.Namespace(**args)
+
+def test_tiny_corpus():
+    """With too few fatwas to hold any out, the evaluation is skipped and the projection is still saved."""
+    embeddings = np.random.default_rng(0).normal(size=(4, 8)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as artifacts_dir:
+        reduce_collection(make_args(), FakeCollection(embeddings), 'mufti_fatwas', artifacts_dir)
+        assert not os.path.exists(os.path.join(artifacts_dir, REPORT_FILE))
+        with np.load(os.path.join(artifacts_dir, REDUCED_FILE)) as reduced:
+            assert reduced['ids'].tolist() == [f"fatwa-{i}" for i in range(4)]
+            assert reduced['vectors'].shape == (4, 4)
+            assert reduced['series'].tolist() == [1, 2, 3, 4]
+
+if __name__ == "__main__":
+    test_tiny_corpus()
+    print("All reduce tests passed")
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Mufti WP irsyad hukum section.
+
+Serves listing pages, article pages and a sitemap with the same markup the
+scrapers parse (table.category / td.list-title a, h2.article-details-title,
+div[itemprop="articleBody"], time[itemprop="datePublished"]), so the scrapers can be tested and benchmarked
+without touching muftiwp.gov.my. Articles are synthetic, or taken from a
+previously scraped JSON file with --corpus. Latency and errors can be
+injected, from the command line or at runtime through /mock/config.
+"""
+
+import argparse
+import html
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LISTING_PATH = '/ms/artikel/irsyad-hukum/umum'
+
+WORDS = (
+    "hukum solat puasa zakat wudhu haji niat syarak ulama mazhab syafie harus makruh haram wajib sunat "
+    "dalil hadis riwayat nabi sahabat ibadah muamalat fiqh masjid imam makmum qada kifarah nazar wakaf"
+).split()
+
+
+class MockSiteConfig:
+    """Site shape plus latency and error injection settings shared by all request threads."""
+
+    FIELDS = ('latency_ms', 'jitter_ms', 'error_rate', 'error_statuses', 'retry_after')
+
+    def __init__(self, articles=100, page_size=25, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 error_statuses=(500,), retry_after=1, pagination=True, seed=0):
+        self.articles = articles
+        self.page_size = page_size
+        self.pagination = pagination
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def pages(self):
+        return max(1, -(-self.articles // self.page_size))
+
+    def as_dict(self):
+        values = {field: getattr(self, field) for field in self.FIELDS}
+        values.update(articles=self.articles, pages=self.pages, listing_path=LISTING_PATH,
+                      requests=self.requests, errors=self.errors)
+        return values
+
+    def update(self, values):
+        with self.lock:
+            for field in self.FIELDS:
+                if field in values:
+                    setattr(self, field, values[field])
+
+    def delay(self):
+        """Seconds to stall before answering a page request."""
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            return max(0.0, self.latency_ms + jitter) / 1000
+
+    def pick_error(self):
+        """Count a page request and return an HTTP status to fail with, or None to succeed."""
+        with self.lock:
+            self.requests += 1
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.errors += 1
+                return self.rng.choice(self.error_statuses)
+        return None
+
+
+def synthetic_article(number, words=400):
+    """A deterministic article in the site's Soalan / Ringkasan / Huraian layout.
+
+    Every seventh article uses Mukadimah instead of Soalan, like some real ones.
+    """
+    rng = random.Random(number)
+
+    def sentence(length):
+        return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+    topic = ' '.join(rng.choice(WORDS) for _ in range(3))
+    question = ' '.join(sentence(rng.randint(8, 16)) for _ in range(2))
+    summary = ' '.join(sentence(rng.randint(10, 20)) for _ in range(3))
+    detail = ' '.join(sentence(rng.randint(10, 20)) for _ in range(max(1, words // 15)))
+    published = date(2015, 1, 1) + timedelta(days=3 * number)
+    return {
+        'title': f"IRSYAD AL-FATWA SIRI KE-{number}: HUKUM {topic.upper()}",
+        'question': f"Mukadimah: {question}" if number % 7 == 0 else question,
+        'answer': f"Ringkasan Jawapan: {summary}\n\nHuraian Jawapan: {detail}",
+        'published': published.year * 10000 + published.month * 100 + published.day,
+    }
+
+
+def load_corpus(path):
+    """Articles (title, question, answer) from a scraped JSON file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [record for record in json.load(f) if record.get('title')]
+
+
+def article_slug(number, title):
+    slug = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')[:80]
+    return f"{LISTING_PATH}/{number}-{slug}"
+
+
+def render_article(article):
+    question = article['question']
+    heading = '' if question.startswith('Mukadimah:') else 'Soalan: '
+    paragraphs = [f"{heading}{question}"] + [part for part in article['answer'].split('\n\n') if part.strip()]
+    body = '\n'.join(f"<p>{html.escape(paragraph)}</p>" for paragraph in paragraphs)
+    info = ''
+    if article.get('published'):
+        published = int(article['published'])
+        iso = f"{published // 10000:04d}-{published // 100 % 100:02d}-{published % 100:02d}"
+        info = (f'<dl class="article-info"><dd class="published">'
+                f'<time datetime="{iso}T08:00:00+08:00" itemprop="datePublished">Diterbitkan: {iso}</time></dd></dl>\n')
+    return f"""<!DOCTYPE html>
+<html lang="ms"><head><meta charset="utf-8"><title>{html.escape(article['title'])}</title></head>
+<body><div class="item-page">
+<h2 class="article-details-title">{html.escape(article['title'])}</h2>
+{info}<div itemprop="articleBody">
+{body}
+</div></div></body></html>
+"""
+
+
+def render_listing(site, page_num):
+    config = site.config
+    start = page_num * config.page_size
+    numbers = range(start + 1, min(start + config.page_size, config.articles) + 1)
+    rows = '\n'.join(
+        f'<tr><td class="list-title"><a href="{site.article_path(number)}">{html.escape(site.article(number)["title"])}</a></td></tr>'
+        for number in numbers
+    )
+
+    pagination = ''
+    if config.pagination and numbers:
+        links = ''.join(
+            f'<li><a href="{LISTING_PATH}?start={n * config.page_size}">{n + 1}</a></li>'
+            for n in range(config.pages) if n != page_num
+        )
+        pagination = (f'<div class="pagination"><p class="counter">Halaman {page_num + 1} dari {config.pages}</p>'
+                      f'<ul>{links}</ul></div>')
+
+    return f"""<!DOCTYPE html>
+<html lang="ms"><head><meta charset="utf-8"><title>Irsyad Hukum Umum</title></head>
+<body><table class="category"><tbody>
+{rows}
+</tbody></table>
+{pagination}
+</body></html>
+"""
+
+
+class MockSite:
+    """Article content and URLs; articles are rendered lazily and cached."""
+
+    def __init__(self, config, corpus=None, words=400):
+        self.config = config
+        self.corpus = corpus
+        self.words = words
+        if corpus:
+            config.articles = len(corpus)
+        self.articles = {}
+
+    def article(self, number):
+        if number not in self.articles:
+            if self.corpus:
+                self.articles[number] = self.corpus[number - 1]
+            else:
+                self.articles[number] = synthetic_article(number, self.words)
+        return self.articles[number]
+
+    def article_path(self, number):
+        return article_slug(number, self.article(number)['title'])
+
+    def sitemap(self, base_url):
+        urls = '\n'.join(
+            f"<url><loc>{base_url}{html.escape(self.article_path(number))}</loc></url>"
+            for number in range(1, self.config.articles + 1)
+        )
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{urls}\n</urlset>\n')
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    """Serves listing pages, articles, the sitemap and the /mock control endpoints."""
+
+    server_version = "MockMuftiWP/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload), 'application/json')
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip('/')
+        site = self.server.site
+
+        if path in ('', '/health'):
+            self.send_json(200, {"status": "ok"})
+            return
+        if path == '/mock/config':
+            self.send_json(200, site.config.as_dict())
+            return
+
+        # Everything else is a page of the site and subject to latency and error injection
+        time.sleep(site.config.delay())
+        error_status = site.config.pick_error()
+        if error_status:
+            headers = {'Retry-After': str(site.config.retry_after)} if error_status in (429, 503) else None
+            self.send_body(error_status, f"<h1>Error {error_status}</h1>", headers=headers)
+            return
+
+        if path == '/sitemap.xml':
+            host = self.headers.get('Host', f"127.0.0.1:{self.server.server_port}")
+            self.send_body(200, site.sitemap(f"http://{host}"), 'application/xml')
+        elif path == LISTING_PATH:
+            start = parse_qs(parsed.query).get('start', ['0'])[0]
+            page_num = int(start) // site.config.page_size if start.isdigit() else 0
+            # Past the last page Joomla still answers with an empty category table
+            self.send_body(200, render_listing(site, page_num))
+        elif path.startswith(LISTING_PATH + '/'):
+            match = re.match(r'(\d+)-', path[len(LISTING_PATH) + 1:])
+            number = int(match.group(1)) if match else 0
+            if 1 <= number <= site.config.articles:
+                self.send_body(200, render_article(site.article(number)))
+            else:
+                self.send_body(404, "<h1>Not found</h1>")
+        else:
+            self.send_body(404, "<h1>Not found</h1>")
+
+    def do_POST(self):
+        if self.path.rstrip('/') == '/mock/config':
+            length = int(self.headers.get('Content-Length', 0))
+            self.server.site.config.update(json.loads(self.rfile.read(length) or b'{}'))
+            self.send_json(200, self.server.site.config.as_dict())
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+
+def create_server(host='127.0.0.1', port=8102, config=None, corpus=None, words=400, verbose=False):
+    """Create (but do not start) a mock site server instance."""
+    server = ThreadingHTTPServer((host, port), MockSiteHandler)
+    server.daemon_threads = True
+    server.site = MockSite(config or MockSiteConfig(), corpus, words)
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local mock of the Mufti WP irsyad hukum pages')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind to')
+    parser.add_argument('--port', type=int, default=8102, help='Port to listen on')
+    parser.add_argument('--articles', type=int, default=100, help='Number of synthetic articles')
+    parser.add_argument('--page-size', type=int, default=25, help='Articles per listing page')
+    parser.add_argument('--words', type=int, default=400, help='Approximate words per synthetic article')
+    parser.add_argument('--corpus', help='Serve the articles of a scraped JSON file instead of synthetic ones')
+    parser.add_argument('--no-pagination', action='store_true', help='Omit the pagination block from listing pages')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Base latency added to every page')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Uniform +/- jitter added to the base latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of page requests to fail (0-1)')
+    parser.add_argument('--error-status', default='500',
+                        help='Comma-separated HTTP statuses to fail with, e.g. 429,500,503')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429/503')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for jitter and error injection')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    config = MockSiteConfig(
+        articles=args.articles,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=[int(status) for status in args.error_status.split(',')],
+        retry_after=args.retry_after,
+        pagination=not args.no_pagination,
+        seed=args.seed
+    )
+    corpus = load_corpus(args.corpus) if args.corpus else None
+    server = create_server(args.host, args.port, config, corpus, args.words, args.verbose)
+    print(f"Mock Mufti WP site listing {config.articles} articles on http://{args.host}:{args.port}{LISTING_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
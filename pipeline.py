@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+In-process scrape -> extract -> dedupe -> embed -> upsert pipeline.
+
+Each stage runs in its own threads and hands work to the next through a
+bounded queue, so embedding starts with the first articles while the crawl is
+still going, and a slow stage makes the stages before it wait instead of
+piling up work in memory:
+
+    discover (1) -> urls -> extract (--fetch-workers) -> articles -> dedupe (1)
+        -> unique -> embed (--embed-workers, batched) -> embedded -> upsert (1)
+
+Articles get stable ids derived from their URL, so re-running or resuming
+upserts the same vectors instead of adding copies. A single run state file
+records which URLs are already in the vector store, which were duplicates and
+the MinHash signatures needed to keep deduplicating on resume; a URL only
+counts as done once its vector is stored, so an interrupted run picks up
+exactly where it stopped (fetched pages come back from the scraper's cache).
+
+With --sources, each source in sources.json is crawled in turn into its own
+collection (shard), with its own run state and report files named after it.
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from article_fields import metadata_fields
+from article_ids import article_id, drop_legacy_ids
+from dataset import split_sections
+from dedupe import LSHIndex, MinHasher, lsh_parameters, record_text, shingles
+from records import JsonlWriter
+import snapshot
+from sources import SOURCES_FILE, load_sources, open_shard, select_sources
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+STOP = object()
+
+
+def article_metadata(article, source=None):
+    """Chroma metadata for an article, as stored by llm/llm.py, tagged with its source if given."""
+    ringkasan, _ = split_sections(article['answer'])
+    metadata = {
+        'title': article['title'],
+        'url': article['url'],
+        'scraped_at': article['scraped_at'],
+        'question': article['question'],
+        'ringkasan': ringkasan,
+    }
+    metadata.update(metadata_fields(article))
+    if source:
+        metadata['source'] = source
+    return metadata
+
+
+def per_source(path, source):
+    """path with the source name before its extension, e.g. pipeline_state.muftiwp.json."""
+    if not path or not source:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{source}{extension}"
+
+
+class PipelineState:
+    """Resumable run state: stored URLs, duplicates and failures, plus dedupe signatures.
+
+    The JSON state and the signatures (.npz next to it) are replaced atomically,
+    so a crash mid-save leaves the previous state intact.
+    """
+
+    def __init__(self, path='pipeline_state.json'):
+        self.path = path
+        self.signatures_path = os.path.splitext(path)[0] + '.npz'
+        self.done = {}  # url -> article id
+        self.duplicates = {}  # duplicate url -> canonical url
+        self.failed = {}  # url -> last error
+        self.signatures = {}  # stored url -> MinHash signature
+        self.started_at = datetime.now().isoformat()
+        self.lock = threading.Lock()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.done = state.get('done', {})
+        self.duplicates = state.get('duplicates', {})
+        self.failed = state.get('failed', {})
+        self.started_at = state.get('started_at', self.started_at)
+        if os.path.exists(self.signatures_path):
+            with np.load(self.signatures_path) as saved:
+                self.signatures = dict(zip(saved['urls'].tolist(), saved['signatures']))
+        return True
+
+    def reset(self):
+        for path in (self.path, self.signatures_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def is_settled(self, url):
+        """Whether a URL needs no more work: stored, or a known duplicate."""
+        with self.lock:
+            return url in self.done or url in self.duplicates
+
+    def mark_done(self, urls, ids, signatures):
+        with self.lock:
+            for url, id_, signature in zip(urls, ids, signatures):
+                self.done[url] = id_
+                self.failed.pop(url, None)
+                if signature is not None:
+                    self.signatures[url] = signature
+
+    def mark_duplicate(self, url, canonical_url):
+        with self.lock:
+            self.duplicates[url] = canonical_url
+            self.failed.pop(url, None)
+
+    def mark_failed(self, url, error):
+        with self.lock:
+            self.failed[url] = error
+
+    def save(self):
+        with self.lock:
+            state = {
+                'started_at': self.started_at,
+                'updated_at': datetime.now().isoformat(),
+                'done': self.done,
+                'duplicates': self.duplicates,
+                'failed': self.failed,
+            }
+            urls = list(self.signatures)
+            signatures = np.array([self.signatures[url] for url in urls], dtype=np.uint64)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+        if urls:
+            temp_path = f"{self.signatures_path}.tmp.npz"
+            np.savez(temp_path, urls=np.array(urls), signatures=signatures)
+            os.replace(temp_path, self.signatures_path)
+
+
+class StageStats:
+    """Items in and out of a stage and the time its workers spent busy."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, processed=0, emitted=0, errors=0, busy=0.0):
+        with self.lock:
+            self.processed += processed
+            self.emitted += emitted
+            self.errors += errors
+            self.busy += busy
+
+    def as_dict(self, elapsed):
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy, 3),
+            # Close to 1.0 means this stage is the bottleneck
+            'utilization': round(self.busy / (elapsed * self.workers), 3) if elapsed else 0.0,
+        }
+
+
+class Pipeline:
+    """Runs the stages over a scraper, an embedding function and a vector store collection.
+
+    embed(texts) returns one vector per text. dedupe is 'off', 'skip' (duplicates
+    are not embedded) or 'link' (also listed in the canonical article's
+    duplicate_urls metadata at the end of the run). source, if given, is stored
+    in every article's metadata.
+    """
+
+    def __init__(self, scraper, embed, collection, state, fetch_workers=4, embed_workers=2,
+                 batch_size=10, batch_wait=1.0, queue_size=100, dedupe='skip', threshold=0.8,
+                 num_perm=128, articles_path=None, checkpoint_every=50, source=None):
+        self.scraper = scraper
+        self.embed = embed
+        self.collection = collection
+        self.source = source
+        self.state = state
+        self.fetch_workers = fetch_workers
+        self.embed_workers = embed_workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.dedupe = dedupe
+        self.threshold = threshold
+        self.articles_path = articles_path
+        self.checkpoint_every = checkpoint_every
+
+        # Bounded queues are what gives backpressure: put() blocks while the next stage is behind
+        self.urls = queue.Queue(maxsize=queue_size)
+        self.articles = queue.Queue(maxsize=queue_size)
+        self.unique = queue.Queue(maxsize=queue_size)
+        self.embedded = queue.Queue(maxsize=max(1, queue_size // batch_size))
+        self.stop_event = threading.Event()
+
+        self.hasher = MinHasher(num_perm)
+        self.index = LSHIndex(*lsh_parameters(num_perm, threshold))
+        for url, signature in state.signatures.items():
+            self.index.add(url, signature)
+
+        self.stats = {
+            'discover': StageStats('discover', 1),
+            'extract': StageStats('extract', fetch_workers),
+            'dedupe': StageStats('dedupe', 1),
+            'embed': StageStats('embed', embed_workers),
+            'upsert': StageStats('upsert', 1),
+        }
+        self.discovered = 0
+        self.skipped = 0
+
+    def put(self, target, item):
+        """Block until there is room downstream; gives up when the run is stopping."""
+        while not self.stop_event.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, source, timeout=None):
+        """Next item from upstream, STOP when the run is stopping, None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.stop_event.is_set():
+            wait = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            try:
+                return source.get(timeout=wait)
+            except queue.Empty:
+                continue
+        return STOP
+
+    def discover(self, start_page=0, max_pages=None, sitemap=None, urls=None):
+        """Feed article URLs into the pipeline, skipping the ones already settled."""
+        start = time.perf_counter()
+        if urls is None:
+            entries = self.scraper.discover_from_sitemap(sitemap) if sitemap else []
+            if entries:
+                urls = [url for url, _ in entries]
+            else:
+                if sitemap:
+                    logging.warning(f"No articles found in {sitemap}, falling back to listing pages")
+                frontier, _ = self.scraper.discover_frontier(start_page, max_pages)
+                urls = [link for _, links in frontier for link in links]
+        seen = set()
+        self.stats['discover'].add(busy=time.perf_counter() - start)
+
+        for url in urls:
+            if url in seen:
+                continue
+            seen.add(url)
+            self.discovered += 1
+            if self.state.is_settled(url):
+                self.skipped += 1
+                continue
+            self.stats['discover'].add(processed=1, emitted=1)
+            if not self.put(self.urls, url):
+                return
+        logging.info(f"Discovered {self.discovered} articles, {self.skipped} already stored or duplicates")
+
+    def extract_worker(self):
+        stats = self.stats['extract']
+        while True:
+            url = self.get(self.urls)
+            if url is STOP:
+                return
+            start = time.perf_counter()
+            try:
+                article = self.scraper.extract_article_data(url)
+            except Exception as e:
+                logging.error(f"Error extracting {url}: {e}")
+                article = None
+            if article is None:
+                self.state.mark_failed(url, 'extract')
+                stats.add(processed=1, errors=1, busy=time.perf_counter() - start)
+                continue
+            stats.add(processed=1, emitted=1, busy=time.perf_counter() - start)
+            if not self.put(self.articles, article):
+                return
+
+    def dedupe_worker(self):
+        """Single thread, so the LSH index and the articles file need no locking."""
+        stats = self.stats['dedupe']
+        writer = JsonlWriter(self.articles_path) if self.articles_path else None
+        try:
+            while True:
+                article = self.get(self.articles)
+                if article is STOP:
+                    return
+                start = time.perf_counter()
+                if writer:
+                    writer.write(article)
+                signature = None
+                if self.dedupe != 'off':
+                    signature = self.hasher.signature(shingles(record_text(article)))
+                    canonical, similarity = self.index.most_similar(signature, self.threshold)
+                    if canonical and canonical != article['url']:
+                        # Articles arrive in crawl order, so the first copy seen is the canonical one
+                        logging.info(f"Duplicate of {canonical} ({similarity:.2f}): {article['url']}")
+                        self.state.mark_duplicate(article['url'], canonical)
+                        stats.add(processed=1, busy=time.perf_counter() - start)
+                        continue
+                    self.index.add(article['url'], signature)
+                stats.add(processed=1, emitted=1, busy=time.perf_counter() - start)
+                if not self.put(self.unique, (article, signature)):
+                    return
+        finally:
+            if writer:
+                writer.close()
+
+    def embed_worker(self):
+        """Embed articles in batches of batch_size, or whatever arrived within batch_wait."""
+        stats = self.stats['embed']
+        finished = False
+        while not finished:
+            item = self.get(self.unique)
+            if item is STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                item = self.get(self.unique, timeout=max(0.0, deadline - time.monotonic()))
+                if item is None:
+                    break
+                if item is STOP:
+                    # Embed what is already in hand before shutting down
+                    finished = True
+                    break
+                batch.append(item)
+
+            start = time.perf_counter()
+            texts = [f"{article['question']} {article['answer']}" for article, _ in batch]
+            try:
+                embeddings = self.embed(texts)
+            except Exception as e:
+                logging.error(f"Error embedding batch of {len(batch)}: {e}")
+                for article, _ in batch:
+                    self.state.mark_failed(article['url'], 'embed')
+                stats.add(processed=len(batch), errors=len(batch), busy=time.perf_counter() - start)
+                continue
+            stats.add(processed=len(batch), emitted=len(batch), busy=time.perf_counter() - start)
+            if not self.put(self.embedded, (batch, embeddings)):
+                return
+
+    def upsert_worker(self):
+        """Single writer to the vector store; URLs are only marked done once stored."""
+        stats = self.stats['upsert']
+        since_checkpoint = 0
+        while True:
+            item = self.get(self.embedded)
+            if item is STOP:
+                return
+            batch, embeddings = item
+            start = time.perf_counter()
+            urls = [article['url'] for article, _ in batch]
+            ids = [article_id(url) for url in urls]
+            try:
+                self.collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=[f"{article['question']} {article['answer']}" for article, _ in batch],
+                    metadatas=[article_metadata(article, self.source) for article, _ in batch],
+                )
+            except Exception as e:
+                logging.error(f"Error upserting batch of {len(batch)}: {e}")
+                for url in urls:
+                    self.state.mark_failed(url, 'upsert')
+                stats.add(processed=len(batch), errors=len(batch), busy=time.perf_counter() - start)
+                continue
+            self.state.mark_done(urls, ids, [signature for _, signature in batch])
+            stats.add(processed=len(batch), emitted=len(batch), busy=time.perf_counter() - start)
+
+            since_checkpoint += len(batch)
+            if since_checkpoint >= self.checkpoint_every:
+                self.state.save()
+                since_checkpoint = 0
+
+    def link_duplicates(self):
+        """Store each canonical article's duplicate URLs in its metadata (dedupe='link')."""
+        linked = {}
+        for duplicate_url, canonical_url in self.state.duplicates.items():
+            if canonical_url in self.state.done:
+                linked.setdefault(canonical_url, []).append(duplicate_url)
+        if not linked:
+            return 0
+        ids = [self.state.done[url] for url in linked]
+        stored = self.collection.get(ids=ids, include=['metadatas'])
+        metadatas = []
+        for id_, metadata in zip(stored['ids'], stored['metadatas']):
+            # Chroma metadata values must be scalars
+            metadata['duplicate_urls'] = "\n".join(sorted(linked[metadata['url']]))
+            metadatas.append(metadata)
+        self.collection.update(ids=stored['ids'], metadatas=metadatas)
+        return len(metadatas)
+
+    def run(self, start_page=0, max_pages=None, sitemap=None, urls=None):
+        """Run every stage to completion (or until interrupted) and return a run summary."""
+        run_start = time.perf_counter()
+        stages = [
+            ('discover', [threading.Thread(target=self.discover, args=(start_page, max_pages, sitemap, urls))],
+             self.urls),
+            ('extract', [threading.Thread(target=self.extract_worker) for _ in range(self.fetch_workers)],
+             self.articles),
+            ('dedupe', [threading.Thread(target=self.dedupe_worker)], self.unique),
+            ('embed', [threading.Thread(target=self.embed_worker) for _ in range(self.embed_workers)],
+             self.embedded),
+            ('upsert', [threading.Thread(target=self.upsert_worker)], None),
+        ]
+        for _, threads, _ in stages:
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+
+        interrupted = False
+        try:
+            # Shut down front to back: once a stage has drained, tell each worker of the next one to stop
+            for position, (name, threads, output) in enumerate(stages):
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=0.5)
+                if output is not None:
+                    for _ in stages[position + 1][1]:
+                        self.put(output, STOP)
+        except KeyboardInterrupt:
+            logging.info("Pipeline interrupted by user. Saving progress...")
+            interrupted = True
+            self.stop_event.set()
+            for _, threads, _ in stages:
+                for thread in threads:
+                    thread.join(timeout=5)
+
+        linked = 0
+        if self.dedupe == 'link' and not interrupted:
+            linked = self.link_duplicates()
+        self.state.save()
+
+        elapsed = time.perf_counter() - run_start
+        return {
+            'interrupted': interrupted,
+            'elapsed_seconds': round(elapsed, 3),
+            'discovered': self.discovered,
+            'skipped': self.skipped,
+            'stored': len(self.state.done),
+            'duplicates': len(self.state.duplicates),
+            'failed': len(self.state.failed),
+            'linked': linked,
+            'stages': {name: stats.as_dict(elapsed) for name, stats in self.stats.items()},
+        }
+
+
+def openai_embedder(model=EMBEDDING_MODEL):
+    """embed(texts) backed by the OpenAI embeddings API (OPENAI_BASE_URL may point at stub_openai_server.py)."""
+    from openai import OpenAI
+
+    client = OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY", ""),
+        base_url=os.getenv("OPENAI_BASE_URL")
+    )
+
+    def embed(texts):
+        response = client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in response.data]
+    return embed
+
+
+def format_summary(summary):
+    lines = [
+        f"Pipeline {'interrupted' if summary['interrupted'] else 'finished'} in {summary['elapsed_seconds']:.1f}s: "
+        f"{summary['discovered']} discovered, {summary['skipped']} already done, {summary['stored']} stored, "
+        f"{summary['duplicates']} duplicates, {summary['failed']} failed"
+    ]
+    for name, stage in summary['stages'].items():
+        lines.append(f"  {name:<9} x{stage['workers']:<2} {stage['processed']:>6} in {stage['emitted']:>6} out "
+                     f"{stage['errors']:>4} errors  {stage['utilization']:.0%} busy")
+    return lines
+
+
+def main(argv=None):
+    from advanced_scraper import DEFAULT_BASE_URL, MuftiWPAdvancedScraper
+    from crawl_metrics import CrawlRecorder
+
+    parser = argparse.ArgumentParser(description='Scrape, deduplicate, embed and store articles in one pass')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='Listing page to scrape (e.g. a local mock_site.py)')
+    parser.add_argument('--start-page', type=int, default=0, help='Listing page to start from')
+    parser.add_argument('--max-pages', type=int, help='Maximum number of listing pages')
+    parser.add_argument('--sitemap', help='Sitemap or RSS/Atom feed (URL or file) to discover articles from')
+    parser.add_argument('--sources', nargs='?', const=SOURCES_FILE, default=os.getenv("SOURCES_FILE"),
+                        help='Crawl the sources in this JSON file, each into its own collection '
+                             '(instead of --base-url, --sitemap and --collection)')
+    parser.add_argument('--source', action='append',
+                        help='With --sources, only crawl this source (repeat for several)')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore and replace the saved run state')
+    parser.add_argument('--state-file', default='pipeline_state.json', help='Resumable run state')
+    parser.add_argument('--articles-file', default='mufti_wp_articles.jsonl',
+                        help='Also append every extracted article here (empty to disable)')
+    parser.add_argument('--delay-min', type=float, default=1, help='Fastest pacing: minimum delay between requests in seconds')
+    parser.add_argument('--delay-max', type=float, default=3, help='Initial delay between requests in seconds')
+    parser.add_argument('--discovery-workers', type=int, default=4, help='Listing pages to fetch concurrently')
+    parser.add_argument('--fetch-workers', type=int, default=4, help='Articles fetched and extracted concurrently')
+    parser.add_argument('--embed-workers', type=int, default=2, help='Embedding requests in flight')
+    parser.add_argument('--batch-size', type=int, default=10, help='Texts per embedding request')
+    parser.add_argument('--batch-wait', type=float, default=1.0, help='Longest wait to fill an embedding batch, in seconds')
+    parser.add_argument('--queue-size', type=int, default=100, help='Items buffered between stages')
+    parser.add_argument('--dedupe', choices=['off', 'skip', 'link'], default='skip', help='How near-duplicates are handled')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Near-duplicate similarity threshold')
+    parser.add_argument('--db-path', default=os.getenv("DB_PATH", "./chroma_db"), help='Chroma database directory')
+    parser.add_argument('--index-root', default=os.getenv("INDEX_ROOT"),
+                        help='Ingest into a new snapshot under this root and publish it when the run finishes '
+                             '(instead of --db-path)')
+    parser.add_argument('--collection', default=os.getenv("COLLECTION_NAME", "mufti_fatwas"), help='Chroma collection')
+    parser.add_argument('--model', default=EMBEDDING_MODEL, help='Embedding model')
+    parser.add_argument('--metrics-file', default='', help='Per-URL crawl timings as JSON lines (empty to disable)')
+    parser.add_argument('--report-file', default='pipeline_report.json', help='Where to write the run summary')
+
+    args = parser.parse_args(argv)
+
+    if args.sources:
+        try:
+            sources = select_sources(load_sources(args.sources), args.source)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    else:
+        # One unnamed source from the command line, stored in --collection
+        sources = [{'name': None, 'base_url': args.base_url, 'collection': args.collection, 'sitemap': args.sitemap}]
+
+    import chromadb
+
+    db_path = args.db_path
+    if args.index_root:
+        # Never write to the snapshot the API is serving: ingest into a copy and publish it at the end
+        version = snapshot.begin(args.index_root, resume=not args.no_resume)
+        db_path = snapshot.snapshot_path(args.index_root, version)
+        logging.info(f"Ingesting into snapshot {version} ({db_path})")
+    client = chromadb.PersistentClient(path=db_path)
+
+    articles_path = args.articles_file or None
+    if articles_path and args.no_resume and os.path.exists(articles_path):
+        os.remove(articles_path)
+
+    interrupted = False
+    for source in sources:
+        name = source['name']
+        if name:
+            logging.info(f"Source {name}: {source['base_url']} -> collection {source['collection']}")
+        state_file = per_source(args.state_file, name)
+        report_file = per_source(args.report_file, name)
+
+        state = PipelineState(state_file)
+        if args.no_resume:
+            state.reset()
+        elif state.load():
+            logging.info(f"Resuming: {len(state.done)} articles stored, {len(state.duplicates)} duplicates")
+
+        recorder = CrawlRecorder(path=per_source(args.metrics_file, name) or None)
+        scraper = MuftiWPAdvancedScraper(
+            delay_between_requests=(args.delay_min, args.delay_max),
+            discovery_workers=args.discovery_workers,
+            recorder=recorder,
+            base_url=source['base_url'],
+            # Extract workers share the scraper's connection pool, so size it for them too
+            pool_size=max(10, args.discovery_workers, args.fetch_workers),
+        )
+        collection = (open_shard(client, source) if name
+                      else client.get_or_create_collection(source['collection']))
+
+        pipeline = Pipeline(
+            scraper, openai_embedder(args.model), collection, state,
+            fetch_workers=args.fetch_workers,
+            embed_workers=args.embed_workers,
+            batch_size=args.batch_size,
+            batch_wait=args.batch_wait,
+            queue_size=args.queue_size,
+            dedupe=args.dedupe,
+            threshold=args.threshold,
+            articles_path=articles_path,
+            source=name,
+        )
+        try:
+            summary = pipeline.run(start_page=args.start_page, max_pages=args.max_pages, sitemap=source['sitemap'])
+        finally:
+            recorder.close()
+        # Articles re-stored under their URL id replace copies indexed under positional ids
+        dropped = drop_legacy_ids(collection)
+        if dropped:
+            logging.info(f"Deleted {dropped} fatwas stored under positional ids and now stored under URL ids")
+
+        summary['crawl'] = recorder.summarize()
+        if name:
+            summary['source'] = name
+            summary['collection'] = source['collection']
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        for line in format_summary(summary):
+            logging.info(line)
+        logging.info(f"Run state saved to {state_file}, report saved to {report_file}")
+
+        if summary['interrupted']:
+            interrupted = True
+            break
+
+    if args.index_root and not interrupted:
+        manifest = snapshot.publish(args.index_root, version)
+        logging.info(f"Published snapshot {version} with {manifest['count']} fatwas")
+
+
+if __name__ == "__main__":
+    main()
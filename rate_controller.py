@@ -0,0 +1,150 @@
+"""
+Adaptive (AIMD) request pacing for the scrapers.
+
+The request rate grows additively while the server answers quickly and
+successfully, and is cut multiplicatively on 429/503, server errors or when
+response latency climbs well above its running baseline. Retry-After is
+honoured, and after repeated consecutive failures a circuit breaker pauses all
+requests for a cool-down period before letting a single probe through.
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateController:
+    """Thread-safe AIMD pacer with Retry-After support and a circuit breaker.
+
+    Delays are the spacing between request starts, so concurrent workers share
+    a single request rate. min_delay bounds the fastest rate, max_delay the slowest.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, min_delay=1.0, max_delay=60.0, initial_delay=None, additive_step=0.05,
+                 decrease_factor=0.5, latency_factor=2.0, failure_threshold=5, cooldown=30.0,
+                 max_cooldown=600.0, jitter=0.1):
+        self.min_delay = max(min_delay, 1e-3)
+        self.max_delay = max(max_delay, self.min_delay)
+        self.additive_step = additive_step  # requests/second added per healthy response
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.jitter = jitter
+
+        self.rate = 1.0 / self.max_delay
+        self.set_delay(initial_delay if initial_delay is not None else self.max_delay)
+        self.latency_baseline = None
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.blocked_until = 0.0
+        self.next_request_at = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def delay(self):
+        """Current spacing between requests in seconds."""
+        return 1.0 / self.rate
+
+    def set_delay(self, delay):
+        self.rate = 1.0 / min(max(delay, self.min_delay), self.max_delay)
+
+    def wait(self):
+        """Block until the next request may be sent."""
+        with self.lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now < self.open_until:
+                    logging.warning(f"Circuit open, pausing requests for {self.open_until - now:.1f}s")
+                start_at = max(now, self.open_until)
+                self.state = self.HALF_OPEN
+            else:
+                start_at = now
+            start_at = max(start_at, self.blocked_until, self.next_request_at)
+
+            delay = self.delay
+            if self.jitter:
+                delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            # While half-open, let a single probe through and hold the others back
+            if self.state == self.HALF_OPEN:
+                delay = max(delay, self.max_delay)
+            self.next_request_at = start_at + delay
+
+        sleep_for = start_at - time.monotonic()
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+
+    def record(self, latency=None, status_code=None, retry_after=None, error=False):
+        """Feed back the outcome of a request."""
+        with self.lock:
+            now = time.monotonic()
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+            if error or status_code in THROTTLE_STATUSES or (status_code and status_code >= 500):
+                self._decrease()
+                self.consecutive_failures += 1
+                if self.state == self.HALF_OPEN or (
+                        self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                    self._open_circuit(now)
+                return
+
+            if self.state == self.HALF_OPEN:
+                logging.info("Circuit closed, server is responding again")
+                self.cooldown = self.base_cooldown
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+            if latency is None:
+                return
+            if self.latency_baseline is not None and latency > self.latency_factor * self.latency_baseline:
+                # Rising latency is an early sign of an overloaded server
+                self._decrease()
+            else:
+                self.rate = min(self.rate + self.additive_step, 1.0 / self.min_delay)
+            # Slow-moving baseline so a gradual slowdown still registers
+            if self.latency_baseline is None:
+                self.latency_baseline = latency
+            else:
+                self.latency_baseline = 0.9 * self.latency_baseline + 0.1 * latency
+
+    def retry_delay(self, attempt):
+        """Backoff before retry number `attempt` (0-based), with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.delay * (2 ** (attempt + 1))))
+
+    def _decrease(self):
+        self.rate = max(self.rate * self.decrease_factor, 1.0 / self.max_delay)
+        logging.info(f"Backing off: delay between requests now {self.delay:.2f}s")
+
+    def _open_circuit(self, now):
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        self.state = self.OPEN
+        self.open_until = now + self.cooldown
+        logging.warning(f"{self.consecutive_failures} consecutive failures, opening circuit for {self.cooldown:.1f}s")
@@ -0,0 +1,143 @@
+"""
+Compact article records and streaming JSONL storage for the scrapers.
+
+In stream mode the advanced scraper appends every article to a JSON Lines
+file as soon as it is extracted instead of collecting them in memory. The
+JSON, CSV and Excel exports are then produced by converters that read that
+file one record at a time, so memory use does not grow with the corpus.
+"""
+
+import csv
+import json
+import os
+from dataclasses import MISSING, asdict, dataclass, fields
+from typing import Optional
+
+
+@dataclass(slots=True)
+class ArticleRecord:
+    """One scraped article."""
+
+    title: str
+    question: str
+    answer: str
+    url: str
+    scraped_at: str = ''
+    # Structured fields from article_fields.py; older records don't have them
+    series_number: Optional[int] = None
+    published: Optional[int] = None
+    topic: str = ''
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**{name: values.get(name, FIELD_DEFAULTS[name]) for name in FIELD_NAMES})
+
+    def to_dict(self):
+        return asdict(self)
+
+
+FIELD_NAMES = [field.name for field in fields(ArticleRecord)]
+FIELD_DEFAULTS = {field.name: '' if field.default is MISSING else field.default for field in fields(ArticleRecord)}
+
+
+class JsonlWriter:
+    """Appends records to a JSON Lines file, flushing each one so a crash loses nothing."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+        self.count = 0
+
+    def write(self, record):
+        if isinstance(record, ArticleRecord):
+            record = record.to_dict()
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_jsonl(path):
+    """Yield ArticleRecords from a JSON Lines file, skipping a truncated last line."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield ArticleRecord.from_dict(json.loads(line))
+            except ValueError:
+                # A write interrupted by a crash; the article will simply be fetched again
+                continue
+
+
+def iter_latest(path):
+    """Yield the most recent record per URL, in file order.
+
+    Refetched articles are appended rather than rewritten, so the file can hold
+    several versions of one URL. The first pass only keeps one line number per URL.
+    """
+    latest = {}
+    for line_num, record in enumerate(iter_jsonl(path)):
+        latest[record.url] = line_num
+    keep = set(latest.values())
+    del latest
+
+    for line_num, record in enumerate(iter_jsonl(path)):
+        if line_num in keep:
+            yield record
+
+
+def read_urls(path):
+    """The set of URLs already stored in a JSON Lines file."""
+    return {record.url for record in iter_jsonl(path)}
+
+
+def write_json(records, filename):
+    """Stream records into a JSON array laid out like json.dump(..., indent=2)."""
+    count = 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for record in records:
+            body = json.dumps(record.to_dict(), ensure_ascii=False, indent=2)
+            f.write((',\n  ' if count else '\n  ') + body.replace('\n', '\n  '))
+            count += 1
+        f.write('\n]' if count else ']')
+    return count
+
+
+def write_csv(records, filename):
+    """Stream records into a CSV file with one column per ArticleRecord field."""
+    count = 0
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(FIELD_NAMES)
+        for record in records:
+            writer.writerow([getattr(record, name) for name in FIELD_NAMES])
+            count += 1
+    return count
+
+
+def write_excel(records, filename):
+    """Stream records into an .xlsx file using openpyxl's write-only mode."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(FIELD_NAMES)
+    count = 0
+    for record in records:
+        sheet.append([getattr(record, name) for name in FIELD_NAMES])
+        count += 1
+    workbook.save(filename)
+    return count
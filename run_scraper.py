@@ -11,12 +11,17 @@ def main():
     parser = argparse.ArgumentParser(description='Run the Mufti WP scraper')
     parser.add_argument('--basic', action='store_true', help='Run the basic scraper')
     parser.add_argument('--advanced', action='store_true', help='Run the advanced scraper')
+    parser.add_argument('--pipeline', action='store_true', help='Scrape, deduplicate, embed and store articles in one pass')
     parser.add_argument('--analyze', action='store_true', help='Analyze the scraped data')
     parser.add_argument('--start-page', type=int, help='Page number to start scraping from')
     parser.add_argument('--max-pages', type=int, help='Maximum number of pages to scrape')
     parser.add_argument('--no-resume', action='store_true', help='Do not resume from checkpoint')
-    parser.add_argument('--delay-min', type=float, default=1, help='Minimum delay between requests in seconds')
-    parser.add_argument('--delay-max', type=float, default=3, help='Maximum delay between requests in seconds')
+    parser.add_argument('--delay-min', type=float, default=1, help='Fastest pacing: minimum delay between requests in seconds')
+    parser.add_argument('--delay-max', type=float, default=3, help='Initial delay between requests in seconds')
+    parser.add_argument('--sitemap', help='Sitemap or RSS/Atom feed (URL or file) to discover articles from (advanced scraper, pipeline)')
+    parser.add_argument('--discovery-workers', type=int, default=4, help='Listing pages to fetch concurrently (advanced scraper, pipeline)')
+    parser.add_argument('--fetch-workers', type=int, default=4, help='Articles fetched concurrently (pipeline)')
+    parser.add_argument('--embed-workers', type=int, default=2, help='Embedding requests in flight (pipeline)')
     
     args = parser.parse_args()
     
@@ -34,31 +39,49 @@ def main():
         print("Error: advanced_scraper.py not found. Make sure you're in the correct directory.")
         return
     
+    if args.pipeline and not os.path.exists('pipeline.py'):
+        print("Error: pipeline.py not found. Make sure you're in the correct directory.")
+        return
+    
     if args.analyze and not os.path.exists('analyze_data.py'):
         print("Error: analyze_data.py not found. Make sure you're in the correct directory.")
         return
     
-    # Run the selected script
+    # Options shared by the advanced scraper and the pipeline
+    crawl_args = []
+    if args.start_page is not None:
+        crawl_args += ['--start-page', str(args.start_page)]
+    if args.max_pages is not None:
+        crawl_args += ['--max-pages', str(args.max_pages)]
+    if args.no_resume:
+        crawl_args.append('--no-resume')
+    crawl_args += ['--delay-min', str(args.delay_min), '--delay-max', str(args.delay_max)]
+    crawl_args += ['--discovery-workers', str(args.discovery_workers)]
+    if args.sitemap:
+        crawl_args += ['--sitemap', args.sitemap]
+    
+    # Run the selected steps in this process, one after the other
     if args.basic:
         print("Running basic scraper...")
-        os.system('python3 scraper.py')
+        import scraper
+        scraper.main()
     
     if args.advanced:
-        cmd = 'python3 advanced_scraper.py'
-        if args.start_page is not None:
-            cmd += f' --start-page {args.start_page}'
-        if args.max_pages is not None:
-            cmd += f' --max-pages {args.max_pages}'
-        if args.no_resume:
-            cmd += ' --no-resume'
-        cmd += f' --delay-min {args.delay_min} --delay-max {args.delay_max}'
-        
-        print(f"Running advanced scraper with command: {cmd}")
-        os.system(cmd)
+        print(f"Running advanced scraper with options: {' '.join(crawl_args)}")
+        import advanced_scraper
+        advanced_scraper.main(crawl_args)
+    
+    if args.pipeline:
+        pipeline_args = crawl_args + ['--fetch-workers', str(args.fetch_workers),
+                                      '--embed-workers', str(args.embed_workers)]
+        print(f"Running pipeline with options: {' '.join(pipeline_args)}")
+        import pipeline
+        pipeline.main(pipeline_args)
     
     if args.analyze:
         print("Analyzing scraped data...")
-        os.system('python3 analyze_data.py')
+        import analyze_data
+        analyze_data.main([])
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -7,19 +7,26 @@ from tqdm import tqdm
 import os
 import json
 from urllib.parse import urljoin
+from http_client import HttpClient
+from article_fields import structured_fields
+
+DEFAULT_BASE_URL = "https://www.muftiwp.gov.my/ms/artikel/irsyad-hukum/umum"
 
 class MuftiWPScraper:
-    def __init__(self):
-        self.base_url = "https://www.muftiwp.gov.my/ms/artikel/irsyad-hukum/umum"
+    def __init__(self, base_url=DEFAULT_BASE_URL, article_delay=1, page_delay=2):
+        self.base_url = base_url
+        self.article_delay = article_delay
+        self.page_delay = page_delay
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.data = []
+        self.http = HttpClient(headers=self.headers)
         
     def get_page_content(self, url):
         """Get the HTML content of a page."""
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
@@ -76,7 +83,8 @@ class MuftiWPScraper:
                 'title': self.clean_text(title),
                 'question': "No question found",
                 'answer': "No answer found",
-                'url': article_url
+                'url': article_url,
+                **structured_fields(title, article_url, soup)
             }
         
         # Extract content
@@ -159,7 +167,8 @@ class MuftiWPScraper:
             'title': title,
             'question': question,
             'answer': answer,
-            'url': article_url
+            'url': article_url,
+            **structured_fields(title, article_url, soup)
         }
     
     def scrape_all_pages(self):
@@ -193,10 +202,10 @@ class MuftiWPScraper:
                 article_data = self.extract_article_data(link)
                 if article_data:
                     self.data.append(article_data)
-                time.sleep(1)  # Be nice to the server
+                time.sleep(self.article_delay)  # Be nice to the server
             
             page_num += 1
-            time.sleep(2)  # Be nice to the server between pages
+            time.sleep(self.page_delay)  # Be nice to the server between pages
     
     def save_to_json(self, filename="mufti_wp_articles.json"):
         """Save the scraped data to a JSON file."""
@@ -216,6 +225,10 @@ class MuftiWPScraper:
             return
         
         df = pd.DataFrame(self.data)
+        # Keep series numbers and dates as integers even when some articles lack them
+        for column in ('series_number', 'published'):
+            if column in df.columns:
+                df[column] = df[column].astype('Int64')
         df.to_csv(filename, index=False, encoding='utf-8')
         print(f"Data saved to {filename}")
         
@@ -0,0 +1,120 @@
+"""
+Streaming parsers for XML sitemaps and RSS/Atom feeds.
+
+Used by the advanced scraper as a fast alternative to crawling every listing
+page: entries are read with iterparse and discarded as soon as they are
+yielded, so even very large sitemaps are parsed in constant memory.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+
+
+def local_name(tag):
+    """Strip the XML namespace from a tag name."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def child_text(element, name):
+    """Text of the first direct child with the given local name, or None."""
+    for child in element:
+        if local_name(child.tag) == name:
+            return (child.text or '').strip() or None
+    return None
+
+
+def parse_timestamp(value):
+    """Parse a W3C datetime (sitemaps, Atom) or RFC 822 date (RSS) into an aware datetime."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def iter_entries(source):
+    """Yield (kind, url, lastmod) tuples from a sitemap, sitemap index, RSS or Atom document.
+
+    kind is 'sitemap' for children of a sitemap index and 'url' for pages.
+    source is a file path or a binary file-like object.
+    """
+    context = ET.iterparse(source, events=('start', 'end'))
+    _, root = next(context)
+    root_name = local_name(root.tag)
+
+    for event, element in context:
+        if event != 'end':
+            continue
+        name = local_name(element.tag)
+
+        if name == 'sitemap' and root_name == 'sitemapindex':
+            yield 'sitemap', child_text(element, 'loc'), parse_timestamp(child_text(element, 'lastmod'))
+        elif name == 'url' and root_name == 'urlset':
+            yield 'url', child_text(element, 'loc'), parse_timestamp(child_text(element, 'lastmod'))
+        elif name == 'item':
+            # RSS 2.0
+            yield 'url', child_text(element, 'link'), parse_timestamp(child_text(element, 'pubDate'))
+        elif name == 'entry':
+            # Atom: prefer the rel="alternate" link
+            href = None
+            for child in element:
+                if local_name(child.tag) == 'link' and child.get('rel', 'alternate') == 'alternate':
+                    href = child.get('href')
+                    break
+            updated = child_text(element, 'updated') or child_text(element, 'published')
+            yield 'url', href, parse_timestamp(updated)
+        else:
+            continue
+
+        # Free the finished entry and everything parsed before it
+        element.clear()
+        root.clear()
+
+
+def open_local(location):
+    """Open a sitemap given as a local path or file:// URL, or return None if it isn't local."""
+    if location.startswith('file://'):
+        location = location[len('file://'):]
+    if os.path.exists(location):
+        return open(location, 'rb')
+    return None
+
+
+def discover_urls(location, open_remote, path_filter=None, max_depth=3):
+    """Walk a sitemap (following sitemap indexes) or feed and yield (url, lastmod) pairs.
+
+    open_remote(url) must return a binary file-like object for non-local locations.
+    Only URLs containing path_filter are yielded. Child sitemap locations are
+    resolved relative to their parent, so fixture indexes on disk can use relative paths.
+    """
+    seen_sitemaps = set()
+
+    def walk(current, depth):
+        if current in seen_sitemaps or depth > max_depth:
+            return
+        seen_sitemaps.add(current)
+
+        stream = open_local(current) or open_remote(current)
+        try:
+            for kind, url, lastmod in iter_entries(stream):
+                if not url:
+                    continue
+                if kind == 'sitemap':
+                    yield from walk(urljoin(current, url), depth + 1)
+                elif path_filter is None or path_filter in url:
+                    yield url, lastmod
+        finally:
+            stream.close()
+
+    yield from walk(location, 0)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Versioned, immutable index snapshots for the search API.
+
+An index root holds one directory per snapshot and a CURRENT file naming the
+live one:
+
+    INDEX_ROOT/
+        CURRENT                      e.g. "20250320-081500"
+        snapshots/20250320-081500/   a complete DB_PATH: Chroma files, artifacts/ and SNAPSHOT.json
+
+Ingestion never writes to a published snapshot. `begin` copies the live
+snapshot (or an existing Chroma directory) into a new version, ingestion and
+the offline jobs (llm/llm.py, pipeline.py, llm/related.py, llm/reduce.py)
+write to that copy, and `publish` checks it, writes its manifest and swaps
+CURRENT with an atomic rename. The API (INDEX_ROOT) picks the new snapshot up
+on POST /admin/reload or by watching CURRENT, loads and warms it in the
+background, and only then switches requests over.
+
+    version=$(python snapshot.py begin)
+    DB_PATH=$(python snapshot.py path "$version") python llm/llm.py
+    python snapshot.py publish "$version"
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "SNAPSHOT.json"
+
+
+def snapshot_path(root, version):
+    return os.path.join(root, SNAPSHOTS_DIR, version)
+
+
+def current_version(root):
+    """The live snapshot version, or None if nothing has been published."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(root, version):
+    """A snapshot's manifest, or None if it has not been published."""
+    try:
+        with open(os.path.join(snapshot_path(root, version), MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_snapshots(root):
+    """(version, manifest or None) for every snapshot directory, oldest first."""
+    directory = os.path.join(root, SNAPSHOTS_DIR)
+    if not os.path.isdir(directory):
+        return []
+    versions = sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+    return [(version, read_manifest(root, version)) for version in versions]
+
+
+def write_atomic(path, text):
+    """Replace a file in one rename, so readers see either the old or the new content."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def begin(root, source=None, resume=True):
+    """Start a snapshot as a copy of source (a Chroma directory) or of the live snapshot; returns its version.
+
+    With resume, an unpublished snapshot left by an interrupted run is returned instead of starting over.
+    """
+    if resume and source is None:
+        building = [version for version, manifest in list_snapshots(root) if manifest is None]
+        if building:
+            return building[-1]
+
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = snapshot_path(root, version)
+    while os.path.exists(path):
+        version += "a"
+        path = snapshot_path(root, version)
+
+    if source is None:
+        live = current_version(root)
+        source = snapshot_path(root, live) if live else None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if source:
+        # The manifest is written again on publish; a copy starts out unpublished
+        shutil.copytree(source, path, ignore=shutil.ignore_patterns(MANIFEST_FILE))
+    else:
+        os.makedirs(path)
+    return version
+
+
+def publish(root, version, collection_names=None):
+    """Check a snapshot, write its manifest and make it the live one.
+
+    Every collection (or just collection_names) must hold fatwas, so an empty or missing shard is never published.
+    """
+    path = snapshot_path(root, version)
+    if not os.path.isdir(path):
+        raise ValueError(f"No snapshot {version} in {root}")
+
+    import chromadb
+
+    client = chromadb.PersistentClient(path=path)
+    counts = {}
+    for name in collection_names or client.list_collections():
+        try:
+            counts[name] = client.get_collection(name).count()
+        except Exception:
+            raise ValueError(f"Snapshot {version} has no collection {name}")
+    empty = [name for name, count in counts.items() if not count]
+    if not counts or empty:
+        raise ValueError(f"Snapshot {version} has no fatwas in {', '.join(empty) or 'any collection'}")
+
+    artifacts_dir = os.path.join(path, "artifacts")
+    manifest = {
+        "version": version,
+        "collections": counts,
+        "count": sum(counts.values()),
+        "artifacts": sorted(os.listdir(artifacts_dir)) if os.path.isdir(artifacts_dir) else [],
+        "previous": current_version(root),
+        "published_at": datetime.now().isoformat(),
+    }
+    write_atomic(os.path.join(path, MANIFEST_FILE), json.dumps(manifest, indent=2))
+    write_atomic(os.path.join(root, CURRENT_FILE), version + "\n")
+    return manifest
+
+
+def rollback(root, version):
+    """Point CURRENT back at an earlier published snapshot."""
+    if read_manifest(root, version) is None:
+        raise ValueError(f"Snapshot {version} is not published")
+    write_atomic(os.path.join(root, CURRENT_FILE), version + "\n")
+
+
+def prune(root, keep=3):
+    """Delete all but the newest `keep` published snapshots, never the live one; returns the deleted versions."""
+    live = current_version(root)
+    published = [version for version, manifest in list_snapshots(root) if manifest is not None]
+    deleted = [version for version in published[:-keep] if version != live] if keep > 0 else []
+    for version in deleted:
+        shutil.rmtree(snapshot_path(root, version))
+    return deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage versioned index snapshots for the search API')
+    parser.add_argument('--index-root', default=os.getenv("INDEX_ROOT", "./indexes"), help='Snapshot root directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    begin_parser = subparsers.add_parser('begin', help='Start a new snapshot and print its version')
+    begin_parser.add_argument('--from', dest='source', help='Copy this Chroma directory instead of the live snapshot')
+    begin_parser.add_argument('--no-resume', action='store_true', help='Do not reuse an unpublished snapshot')
+    path_parser = subparsers.add_parser('path', help='Print the directory of a snapshot')
+    path_parser.add_argument('version', nargs='?', help='Snapshot version (default: the live one)')
+    publish_parser = subparsers.add_parser('publish', help='Check a snapshot and make it the live one')
+    publish_parser.add_argument('version')
+    publish_parser.add_argument('--collection', action='append',
+                                help='Collection that must hold fatwas (repeat for several; default: all of them)')
+    rollback_parser = subparsers.add_parser('rollback', help='Make an earlier published snapshot live again')
+    rollback_parser.add_argument('version')
+    prune_parser = subparsers.add_parser('prune', help='Delete old published snapshots')
+    prune_parser.add_argument('--keep', type=int, default=3, help='Published snapshots to keep')
+    subparsers.add_parser('list', help='List snapshots')
+
+    args = parser.parse_args(argv)
+    root = args.index_root
+
+    try:
+        if args.command == 'begin':
+            print(begin(root, args.source, resume=not args.no_resume))
+        elif args.command == 'path':
+            version = args.version or current_version(root)
+            if version is None:
+                raise ValueError(f"Nothing published in {root}")
+            print(snapshot_path(root, version))
+        elif args.command == 'publish':
+            manifest = publish(root, args.version, args.collection)
+            print(f"Published {args.version} ({manifest['count']} fatwas), previous: {manifest['previous']}")
+        elif args.command == 'rollback':
+            rollback(root, args.version)
+            print(f"CURRENT is now {args.version}")
+        elif args.command == 'prune':
+            deleted = prune(root, args.keep)
+            print(f"Deleted {len(deleted)} snapshots: {', '.join(deleted) or '-'}")
+        else:
+            live = current_version(root)
+            for version, manifest in list_snapshots(root):
+                marker = "*" if version == live else " "
+                status = f"{manifest['count']} fatwas, published {manifest['published_at']}" if manifest else "unpublished"
+                print(f"{marker} {version}  {status}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Fatwa sources and the vector store shard each one is stored in.
+
+sources.json lists the sites and categories to ingest. Each source is crawled
+into its own Chroma collection (a shard), tagged with the source name in the
+collection metadata and in every fatwa's metadata, so the search API can find
+the shards, query them in parallel and tell clients where each hit came from:
+
+    [
+      {"name": "muftiwp", "label": "Mufti Wilayah Persekutuan: Irsyad Hukum Umum",
+       "base_url": "https://www.muftiwp.gov.my/ms/artikel/irsyad-hukum/umum", "collection": "mufti_fatwas"}
+    ]
+
+Only name and base_url are required. collection defaults to fatwas_<name>,
+sitemap is an optional sitemap or feed to discover articles from, and label
+is shown to people choosing sources.
+"""
+
+import json
+import re
+
+SOURCES_FILE = "sources.json"
+NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+def load_sources(path=SOURCES_FILE):
+    """The sources in a JSON file, with defaults filled in; raises ValueError if the file is invalid."""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} must hold a non-empty list of sources")
+
+    sources = []
+    for entry in entries:
+        name = entry.get('name') or ''
+        if not NAME_RE.match(name):
+            raise ValueError(f"Invalid source name {name!r}: use lowercase letters, digits, '-' and '_'")
+        if not entry.get('base_url'):
+            raise ValueError(f"Source {name} has no base_url")
+        sources.append({
+            'name': name,
+            'label': entry.get('label') or name,
+            'base_url': entry['base_url'],
+            'collection': entry.get('collection') or f"fatwas_{name}",
+            'sitemap': entry.get('sitemap'),
+        })
+
+    for field in ('name', 'collection'):
+        values = [source[field] for source in sources]
+        repeated = sorted({value for value in values if values.count(value) > 1})
+        if repeated:
+            raise ValueError(f"Sources must not share a {field}: {', '.join(repeated)}")
+    return sources
+
+
+def select_sources(sources, names=None):
+    """The sources with the given names (all of them when names is empty), in file order."""
+    if not names:
+        return sources
+    known = {source['name'] for source in sources}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown sources: {', '.join(unknown)}")
+    return [source for source in sources if source['name'] in names]
+
+
+def open_shard(client, source):
+    """The source's collection, created if needed and tagged with the source name and label."""
+    tags = {'source': source['name'], 'label': source['label']}
+    collection = client.get_or_create_collection(source['collection'], metadata=tags)
+    # Collections created before sources existed (or by llm/llm.py) get tagged on first use
+    metadata = collection.metadata or {}
+    if any(metadata.get(key) != value for key, value in tags.items()):
+        collection.modify(metadata={**metadata, **tags})
+    return collection
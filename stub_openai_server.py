@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI embeddings and chat completions APIs.
+
+Returns deterministic, hash-seeded vectors so the search API, the ingestion
+scripts and the benchmarks can run without network access or an OpenAI key.
+Chat completions answer with a canned sentence citing the numbered sources
+in the prompt, optionally streamed word by word, so /ask can run offline.
+Latency and errors can be injected to reproduce a slow or failing upstream,
+either from the command line or at runtime through /stub/config.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+    """Latency and error injection settings shared by all request threads."""
+
+    FIELDS = ('latency_ms', 'jitter_ms', 'per_item_ms', 'slow_rate', 'slow_ms', 'error_rate', 'error_statuses',
+              'retry_after', 'token_ms')
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, per_item_ms=0.0, error_rate=0.0,
+                 error_statuses=(500,), retry_after=1, seed=0, slow_rate=0.0, slow_ms=0.0, token_ms=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_item_ms = per_item_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.token_ms = token_ms
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def update(self, values):
+        with self.lock:
+            for field in self.FIELDS:
+                if field in values:
+                    setattr(self, field, values[field])
+
+    def delay_for(self, num_items):
+        """Seconds to stall before answering a request for num_items inputs."""
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            # An occasional stalled request, to reproduce a long latency tail
+            if self.slow_rate and self.rng.random() < self.slow_rate:
+                jitter += self.slow_ms
+            return max(0.0, self.latency_ms + jitter + self.per_item_ms * num_items) / 1000
+
+    def pick_error(self):
+        """Return an HTTP status to fail with, or None to succeed."""
+        with self.lock:
+            if self.error_rate and self.rng.random() < self.error_rate:
+                return self.rng.choice(self.error_statuses)
+        return None
+
+
+def stub_answer(prompt):
+    """A short answer that quotes and cites the first numbered source in the prompt."""
+    numbers = re.findall(r'^\[(\d+)\]', prompt, re.MULTILINE)
+    if not numbers:
+        return "Tiada sumber yang menjawab soalan ini."
+    first = re.search(r'^\[%s\][^\n]*\n([^\n]*)' % numbers[0], prompt, re.MULTILINE)
+    quote = ' '.join(first.group(1).split()[:25]) if first else ''
+    answer = f"Berdasarkan sumber [{numbers[0]}], {quote}"
+    if len(numbers) > 1:
+        answer += f" Lihat juga [{numbers[1]}]."
+    return answer
+
+
+def embed_text(text, dimensions=1536):
+    """Return a unit-length vector seeded from the SHA-256 of the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big')
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Handles the subset of the OpenAI API used by this project."""
+
+    server_version = "StubOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('', '/health'):
+            self.send_json(200, {"status": "ok"})
+        elif self.path.rstrip('/') == '/stub/config':
+            self.send_json(200, self.server.config.as_dict())
+        elif self.path.rstrip('/').endswith('/models'):
+            self.send_json(200, {"object": "list", "data": [
+                {"id": "text-embedding-ada-002", "object": "model", "owned_by": "stub"},
+                {"id": "stub-chat", "object": "model", "owned_by": "stub"}
+            ]})
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') == '/stub/config':
+            self.server.config.update(self.read_json())
+            self.send_json(200, self.server.config.as_dict())
+        elif self.path.rstrip('/').endswith('/embeddings'):
+            self.handle_embeddings()
+        elif self.path.rstrip('/').endswith('/chat/completions'):
+            self.handle_chat_completions()
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def handle_embeddings(self):
+        try:
+            payload = self.read_json()
+        except ValueError:
+            self.send_json(400, {"error": {"message": "Request body is not valid JSON"}})
+            return
+
+        inputs = payload.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = payload.get('dimensions') or self.server.dimensions
+
+        config = self.server.config
+        time.sleep(config.delay_for(len(inputs)))
+
+        error_status = config.pick_error()
+        if error_status:
+            headers = {'Retry-After': str(config.retry_after)} if error_status in (429, 503) else None
+            self.send_json(error_status, {"error": {
+                "message": f"Injected error {error_status}",
+                "type": "stub_error"
+            }}, headers)
+            return
+
+        data = [
+            {"object": "embedding", "index": i, "embedding": embed_text(text, dimensions)}
+            for i, text in enumerate(inputs)
+        ]
+        tokens = sum(len(text.split()) for text in inputs)
+        self.send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": payload.get('model', 'text-embedding-ada-002'),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+
+    def handle_chat_completions(self):
+        try:
+            payload = self.read_json()
+        except ValueError:
+            self.send_json(400, {"error": {"message": "Request body is not valid JSON"}})
+            return
+
+        config = self.server.config
+        time.sleep(config.delay_for(1))
+
+        error_status = config.pick_error()
+        if error_status:
+            headers = {'Retry-After': str(config.retry_after)} if error_status in (429, 503) else None
+            self.send_json(error_status, {"error": {
+                "message": f"Injected error {error_status}",
+                "type": "stub_error"
+            }}, headers)
+            return
+
+        messages = payload.get('messages') or [{}]
+        answer = stub_answer(messages[-1].get('content') or '')
+        model = payload.get('model', 'stub-chat')
+        created = int(time.time())
+        tokens = len(answer.split())
+
+        if not payload.get('stream'):
+            self.send_json(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens}
+            })
+            return
+
+        # Server-sent events, one word per chunk; the connection closes after [DONE]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        def send_chunk(delta, finish_reason=None):
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            send_chunk({"role": "assistant", "content": ""})
+            for index, word in enumerate(answer.split(' ')):
+                if index and config.token_ms:
+                    time.sleep(config.token_ms / 1000)
+                send_chunk({"content": word if index == 0 else f" {word}"})
+            send_chunk({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. it disconnected mid-answer
+            pass
+
+
+def create_server(host='127.0.0.1', port=8001, dimensions=1536, verbose=False, config=None):
+    """Create (but do not start) a stub server instance."""
+    server = ThreadingHTTPServer((host, port), StubOpenAIHandler)
+    server.daemon_threads = True
+    server.dimensions = dimensions
+    server.config = config or StubConfig()
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stub of the OpenAI embeddings API')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind to')
+    parser.add_argument('--port', type=int, default=8001, help='Port to listen on')
+    parser.add_argument('--dimensions', type=int, default=1536, help='Embedding dimensions to return')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Base latency added to every request')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Uniform +/- jitter added to the base latency')
+    parser.add_argument('--per-item-ms', type=float, default=0, help='Extra latency per input in a batch')
+    parser.add_argument('--slow-rate', type=float, default=0, help='Fraction of requests that stall (0-1)')
+    parser.add_argument('--slow-ms', type=float, default=0, help='Extra latency of a stalled request')
+    parser.add_argument('--token-ms', type=float, default=0, help='Delay between streamed chat completion words')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests to fail (0-1)')
+    parser.add_argument('--error-status', default='500',
+                        help='Comma-separated HTTP statuses to fail with, e.g. 429,500,503')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429/503')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for jitter and error injection')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        per_item_ms=args.per_item_ms,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        token_ms=args.token_ms,
+        error_rate=args.error_rate,
+        error_statuses=[int(status) for status in args.error_status.split(',')],
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    server = create_server(args.host, args.port, args.dimensions, args.verbose, config)
+    print(f"Stub OpenAI server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from bs4 import BeautifulSoup
+from article_fields import find_published, metadata_fields, parse_date, series_number, structured_fields, topic_from_url
+from mock_site import render_article, synthetic_article
+
+URL = "https://www.muftiwp.gov.my/ms/artikel/irsyad-hukum/umum/5980-irsyad-hukum-siri-ke-865-tempoh-suci-antara-haid-dan-nifas"
+
+def test_series_and_topic():
+    """The series number comes from the title and the topic from the URL path."""
+    assert series_number("IRSYAD HUKUM SIRI KE-865: TEMPOH SUCI ANTARA HAID DAN NIFAS") == 865
+    assert series_number("Irsyad al-Fatwa Siri Ke 12 : Hukum") == 12
+    assert series_number("BAYAN LINNAS") is None
+    assert topic_from_url(URL) == 'umum'
+    assert topic_from_url("https://www.muftiwp.gov.my/ms/artikel/irsyad-hukum/haji-korban/123-slug") == 'haji-korban'
+
+def test_parse_date():
+    """ISO, Malay month name and numeric dates all become yyyymmdd integers."""
+    assert parse_date("2025-03-20T08:00:00+08:00") == 20250320
+    assert parse_date("Diterbitkan: 20 Mac 2025") == 20250320
+    assert parse_date("Dicipta pada 5hb Ogos 2019") == 20190805
+    assert parse_date("20/03/2025") == 20250320
+    assert parse_date("31 Februari 2025") is None
+    assert parse_date("") is None
+
+def test_published_from_page():
+    """The publication date is read from the article page markup."""
+    article = synthetic_article(10)
+    soup = BeautifulSoup(render_article(article), 'html.parser')
+    assert find_published(soup) == article['published']
+    assert structured_fields(article['title'], URL, soup) == {
+        'series_number': 10, 'published': article['published'], 'topic': 'umum'
+    }
+    assert find_published(BeautifulSoup('<dd class="create">Dicipta: 1 Januari 2020</dd>', 'html.parser')) == 20200101
+
+def test_metadata_fields():
+    """Stored fields win over parsed ones, and unknown values are left out of the metadata."""
+    title = "IRSYAD HUKUM SIRI KE-865: HUKUM WUDHU"
+    assert metadata_fields({'title': title, 'url': URL}) == {'series_number': 865, 'topic': 'umum'}
+    assert metadata_fields({'title': title, 'url': URL, 'series_number': 12, 'published': 20250320}) == {
+        'series_number': 12, 'published': 20250320, 'topic': 'umum'
+    }
+    assert metadata_fields({'title': 'Tanpa siri', 'url': 'https://example.com/x'}) == {}
+
+if __name__ == "__main__":
+    test_series_and_topic()
+    test_parse_date()
+    test_published_from_page()
+    test_metadata_fields()
+    print("All article field tests passed")
@@ -0,0 +1,55 @@
+import random
+from dedupe import build_report, find_duplicates, lsh_parameters
+
+WORDS = "hukum solat puasa zakat wudhu haji niat syarak ulama mazhab harus makruh haram wajib sunat dalil hadis".split()
+
+def make_article(seed, words=300):
+    rng = random.Random(seed)
+    answer = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return {
+        'title': f"IRSYAD HUKUM SIRI KE-{seed}",
+        'question': f"Soalan nombor {seed}?",
+        'answer': f"Ringkasan Jawapan: {answer}",
+        'url': f"https://example.com/irsyad-hukum/{seed}",
+    }
+
+def repost(article, changes=3, seed=0):
+    """A copy of an article with a few words changed, under a new URL."""
+    rng = random.Random(seed)
+    words = article['answer'].split()
+    for _ in range(changes):
+        words[rng.randrange(2, len(words))] = 'berubah'
+    return dict(article, answer=' '.join(words), url=article['url'] + '-repost')
+
+def test_near_duplicates():
+    """Lightly edited reposts are clustered with their original and the rest stay unique."""
+    articles = [make_article(seed) for seed in range(30)]
+    records = articles + [repost(articles[i], seed=i) for i in range(5)]
+    clusters, candidate_pairs, lsh = find_duplicates(records, threshold=0.8)
+    report, duplicates = build_report(records, clusters, candidate_pairs, lsh, 0.8, batch_size=10)
+    print(f"{report['clusters']} clusters, {candidate_pairs} candidate pairs of {report['all_pairs']}")
+    assert report['clusters'] == 5
+    assert report['duplicate_articles'] == 5
+    assert report['unique_articles'] == 30
+    assert report['embedding_calls_saved'] == 1
+    assert set(duplicates) | set(duplicates.values()) == {articles[i]['url'] for i in range(5)} | {records[30 + i]['url'] for i in range(5)}
+
+def test_canonical_prefers_structured_answer():
+    """The canonical article is the one with Ringkasan/Huraian sections."""
+    original = make_article(1)
+    plain = dict(original, answer=original['answer'].replace('Ringkasan Jawapan: ', '') + ' tambahan', url='https://example.com/plain')
+    clusters, _, _ = find_duplicates([plain, original], threshold=0.8)
+    assert len(clusters) == 1
+    assert clusters[0]['canonical'] == 1
+
+def test_lsh_parameters():
+    """Bands and rows always multiply to the signature length."""
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = lsh_parameters(128, threshold)
+        assert bands * rows == 128
+
+if __name__ == "__main__":
+    test_near_duplicates()
+    test_canonical_prefers_structured_answer()
+    test_lsh_parameters()
+    print("All dedupe tests passed")
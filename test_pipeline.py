@@ -0,0 +1,100 @@
+import os
+import tempfile
+from article_ids import article_id, drop_legacy_ids
+from pipeline import Pipeline, PipelineState
+from test_dedupe import make_article, repost
+
+class FakeScraper:
+    """Serves articles from memory in place of MuftiWPAdvancedScraper."""
+
+    def __init__(self, articles):
+        self.articles = {article['url']: dict(article, scraped_at='2024-01-01T00:00:00') for article in articles}
+        self.fetched = []
+
+    def extract_article_data(self, url, refresh=False):
+        self.fetched.append(url)
+        return self.articles.get(url)
+
+class FakeCollection:
+    def __init__(self):
+        self.items = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for id_, embedding, metadata in zip(ids, embeddings, metadatas):
+            self.items[id_] = (embedding, dict(metadata))
+
+    def get(self, ids=None, include=None, limit=None, offset=0):
+        if ids is None:
+            ids = list(self.items)[offset:offset + limit if limit else None]
+        ids = [id_ for id_ in ids if id_ in self.items]
+        return {'ids': ids, 'metadatas': [dict(self.items[id_][1]) for id_ in ids]}
+
+    def delete(self, ids):
+        for id_ in ids:
+            del self.items[id_]
+
+    def update(self, ids, metadatas):
+        for id_, metadata in zip(ids, metadatas):
+            self.items[id_] = (self.items[id_][0], metadata)
+
+def embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+def run(articles, state_path, **options):
+    scraper = FakeScraper(articles)
+    collection = options.pop('collection', FakeCollection())
+    state = PipelineState(state_path)
+    state.load()
+    pipeline = Pipeline(scraper, embed, collection, state, batch_size=4, batch_wait=0.05, queue_size=3, **options)
+    summary = pipeline.run(urls=[article['url'] for article in articles])
+    return summary, scraper, collection
+
+def test_pipeline_stores_unique_articles():
+    """Every unique article is embedded and stored under its URL id; reposts are linked, not embedded."""
+    articles = [make_article(seed) for seed in range(12)]
+    articles += [repost(articles[0], seed=1), repost(articles[1], seed=2)]
+    with tempfile.TemporaryDirectory() as work_dir:
+        summary, _, collection = run(articles, os.path.join(work_dir, 'state.json'), dedupe='link')
+    assert summary['stored'] == 12
+    assert summary['duplicates'] == 2
+    assert set(collection.items) == {article_id(article['url']) for article in articles[:12]}
+    assert collection.items[article_id(articles[0]['url'])][1]['duplicate_urls'] == articles[12]['url']
+
+def test_pipeline_resumes():
+    """A second run skips stored articles and duplicates, and still recognises new reposts."""
+    articles = [make_article(seed) for seed in range(8)]
+    with tempfile.TemporaryDirectory() as work_dir:
+        state_path = os.path.join(work_dir, 'state.json')
+        _, _, collection = run(articles, state_path)
+        more = articles + [make_article(100), repost(articles[3], seed=3)]
+        summary, scraper, collection = run(more, state_path, collection=collection)
+    assert summary['skipped'] == 8
+    assert sorted(scraper.fetched) == sorted([more[8]['url'], more[9]['url']])
+    assert summary['stored'] == 9
+    assert summary['duplicates'] == 1
+
+def test_drop_legacy_ids():
+    """Positional ids are deleted once their URL is stored under its URL id, and kept until then."""
+    articles = [make_article(seed) for seed in range(3)]
+    collection = FakeCollection()
+    for position, article in enumerate(articles):
+        collection.items[str(position)] = ([0.0], {'url': article['url']})
+    with tempfile.TemporaryDirectory() as work_dir:
+        run(articles[:2], os.path.join(work_dir, 'state.json'), collection=collection)
+    assert drop_legacy_ids(collection, page_size=2) == 2
+    assert set(collection.items) == {article_id(article['url']) for article in articles[:2]} | {'2'}
+    assert drop_legacy_ids(collection) == 0
+
+def test_pipeline_tags_source():
+    """With a source, every stored article's metadata names it, so the API can report and filter by it."""
+    articles = [make_article(seed) for seed in range(3)]
+    with tempfile.TemporaryDirectory() as work_dir:
+        _, _, collection = run(articles, os.path.join(work_dir, 'state.json'), source='negeri')
+    assert {metadata['source'] for _, metadata in collection.items.values()} == {'negeri'}
+
+if __name__ == "__main__":
+    test_pipeline_stores_unique_articles()
+    test_pipeline_resumes()
+    test_drop_legacy_ids()
+    test_pipeline_tags_source()
+    print("All pipeline tests passed")
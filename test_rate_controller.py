@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import rate_controller
+from rate_controller import AdaptiveRateController, parse_retry_after
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def with_fake_clock(test):
+    """Run test(clock) with the controller reading a fake clock."""
+    clock = FakeClock()
+    original = rate_controller.time
+    rate_controller.time = clock
+    try:
+        test(clock)
+    finally:
+        rate_controller.time = original
+
+def controller(**options):
+    settings = dict(min_delay=0.5, max_delay=10.0, additive_step=0.1, failure_threshold=3, cooldown=30.0,
+                    max_cooldown=100.0, jitter=0)
+    settings.update(options)
+    return AdaptiveRateController(**settings)
+
+def close(a, b):
+    return abs(a - b) < 1e-9
+
+def test_additive_increase():
+    """Each healthy response adds additive_step requests/second, up to 1/min_delay."""
+    def run(clock):
+        pacer = controller()
+        assert close(pacer.rate, 0.1)
+        pacer.record(latency=0.1)
+        assert close(pacer.rate, 0.2)
+        for _ in range(100):
+            pacer.record(latency=0.1)
+        assert close(pacer.delay, 0.5)
+    with_fake_clock(run)
+
+def test_multiplicative_decrease():
+    """429, 5xx, errors and latency spikes halve the rate, never below 1/max_delay."""
+    def run(clock):
+        pacer = controller(initial_delay=0.5, failure_threshold=100)
+        pacer.record(status_code=429)
+        assert close(pacer.delay, 1.0)
+        pacer.record(status_code=502)
+        assert close(pacer.delay, 2.0)
+        pacer.record(error=True)
+        assert close(pacer.delay, 4.0)
+        for _ in range(5):
+            pacer.record(status_code=503)
+        assert close(pacer.delay, 10.0)
+
+        # Latency well above the running baseline also backs off, before any error
+        pacer = controller(initial_delay=1.0)
+        pacer.record(latency=0.1)
+        before = pacer.delay
+        pacer.record(latency=0.5)
+        assert close(pacer.delay, before * 2)
+        assert pacer.state == AdaptiveRateController.CLOSED
+    with_fake_clock(run)
+
+def test_circuit_opens_after_failures():
+    """The circuit opens on the failure_threshold-th consecutive failure; a success resets the count."""
+    def run(clock):
+        pacer = controller()
+        pacer.record(status_code=503)
+        pacer.record(status_code=503)
+        pacer.record(latency=0.1)
+        pacer.record(status_code=503)
+        pacer.record(status_code=503)
+        assert pacer.state == AdaptiveRateController.CLOSED
+        pacer.record(status_code=503)
+        assert pacer.state == AdaptiveRateController.OPEN
+        assert close(pacer.open_until, clock.now + 30.0)
+    with_fake_clock(run)
+
+def test_half_open_probe():
+    """After the cool-down one probe goes through; a failed probe doubles the cool-down, a good one closes."""
+    def run(clock):
+        pacer = controller()
+        for _ in range(3):
+            pacer.record(status_code=503)
+        opened_at = clock.now
+
+        # The probe waits out the cool-down; the next request is held back by max_delay
+        pacer.wait()
+        assert close(clock.now, opened_at + 30.0)
+        assert pacer.state == AdaptiveRateController.HALF_OPEN
+        pacer.wait()
+        assert close(clock.now, opened_at + 30.0 + 10.0)
+
+        pacer.record(status_code=503)
+        assert pacer.state == AdaptiveRateController.OPEN
+        assert close(pacer.cooldown, 60.0)
+        assert close(pacer.open_until, clock.now + 60.0)
+        pacer.wait()
+        pacer.record(status_code=503)
+        assert close(pacer.cooldown, 100.0)
+
+        pacer.wait()
+        pacer.record(latency=0.1)
+        assert pacer.state == AdaptiveRateController.CLOSED
+        assert close(pacer.cooldown, 30.0)
+    with_fake_clock(run)
+
+def test_retry_after():
+    """Retry-After is read as delta-seconds or an HTTP-date, and holds requests back until then."""
+    assert parse_retry_after("120") == 120.0
+    in_90s = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    assert 85 <= parse_retry_after(in_90s) <= 90
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("") is None
+
+    def run(clock):
+        pacer = controller(initial_delay=0.5)
+        start = clock.now
+        pacer.record(status_code=429, retry_after=20.0)
+        pacer.wait()
+        assert close(clock.now, start + 20.0)
+    with_fake_clock(run)
+
+if __name__ == "__main__":
+    test_additive_increase()
+    test_multiplicative_decrease()
+    test_circuit_opens_after_failures()
+    test_half_open_probe()
+    test_retry_after()
+    print("All rate controller tests passed")
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from sitemap import discover_urls, iter_entries
+from advanced_scraper import MuftiWPAdvancedScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def no_remote(url):
+    raise AssertionError(f"Unexpected remote fetch: {url}")
+
+def test_sitemap_index():
+    """Follow a sitemap index on disk and keep only irsyad-hukum articles."""
+    entries = list(discover_urls(os.path.join(FIXTURES, 'sitemap_index.xml'), no_remote, '/irsyad-hukum/'))
+    urls = [url for url, _ in entries]
+    print(f"Sitemap index: {len(entries)} articles")
+    assert len(entries) == 3
+    assert all('/irsyad-hukum/' in url for url in urls)
+    assert entries[0][1] == datetime(2025, 3, 20, 0, 0, tzinfo=timezone.utc)
+    assert entries[2][1] is None
+
+def test_feeds():
+    """RSS and Atom feeds yield article links with their publication dates."""
+    rss = list(iter_entries(os.path.join(FIXTURES, 'feed.rss')))
+    atom = list(iter_entries(os.path.join(FIXTURES, 'feed.atom')))
+    print(f"RSS: {len(rss)} items, Atom: {len(atom)} entries")
+    assert [kind for kind, _, _ in rss] == ['url', 'url']
+    assert rss[0][1] == atom[0][1]
+    assert rss[0][2] == atom[0][2]
+
+def test_stale_cache():
+    """Articles whose lastmod is newer than the cached copy are marked for refetching."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        scraper = MuftiWPAdvancedScraper(cache_dir=cache_dir)
+        entries = scraper.discover_from_sitemap(os.path.join(FIXTURES, 'sitemap_articles.xml'))
+        url, lastmod = entries[0]
+
+        cache_file = scraper.cache_path(url)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            f.write('<html></html>')
+        os.utime(cache_file, (lastmod.timestamp() - 60, lastmod.timestamp() - 60))
+        assert scraper.is_cache_stale(url, lastmod)
+        os.utime(cache_file, (time.time(), time.time()))
+        assert not scraper.is_cache_stale(url, lastmod)
+        print("Stale cache detection works")
+
+if __name__ == "__main__":
+    test_sitemap_index()
+    test_feeds()
+    test_stale_cache()
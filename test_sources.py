@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+from pipeline import per_source
+from sources import load_sources, select_sources
+
+def write_sources(work_dir, entries):
+    path = os.path.join(work_dir, 'sources.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+    return path
+
+def raises_value_error(function, *args):
+    try:
+        function(*args)
+    except ValueError:
+        return True
+    return False
+
+def test_load_sources_defaults():
+    """Only name and base_url are required; each source gets its own collection by default."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        sources = load_sources(write_sources(work_dir, [
+            {'name': 'muftiwp', 'base_url': 'https://example.org/umum', 'collection': 'mufti_fatwas'},
+            {'name': 'negeri-9', 'base_url': 'https://example.org/n9', 'sitemap': 'https://example.org/feed'},
+        ]))
+    assert [source['collection'] for source in sources] == ['mufti_fatwas', 'fatwas_negeri-9']
+    assert sources[1]['label'] == 'negeri-9'
+    assert sources[0]['sitemap'] is None
+    assert select_sources(sources, ['negeri-9']) == sources[1:]
+    assert select_sources(sources, None) == sources
+    assert raises_value_error(select_sources, sources, ['jakim'])
+
+def test_load_sources_rejects_clashes():
+    """Two sources can't share a name or a collection, and names must be usable as ids."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        for entries in (
+            [{'name': 'a1', 'base_url': 'u'}, {'name': 'a1', 'base_url': 'v'}],
+            [{'name': 'a1', 'base_url': 'u', 'collection': 'c1'}, {'name': 'b1', 'base_url': 'v', 'collection': 'c1'}],
+            [{'name': 'Mufti WP', 'base_url': 'u'}],
+            [{'name': 'a1'}],
+        ):
+            assert raises_value_error(load_sources, write_sources(work_dir, entries))
+
+def test_per_source_paths():
+    """Run state and reports get the source name before the extension; unnamed runs keep the plain path."""
+    assert per_source('pipeline_state.json', 'muftiwp') == 'pipeline_state.muftiwp.json'
+    assert per_source('pipeline_state.json', None) == 'pipeline_state.json'
+    assert per_source('', 'muftiwp') == ''
+
+if __name__ == "__main__":
+    test_load_sources_defaults()
+    test_load_sources_rejects_clashes()
+    test_per_source_paths()
+    print("All source tests passed")
@@ -0,0 +1,48 @@
+"""
+Timing and benchmark helpers shared by the crawl metrics and the benchmarks.
+
+crawl_metrics.py and api/benchmark.py summarise latencies the same way, and
+benchmark_scraper.py and api/benchmark.py both start local services and tag
+their results with the commit they measured.
+"""
+
+import os
+import subprocess
+import time
+
+import requests
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(sorted_values, pct):
+    """Linearly interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def wait_for(url, timeout=15.0):
+    """Poll a URL until it answers 200 or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None